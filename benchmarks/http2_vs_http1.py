@@ -0,0 +1,188 @@
+"""
+    Benchmarks Http2Transport against HTTP/1.1 connection pooling
+    (RequestsTransport) on a local TLS server.
+
+    Starts a hypercorn server speaking both HTTP/2 and HTTP/1.1 over TLS, with a
+    throwaway self-signed certificate, then sends the same concurrent renders
+    through each transport with UrlboxClient.get_async and reports throughput,
+    latency percentiles and how many TCP connections the server saw.
+
+    Requires: pip install "httpx[http2]" hypercorn, and the openssl command.
+
+    Usage: python benchmarks/http2_vs_http1.py --requests 2000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import requests
+import urllib3
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+from urlbox import UrlboxClient
+from urlbox.testing import FakeUrlboxServer, LoadGenerator
+from urlbox.transports import Http2Transport, RequestsTransport
+
+API_KEY = "benchmark-key"
+API_SECRET = "benchmark-secret"
+
+
+class RenderApp:
+    """
+        A minimal ASGI stand-in for the Urlbox render endpoint, counting the
+        client connections it is reached over.
+    """
+
+    def __init__(self, latency, image_size):
+        self.latency = latency
+        self.fake_server = FakeUrlboxServer(
+            api_key=API_KEY, image_size=image_size
+        )
+        self.connections = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+
+        self.connections.add(tuple(scope["client"]))
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        body = self.fake_server.render_body(
+            {"url": scope["query_string"]}, "png"
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"image/png"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def self_signed_certificate(directory):
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-keyout",
+            keyfile,
+            "-out",
+            certfile,
+            "-days",
+            "1",
+            "-subj",
+            "/CN=127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+    return certfile, keyfile
+
+
+def run_transport(app, name, transport, host, arguments):
+    connections_before = len(app.connections)
+    client = UrlboxClient(
+        api_key=API_KEY,
+        api_secret=API_SECRET,
+        api_host_name=host,
+        transport=transport,
+    )
+    report = LoadGenerator(client).run_closed_loop(
+        concurrency=arguments.concurrency,
+        requests=arguments.requests,
+        mode="async",
+    )
+    transport.close()
+
+    result = {"transport": name}
+    result.update(report.as_dict())
+    result["connections"] = len(app.connections) - connections_before
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark HTTP/2 against HTTP/1.1 pooling."
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--image-size", type=int, default=20000)
+    parser.add_argument("--port", type=int, default=8443)
+    arguments = parser.parse_args()
+
+    urllib3.disable_warnings()
+    app = RenderApp(arguments.latency, arguments.image_size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        config = Config()
+        config.bind = [f"127.0.0.1:{arguments.port}"]
+        config.certfile, config.keyfile = self_signed_certificate(directory)
+        config.alpn_protocols = ["h2", "http/1.1"]
+        config.loglevel = "WARNING"
+
+        loop = asyncio.new_event_loop()
+        shutdown = asyncio.Event()
+        server = threading.Thread(
+            target=loop.run_until_complete,
+            args=(serve(app, config, shutdown_trigger=shutdown.wait),),
+            daemon=True,
+        )
+        server.start()
+        time.sleep(1)
+
+        host = f"https://127.0.0.1:{arguments.port}"
+        session = requests.Session()
+        session.verify = False
+        session.trust_env = False
+        session.mount(
+            "https://",
+            requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=arguments.concurrency
+            ),
+        )
+
+        results = [
+            run_transport(
+                app,
+                "HTTP/1.1 (RequestsTransport)",
+                RequestsTransport(session),
+                host,
+                arguments,
+            ),
+            run_transport(
+                app,
+                "HTTP/2 (Http2Transport)",
+                Http2Transport(verify=False),
+                host,
+                arguments,
+            ),
+        ]
+
+        loop.call_soon_threadsafe(shutdown.set)
+        server.join(5)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+    Benchmarks how the throughput of a single shared UrlboxClient scales with
+    the number of threads using it, with and without the GIL.
+
+    Measures three workloads: generate_url and webhook_validator.call, which
+    are pure CPU work, and get against a local FakeUrlboxServer running in a
+    separate process, which mixes client CPU work and network waits.
+
+    On a free-threaded build of CPython (3.13t or later) the benchmark runs
+    itself twice, with -X gil=1 and -X gil=0, to compare both; on a regular
+    build it only reports the GIL numbers.
+
+    Usage: python benchmarks/thread_scaling.py --threads 1 2 4 8 16 --seconds 2
+"""
+
+import argparse
+import concurrent.futures
+import hmac
+import json
+import multiprocessing
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+from hashlib import sha256
+from urlbox import UrlboxClient, webhook_validator
+from urlbox.testing import FakeUrlboxServer
+
+API_KEY = "benchmark-key"
+API_SECRET = "benchmark-secret"
+WEBHOOK_SECRET = "benchmark-webhook-secret"
+
+
+def serve(host_names, stop):
+    with FakeUrlboxServer(
+        api_key=API_KEY, api_secret=API_SECRET, image_size=2000
+    ) as server:
+        host_names.put(server.api_host_name)
+        stop.wait()
+
+
+def signed_webhook():
+    payload = {
+        "event": "render.succeeded",
+        "renderId": "794383cd-b09e-4aef-a12b-fadf8aad9d63",
+        "result": {"renderUrl": "https://renders.urlbox.io/foo.png"},
+    }
+    timestamp = int(time.time())
+    signature = hmac.new(
+        WEBHOOK_SECRET.encode(),
+        msg=f"{timestamp}.{json.dumps(payload, separators=(',', ':'))}".encode(),
+        digestmod=sha256,
+    ).hexdigest()
+
+    return f"t={timestamp},sha256={signature}", payload
+
+
+def throughput(operation, threads, seconds):
+    """
+        Runs operation in a loop from threads threads for seconds seconds and
+        returns the number of operations completed per second.
+    """
+
+    start = threading.Barrier(threads + 1)
+    deadline = [0.0]
+
+    def loop():
+        start.wait()
+        count = 0
+
+        while time.monotonic() < deadline[0]:
+            operation(count)
+            count += 1
+
+        return count
+
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        futures = [executor.submit(loop) for _ in range(threads)]
+        deadline[0] = time.monotonic() + seconds
+        start.wait()
+        total = sum(future.result() for future in futures)
+
+    return total / seconds
+
+
+def run(arguments):
+    host_names = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    server = multiprocessing.Process(
+        target=serve, args=(host_names, stop), daemon=True
+    )
+    server.start()
+
+    client = UrlboxClient(
+        api_key=API_KEY,
+        api_secret=API_SECRET,
+        api_host_name=host_names.get(timeout=10),
+    )
+    header_signature, payload = signed_webhook()
+    workloads = {
+        "generate_url": lambda i: client.generate_url(
+            {"url": f"http://example.com/{i}", "width": 1280}
+        ),
+        "webhook_validator.call": lambda i: webhook_validator.call(
+            header_signature, payload, WEBHOOK_SECRET
+        ),
+        "get": lambda i: client.get({"url": f"http://example.com/{i}"}),
+    }
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    results = []
+
+    for name, operation in workloads.items():
+        baseline = None
+
+        for threads in arguments.threads:
+            operations_per_second = throughput(
+                operation, threads, arguments.seconds
+            )
+            baseline = baseline or operations_per_second
+            results.append(
+                {
+                    "workload": name,
+                    "gil": gil_enabled,
+                    "threads": threads,
+                    "operations_per_second": round(operations_per_second),
+                    "speedup": round(operations_per_second / baseline, 2),
+                }
+            )
+
+    client.close()
+    stop.set()
+    server.join(5)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark UrlboxClient throughput against thread count."
+    )
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16]
+    )
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.child or not sysconfig.get_config_var("Py_GIL_DISABLED"):
+        results = run(arguments)
+    else:
+        results = []
+
+        for gil in ("1", "0"):
+            output = subprocess.run(
+                [sys.executable, "-X", f"gil={gil}", *sys.argv, "--child"],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results.extend(json.loads(output))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
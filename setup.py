@@ -24,4 +24,8 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     python_requires=">=3.7",
     install_requires=["requests==2.26.0", "validators==0.18.2"],
+    extras_require={
+        "http2": ["httpx[http2]"],
+        "monitor": ["numpy", "Pillow"],
+    },
 )
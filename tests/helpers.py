@@ -0,0 +1,76 @@
+from faker import Faker
+from hashlib import sha256
+import hmac
+import json
+import time
+import urllib.parse
+
+fake = Faker()
+
+WEBHOOK_SECRET = "webhook_secret"
+
+
+class Pages:
+    """
+        An InMemoryTransport handler rendering target pages: a url containing
+        a key of renders renders to its body, urls ending in /missing to a
+        404, and other urls to default, or to a 500 when there is none.
+        count is the number of renders requested.
+    """
+
+    def __init__(self, default=None):
+        self.renders = {}
+        self.default = default
+        self.count = 0
+
+    def __call__(self, method, url, headers, json):
+        self.count += 1
+        target = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)[
+            "url"
+        ][0]
+
+        if target.endswith("/missing"):
+            return 404, {"Content-Type": "application/json"}, b"{}"
+
+        render = next(
+            (
+                render
+                for page, render in self.renders.items()
+                if page in target
+            ),
+            self.default,
+        )
+
+        if render is None:
+            return 500, {}, b""
+
+        return 200, {"Content-Type": "image/png"}, render
+
+
+def sign_webhook(payload, webhook_secret=WEBHOOK_SECRET):
+    """
+        Returns the x-urlbox-signature header Urlbox sends with payload.
+    """
+
+    timestamp = int(time.time())
+    signature = hmac.new(
+        webhook_secret.encode("utf-8"),
+        msg=f"{timestamp}.{json.dumps(payload, separators=(',', ':'))}".encode(
+            "utf-8"
+        ),
+        digestmod=sha256,
+    ).hexdigest()
+
+    return f"t={timestamp},sha256={signature}"
+
+
+def webhook_payload(render_id, event="render.succeeded"):
+    """
+        Returns the body of a webhook callback for render_id.
+    """
+
+    return {
+        "event": event,
+        "renderId": render_id,
+        "result": {"renderUrl": fake.url()},
+    }
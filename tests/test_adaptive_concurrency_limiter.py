@@ -0,0 +1,146 @@
+from urlbox import AdaptiveConcurrencyLimiter
+import pytest
+import threading
+import time
+
+
+class _FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+# Test AdaptiveConcurrencyLimiter
+def test_limiter_validates_arguments():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(initial_limit=10, max_limit=5)
+
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(decrease_factor=1)
+
+
+def test_limit_grows_additively_while_healthy():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8)
+
+    for _ in range(4):
+        limiter.call(lambda: _FakeResponse(200))
+
+    assert limiter.limit == 4
+
+    for _ in range(2):
+        limiter.call(lambda: _FakeResponse(200))
+
+    assert limiter.limit == 5
+
+
+def test_limit_never_exceeds_max():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=3)
+
+    for _ in range(100):
+        limiter.call(lambda: _FakeResponse(200))
+
+    assert limiter.limit == 3
+
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+def test_limit_backs_off_on_overload(status_code):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, max_limit=16)
+
+    limiter.call(lambda: _FakeResponse(status_code))
+
+    assert limiter.limit == 8
+    assert limiter.metrics()["overloads_count"] == 1
+
+
+def test_limit_backs_off_on_errors():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, max_limit=16)
+
+    def fail():
+        raise ConnectionError()
+
+    with pytest.raises(ConnectionError):
+        limiter.call(fail)
+
+    assert limiter.limit == 8
+
+
+def test_limit_backs_off_on_latency_spike():
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=16, max_limit=16, latency_threshold_seconds=0.01
+    )
+
+    limiter.call(time.sleep, 0.02)
+
+    assert limiter.limit == 8
+
+
+def test_latency_variation_is_not_overload_by_default():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, max_limit=16)
+
+    for latency in [0.1, 0.1, 2, 0.1, 5]:
+        started_at = limiter.acquire() - latency
+        limiter.release(started_at, response=_FakeResponse(200))
+
+    assert limiter.limit == 16
+    assert limiter.metrics()["overloads_count"] == 0
+
+
+def test_latency_baseline_follows_lasting_change():
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=16, max_limit=16, latency_tolerance=2
+    )
+
+    for latency in [0.1] * 10 + [1] * 50:
+        started_at = limiter.acquire() - latency
+        limiter.release(started_at, response=_FakeResponse(200))
+
+    assert limiter.metrics()["average_latency"] > 0.5
+    assert limiter.metrics()["overloads_count"] < 10
+    assert limiter.limit > 1
+
+
+def test_limit_never_below_min():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=2)
+
+    limiter.call(lambda: _FakeResponse(503))
+
+    assert limiter.limit == 2
+
+
+def test_concurrent_overloads_back_off_once():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, max_limit=16)
+    started = [limiter.acquire() for _ in range(4)]
+
+    for started_at in started:
+        limiter.release(started_at, response=_FakeResponse(429))
+
+    assert limiter.limit == 8
+    assert limiter.in_flight == 0
+
+
+def test_acquire_times_out_at_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1)
+    limiter.acquire()
+
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.01)
+
+
+def test_map_stays_within_limit_and_keeps_order():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def render(item):
+        with lock:
+            in_flight.append(item)
+            peak.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.remove(item)
+        return item * 2
+
+    results = list(limiter.map(render, range(10)))
+
+    assert results == [item * 2 for item in range(10)]
+    assert max(peak) <= 2
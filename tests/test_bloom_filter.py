@@ -0,0 +1,54 @@
+from faker import Faker
+from urlbox import BloomFilter
+import pytest
+
+
+fake = Faker()
+
+
+# Test BloomFilter
+def test_added_items_are_present():
+    bloom_filter = BloomFilter(capacity=1000)
+    urls = {fake.uri() for _ in range(500)}
+
+    for url in urls:
+        bloom_filter.add(url)
+
+    assert all(url in bloom_filter for url in urls)
+
+
+def test_add_reports_new_items():
+    bloom_filter = BloomFilter(capacity=1000)
+
+    assert bloom_filter.add("https://example.com/")
+    assert not bloom_filter.add("https://example.com/")
+    assert len(bloom_filter) == 1
+
+
+def test_false_positive_rate_is_bounded():
+    bloom_filter = BloomFilter(capacity=10_000, error_rate=0.01)
+
+    for i in range(10_000):
+        bloom_filter.add(f"https://example.com/{i}")
+
+    false_positives = sum(
+        f"https://example.org/{i}" in bloom_filter for i in range(10_000)
+    )
+
+    assert false_positives < 200
+
+
+def test_size_does_not_grow():
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.001)
+    size = len(bloom_filter._bits)
+
+    for i in range(5000):
+        bloom_filter.add(str(i))
+
+    assert len(bloom_filter._bits) == size
+    assert size < 2000
+
+
+def test_error_rate_must_be_a_probability():
+    with pytest.raises(ValueError):
+        BloomFilter(error_rate=1)
@@ -0,0 +1,196 @@
+from faker import Faker
+from tests.helpers import Pages
+from urlbox import UrlboxClient
+from urlbox.transports import InMemoryTransport
+import io
+import os
+import pytest
+
+numpy = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+from urlbox.change_monitor import (
+    ChangeMonitor,
+    hamming_distance,
+    perceptual_hash,
+)
+
+
+fake = Faker()
+
+DAY = 24 * 60 * 60
+
+
+def _page(boxes, size=(400, 300), format="PNG"):
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+
+    for x, y, w, h in boxes:
+        draw.rectangle(
+            [x * size[0], y * size[1], (x + w) * size[0], (y + h) * size[1]],
+            fill="black",
+        )
+
+    output = io.BytesIO()
+    image.save(output, format)
+
+    return output.getvalue()
+
+
+LAYOUT = [(0.1, 0.1, 0.8, 0.1), (0.1, 0.3, 0.35, 0.5)]
+REDESIGN = [(0.1, 0.1, 0.3, 0.8), (0.5, 0.5, 0.4, 0.4)]
+
+
+@pytest.fixture
+def pages():
+    return Pages()
+
+
+@pytest.fixture
+def monitor(tmp_path, pages):
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), transport=InMemoryTransport(pages)
+    )
+
+    with ChangeMonitor(
+        urlbox_client,
+        str(tmp_path / "index.sqlite3"),
+        str(tmp_path / "renders"),
+        initial_interval=DAY,
+        min_interval=60,
+    ) as monitor:
+        yield monitor
+
+
+# Test perceptual_hash
+def test_similar_images_have_close_hashes():
+    hash = perceptual_hash(_page(LAYOUT))
+
+    assert hash == perceptual_hash(_page(LAYOUT))
+    assert (
+        hamming_distance(hash, perceptual_hash(_page(LAYOUT, (800, 600))))
+        <= 4
+    )
+    assert (
+        hamming_distance(hash, perceptual_hash(_page(LAYOUT, format="JPEG")))
+        <= 4
+    )
+    assert hamming_distance(hash, perceptual_hash(_page(REDESIGN))) > 10
+
+
+def test_hamming_distance():
+    assert hamming_distance(0b1011, 0b0001) == 2
+    assert hamming_distance(2 ** 63, 0) == 1
+
+
+# Test ChangeMonitor
+def test_first_capture_is_saved(monitor, pages):
+    pages.renders["example.com"] = _page(LAYOUT)
+    monitor.add(["http://example.com/"], now=0)
+
+    [result] = monitor.run(now=0)
+
+    assert result["changed"]
+    assert result["distance"] is None
+    assert os.path.exists(result["file_path"])
+    assert monitor.page("http://example.com/")["next_check"] == DAY
+    assert monitor.due(now=DAY - 1) == []
+
+
+def test_unchanged_page_is_not_stored_and_backs_off(monitor, pages):
+    pages.renders["example.com"] = _page(LAYOUT)
+    monitor.add(["http://example.com/"], now=0)
+    monitor.run(now=0)
+
+    [result] = monitor.run(now=DAY)
+
+    assert not result["changed"]
+    assert result["distance"] <= monitor.threshold
+    assert result["file_path"] is None
+    assert len(os.listdir(monitor.output_dir)) == 1
+    assert monitor.page("http://example.com/")["interval"] == 1.5 * DAY
+
+
+def test_changed_page_is_stored_and_checked_more_often(monitor, pages):
+    pages.renders["example.com"] = _page(LAYOUT)
+    monitor.add(["http://example.com/"], now=0)
+    monitor.run(now=0)
+    pages.renders["example.com"] = _page(REDESIGN)
+
+    [result] = monitor.run(now=DAY)
+    page = monitor.page("http://example.com/")
+
+    assert result["changed"]
+    assert result["distance"] > monitor.threshold
+    assert page["interval"] == DAY / 2
+    assert page["changes"] == 1
+    assert page["file_path"] == result["file_path"]
+    assert len(os.listdir(monitor.output_dir)) == 2
+
+
+def test_failed_render_is_retried_soon(monitor, pages):
+    monitor.add(["http://example.com/"], now=0)
+
+    [result] = monitor.run(now=0)
+
+    assert result["error"] is not None
+    assert monitor.page("http://example.com/")["next_check"] == 60
+    assert monitor.page("http://example.com/")["interval"] == DAY
+
+
+def test_only_due_pages_are_rendered(monitor, pages):
+    pages.renders["example.com"] = _page(LAYOUT)
+    monitor.add([f"http://example.com/{i}" for i in range(5)], now=0)
+    monitor.run(now=0, limit=3)
+
+    assert len(monitor.due(now=0)) == 2
+    assert len(monitor.run(now=0)) == 2
+    assert pages.count == 5
+    assert monitor.run(now=0) == []
+
+
+def test_index_persists_between_monitors(tmp_path, monitor, pages):
+    pages.renders["example.com"] = _page(LAYOUT)
+    monitor.add(["http://example.com/"], now=0)
+    monitor.run(now=0)
+    monitor.close()
+
+    with ChangeMonitor(
+        monitor.client,
+        str(tmp_path / "index.sqlite3"),
+        str(tmp_path / "renders"),
+    ) as reopened:
+        reopened.add(["http://example.com/"], now=DAY)
+
+        assert reopened.page("http://example.com/")["checks"] == 1
+        assert not reopened.check("http://example.com/", now=DAY)["changed"]
+
+
+@pytest.mark.parametrize(
+    "content_type, extension",
+    [
+        ("image/png", ".png"),
+        ("image/svg+xml; charset=utf-8", ".svg"),
+        ("application/x-unknown", ".png"),
+    ],
+)
+def test_saved_renders_are_named_after_content_type(
+    tmp_path, content_type, extension
+):
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(),
+        transport=InMemoryTransport(
+            headers={"Content-Type": content_type}, body=_page(LAYOUT)
+        ),
+    )
+
+    with ChangeMonitor(
+        urlbox_client,
+        str(tmp_path / "index.sqlite3"),
+        str(tmp_path / "renders"),
+    ) as monitor:
+        monitor.add(["http://example.com/"], now=0)
+        [result] = monitor.run(now=0)
+
+    assert os.path.splitext(result["file_path"])[1] == extension
@@ -0,0 +1,174 @@
+from faker import Faker
+from urlbox import CircuitBreaker, CircuitOpenError, UrlboxClient
+import asyncio
+import pytest
+import requests
+import requests_mock
+import time
+
+
+fake = Faker()
+
+
+def _failing_call():
+    raise requests.exceptions.ConnectionError()
+
+
+def _trip(circuit_breaker, calls):
+    for _ in range(calls):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            circuit_breaker.call(_failing_call)
+
+
+# Test CircuitBreaker
+def test_breaker_starts_closed():
+    circuit_breaker = CircuitBreaker()
+
+    assert circuit_breaker.state == CircuitBreaker.CLOSED
+    assert circuit_breaker.call(lambda: "ok") == "ok"
+
+
+def test_breaker_opens_on_error_rate():
+    circuit_breaker = CircuitBreaker(min_calls=4, window_size=4)
+
+    circuit_breaker.call(lambda: "ok")
+    circuit_breaker.call(lambda: "ok")
+    _trip(circuit_breaker, 2)
+
+    assert circuit_breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.call(lambda: "ok")
+
+    assert circuit_breaker.metrics()["rejected_count"] == 1
+
+
+def test_breaker_does_not_open_below_min_calls():
+    circuit_breaker = CircuitBreaker(min_calls=5)
+
+    _trip(circuit_breaker, 4)
+
+    assert circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_on_slow_calls():
+    circuit_breaker = CircuitBreaker(
+        min_calls=2, slow_call_seconds=0.01, slow_call_rate_threshold=1
+    )
+
+    for _ in range(2):
+        circuit_breaker.call(time.sleep, 0.02)
+
+    assert circuit_breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_half_open_probe_closes_on_success():
+    circuit_breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+
+    _trip(circuit_breaker, 1)
+
+    assert circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    assert circuit_breaker.call(lambda: "ok") == "ok"
+    assert circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_probe_reopens_on_failure():
+    circuit_breaker = CircuitBreaker(min_calls=1, open_seconds=0.05)
+
+    _trip(circuit_breaker, 1)
+    time.sleep(0.05)
+    _trip(circuit_breaker, 1)
+
+    assert circuit_breaker.state == CircuitBreaker.OPEN
+    assert circuit_breaker.metrics()["opened_count"] == 2
+
+
+def test_breaker_half_open_limits_probes():
+    circuit_breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+
+    _trip(circuit_breaker, 1)
+    circuit_breaker.before_call()
+
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_call()
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    circuit_breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+
+    _trip(circuit_breaker, 1)
+
+    async def cancelled_probe():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                circuit_breaker.acall(asyncio.sleep, 10), timeout=0.01
+            )
+
+    asyncio.run(cancelled_probe())
+
+    assert circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    assert circuit_breaker.call(lambda: "ok") == "ok"
+    assert circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_calls_from_before_opening_are_not_probes():
+    circuit_breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+    slow_call = circuit_breaker.before_call()
+
+    _trip(circuit_breaker, 1)
+
+    assert circuit_breaker.state == CircuitBreaker.HALF_OPEN
+
+    circuit_breaker.record(True, 0, slow_call)
+    circuit_breaker.cancel(slow_call)
+
+    assert circuit_breaker.state == CircuitBreaker.HALF_OPEN
+
+    circuit_breaker.before_call()
+
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_call()
+
+
+def test_breaker_shared_per_host():
+    host = fake.hostname()
+
+    assert CircuitBreaker.for_host(host) is CircuitBreaker.for_host(host)
+    assert CircuitBreaker.for_host(host) is not CircuitBreaker.for_host(
+        fake.hostname()
+    )
+
+
+# Test UrlboxClient(circuit_breaker=...)
+def test_client_fails_fast_when_breaker_open():
+    circuit_breaker = CircuitBreaker(min_calls=2, window_size=2)
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), circuit_breaker=circuit_breaker
+    )
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(requests_mock.ANY, status_code=503)
+
+        urlbox_client.get({"url": fake.url()})
+        urlbox_client.get({"url": fake.url()})
+
+        with pytest.raises(CircuitOpenError):
+            urlbox_client.get({"url": fake.url()})
+
+        with pytest.raises(CircuitOpenError):
+            urlbox_client.head({"url": fake.url()})
+
+        assert requests_mocker.call_count == 2
+
+
+def test_clients_share_breaker_for_same_host():
+    host = fake.hostname()
+    first = UrlboxClient(
+        api_key=fake.pystr(), api_host_name=host, circuit_breaker=True
+    )
+    second = UrlboxClient(
+        api_key=fake.pystr(), api_host_name=host, circuit_breaker=True
+    )
+
+    assert first.circuit_breaker is second.circuit_breaker
+    assert UrlboxClient(api_key=fake.pystr()).circuit_breaker is None
@@ -0,0 +1,258 @@
+from faker import Faker
+from urlbox import ConditionalRenderer, UrlboxClient
+from urlbox.transports import InMemoryTransport
+import json
+import os
+import pytest
+import requests
+import requests_mock
+
+
+fake = Faker()
+
+TARGET_URL = "http://example.com/"
+
+
+class _Target:
+    """
+        A target page answering HEAD requests with its validators, and 304 to
+        conditional requests matching them.
+    """
+
+    def __init__(
+        self, etag=None, last_modified=None, honours_conditionals=True
+    ):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.honours_conditionals = honours_conditionals
+        self.checks = []
+
+    def __call__(self, request, context):
+        self.checks.append(dict(request.headers))
+        headers = {}
+
+        if self.etag is not None:
+            headers["ETag"] = self.etag
+
+        if self.last_modified is not None:
+            headers["Last-Modified"] = self.last_modified
+
+        context.headers.update(headers)
+
+        if self.honours_conditionals and (
+            request.headers.get("If-None-Match", object()) == self.etag
+            or request.headers.get("If-Modified-Since", object())
+            == self.last_modified
+        ):
+            context.status_code = 304
+        else:
+            context.status_code = 200
+
+        return b""
+
+
+@pytest.fixture
+def transport():
+    return InMemoryTransport(
+        status_code=200, headers={"Content-Type": "image/png"}, body=b"render"
+    )
+
+
+@pytest.fixture
+def renderer(tmp_path, transport):
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), api_secret=fake.pystr(), transport=transport
+    )
+
+    with ConditionalRenderer(
+        urlbox_client, str(tmp_path / "index.sqlite3"), str(tmp_path / "out")
+    ) as renderer:
+        yield renderer
+
+
+def _render_twice(renderer, target, options=None):
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(TARGET_URL, content=target)
+
+        first = renderer.get(options or {"url": TARGET_URL})
+        second = renderer.get(options or {"url": TARGET_URL})
+
+    return first, second
+
+
+# Test ConditionalRenderer.get
+def test_unchanged_page_with_etag_is_not_rendered(renderer, transport):
+    target = _Target(etag='"v1"')
+
+    first, second = _render_twice(renderer, target)
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.file_path == first.file_path
+    assert second.content_type == "image/png"
+    assert open(second.file_path, "rb").read() == b"render"
+    assert target.checks[1]["If-None-Match"] == '"v1"'
+    assert len(transport.requests) == 1
+    assert (renderer.rendered_count, renderer.skipped_count) == (1, 1)
+
+
+def test_unchanged_page_with_last_modified_is_not_rendered(
+    renderer, transport
+):
+    target = _Target(last_modified="Wed, 21 Oct 2026 07:28:00 GMT")
+
+    _, second = _render_twice(renderer, target)
+
+    assert second.status_code == 304
+    assert len(transport.requests) == 1
+
+
+def test_validators_are_compared_when_304_is_not_supported(
+    renderer, transport
+):
+    target = _Target(etag='"v1"', honours_conditionals=False)
+
+    _, second = _render_twice(renderer, target)
+
+    assert second.status_code == 304
+    assert len(transport.requests) == 1
+
+
+def test_changed_page_is_rendered_again(renderer, transport):
+    target = _Target(etag='"v1"')
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(TARGET_URL, content=target)
+        renderer.get({"url": TARGET_URL})
+        target.etag = '"v2"'
+        second = renderer.get({"url": TARGET_URL})
+        third = renderer.get({"url": TARGET_URL})
+
+    assert second.status_code == 200
+    assert third.status_code == 304
+    assert len(transport.requests) == 2
+
+
+def test_page_without_validators_is_always_rendered(renderer, transport):
+    _, second = _render_twice(renderer, _Target())
+
+    assert second.status_code == 200
+    assert len(transport.requests) == 2
+
+
+def test_failed_check_renders(renderer, transport):
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(TARGET_URL, content=_Target(etag='"v1"'))
+        renderer.get({"url": TARGET_URL})
+        requests_mocker.head(
+            TARGET_URL, exc=requests.exceptions.ConnectTimeout
+        )
+        second = renderer.get({"url": TARGET_URL})
+
+    assert second.status_code == 200
+    assert len(transport.requests) == 2
+
+
+def test_options_are_tracked_separately(renderer, transport):
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(TARGET_URL, content=_Target(etag='"v1"'))
+        png = renderer.get({"url": TARGET_URL})
+        pdf = renderer.get({"url": TARGET_URL, "format": "pdf"})
+
+    assert pdf.status_code == 200
+    assert pdf.file_path != png.file_path
+
+
+def test_failed_render_keeps_stored_output(renderer, transport):
+    target = _Target(etag='"v1"')
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(TARGET_URL, content=target)
+        first = renderer.get({"url": TARGET_URL})
+        target.etag = '"v2"'
+        transport.handler = lambda *args: (500, {}, b"error")
+        failed = renderer.get({"url": TARGET_URL})
+        target.etag = '"v1"'
+        third = renderer.get({"url": TARGET_URL})
+
+    assert failed.status_code == 500
+    assert failed.file_path is None
+    assert failed.content == b"error"
+    assert third.status_code == 304
+    assert open(first.file_path, "rb").read() == b"render"
+
+
+def test_304_without_stored_render_renders(renderer, transport):
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(TARGET_URL, status_code=304)
+        result = renderer.get({"url": TARGET_URL})
+
+    assert result.status_code == 200
+    assert open(result.file_path, "rb").read() == b"render"
+    assert renderer.rendered_count == 1
+    assert renderer.skipped_count == 0
+
+
+# Test ConditionalRenderer.post
+def test_post_returns_previous_response_when_unchanged(renderer, transport):
+    render_id = fake.uuid4()
+    transport.handler = lambda *args: (
+        201,
+        {"Content-Type": "application/json"},
+        json.dumps({"renderId": render_id}).encode(),
+    )
+    options = {"url": TARGET_URL, "webhook_url": fake.url()}
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(TARGET_URL, content=_Target(etag='"v1"'))
+        renderer.post(options)
+        second = renderer.post(options)
+
+    assert second.status_code == 304
+    assert second.json()["renderId"] == render_id
+    assert len(transport.requests) == 1
+
+
+# Test ConditionalRenderer.render_many
+def test_render_many_keeps_order_and_errors(renderer, transport):
+    urls = [f"http://example.com/{i}" for i in range(10)]
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(requests_mock.ANY, content=_Target(etag='"v1"'))
+        renderer.render_many({"url": url} for url in urls[:5])
+        results = renderer.render_many(
+            [{"url": url} for url in urls] + [{"format": "png"}]
+        )
+
+    assert [result.status_code for result in results[:10]] == [304] * 5 + [
+        200
+    ] * 5
+    assert isinstance(results[10], KeyError)
+
+
+def test_failed_request_leaves_no_partial_file(renderer, transport):
+    def fail(*args):
+        raise requests.exceptions.ConnectionError()
+
+    transport.handler = fail
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(TARGET_URL, content=_Target())
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            renderer.get({"url": TARGET_URL})
+
+    assert os.listdir(renderer.output_dir) == []
+
+
+def test_render_many_identical_options(renderer, transport):
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.head(TARGET_URL, content=_Target())
+
+        results = renderer.render_many([{"url": TARGET_URL}] * 16)
+
+    assert [result.status_code for result in results] == [200] * 16
+    assert {result.file_path for result in results} == {results[0].file_path}
+    assert os.listdir(renderer.output_dir) == [
+        os.path.basename(results[0].file_path)
+    ]
@@ -0,0 +1,162 @@
+from faker import Faker
+from urlbox import DnsCache, UrlboxClient
+from urlbox.testing import FakeUrlboxServer
+from urlbox.transports import RequestsTransport, Urllib3Transport
+import pytest
+import requests
+import socket
+
+fake = Faker()
+
+HOST = "api.urlbox.test"
+
+
+@pytest.fixture
+def resolutions(monkeypatch):
+    """
+        Resolves HOST to the addresses in the returned list, counting the
+        resolutions of HOST in its first item. Other hosts resolve normally.
+    """
+
+    getaddrinfo = socket.getaddrinfo
+    resolutions = [0, "127.0.0.1"]
+
+    def fake_getaddrinfo(host, port, *args, **kwargs):
+        if host != HOST:
+            return getaddrinfo(host, port, *args, **kwargs)
+
+        resolutions[0] += 1
+
+        if len(resolutions) == 1:
+            raise socket.gaierror(socket.EAI_NONAME, "Name not known")
+
+        return [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))
+            for address in resolutions[1:]
+        ]
+
+    monkeypatch.setattr(socket, "getaddrinfo", fake_getaddrinfo)
+
+    return resolutions
+
+
+# Test DnsCache.resolve()
+def test_resolve_caches_addresses(resolutions):
+    dns_cache = DnsCache()
+
+    assert dns_cache.resolve(HOST, 443) == ("127.0.0.1",)
+    assert dns_cache.resolve(HOST, 443) == ("127.0.0.1",)
+    assert resolutions[0] == 1
+    assert (dns_cache.hits, dns_cache.misses) == (1, 1)
+
+
+def test_resolve_again_after_ttl(resolutions):
+    dns_cache = DnsCache(ttl=0)
+
+    dns_cache.resolve(HOST, 443)
+    resolutions[1:] = ["127.0.0.2"]
+
+    assert dns_cache.resolve(HOST, 443) == ("127.0.0.2",)
+    assert resolutions[0] == 2
+
+
+def test_resolve_serves_expired_addresses_when_resolving_fails(resolutions):
+    dns_cache = DnsCache(ttl=0)
+
+    dns_cache.resolve(HOST, 443)
+    del resolutions[1:]
+
+    assert dns_cache.resolve(HOST, 443) == ("127.0.0.1",)
+
+
+def test_resolve_raises_when_never_resolved(resolutions):
+    del resolutions[1:]
+
+    with pytest.raises(socket.gaierror):
+        DnsCache().resolve(HOST, 443)
+
+
+def test_invalidate(resolutions):
+    dns_cache = DnsCache()
+
+    dns_cache.resolve(HOST, 443)
+    dns_cache.resolve(HOST, 80)
+    dns_cache.invalidate(HOST)
+    dns_cache.resolve(HOST, 443)
+    dns_cache.invalidate()
+    dns_cache.resolve(HOST, 443)
+
+    assert resolutions[0] == 4
+
+
+# Test DnsCache.install()
+@pytest.mark.enable_socket
+@pytest.mark.parametrize(
+    "transport_class", [RequestsTransport, Urllib3Transport]
+)
+def test_connections_resolve_through_cache(resolutions, transport_class):
+    api_key = fake.pystr()
+    dns_cache = DnsCache()
+
+    with FakeUrlboxServer(api_key=api_key) as server:
+        port = server.api_host_name.rsplit(":", 1)[1]
+
+        with transport_class(dns_cache=dns_cache) as transport:
+            urlbox_client = UrlboxClient(
+                api_key=api_key,
+                api_host_name=f"http://{HOST}:{port}",
+                transport=transport,
+            )
+
+            for _ in range(3):
+                assert urlbox_client.get({"url": fake.url()}).ok
+                # Drop the pooled connection, so each get connects again.
+                transport.close()
+
+    assert resolutions[0] == 1
+    assert dns_cache.hits == 2
+    assert len(server.requests) == 3
+
+
+@pytest.mark.enable_socket
+def test_connections_try_each_address(resolutions):
+    api_key = fake.pystr()
+    dns_cache = DnsCache()
+    # Nothing listens on 127.0.0.2, the connection falls back to 127.0.0.1.
+    resolutions[1:] = ["127.0.0.2", "127.0.0.1"]
+
+    with FakeUrlboxServer(api_key=api_key) as server:
+        port = server.api_host_name.rsplit(":", 1)[1]
+
+        with RequestsTransport(dns_cache=dns_cache) as transport:
+            response = transport.request(
+                "GET", f"http://{HOST}:{port}/{api_key}/png", timeout=5
+            )
+
+    assert response.ok
+
+
+@pytest.mark.parametrize(
+    "transport_class", [RequestsTransport, Urllib3Transport]
+)
+def test_unresolved_host_raises_connection_error(resolutions, transport_class):
+    del resolutions[1:]
+
+    with transport_class(dns_cache=DnsCache()) as transport:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            transport.request("GET", f"http://{HOST}/", timeout=1)
+
+    assert resolutions[0] >= 1
+
+
+@pytest.mark.enable_socket
+def test_failed_connections_evict_host(resolutions):
+    dns_cache = DnsCache()
+    resolutions[1:] = ["127.0.0.1"]
+
+    with RequestsTransport(dns_cache=dns_cache) as transport:
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                transport.request("GET", f"http://{HOST}:1/", timeout=1)
+
+    assert resolutions[0] == 2
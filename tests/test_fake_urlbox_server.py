@@ -0,0 +1,191 @@
+from faker import Faker
+from urlbox import UrlboxClient, webhook_validator
+from urlbox.testing import FakeUrlboxServer, constant_latency
+import http.server
+import json
+import pytest
+import queue
+import threading
+import time
+
+
+fake = Faker()
+
+pytestmark = pytest.mark.enable_socket
+
+
+@pytest.fixture
+def api_credentials():
+    return fake.pystr(), fake.pystr()
+
+
+@pytest.fixture
+def fake_server(api_credentials):
+    api_key, api_secret = api_credentials
+
+    with FakeUrlboxServer(
+        api_key=api_key,
+        api_secret=api_secret,
+        webhook_secret="webhook_secret",
+        image_size=2048,
+    ) as server:
+        yield server
+
+
+@pytest.fixture
+def urlbox_client(api_credentials, fake_server):
+    api_key, api_secret = api_credentials
+
+    return UrlboxClient(
+        api_key=api_key,
+        api_secret=api_secret,
+        api_host_name=fake_server.api_host_name,
+    )
+
+
+# Test GET
+def test_get_returns_sized_png(urlbox_client):
+    response = urlbox_client.get({"url": fake.url()})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG\r\n\x1a\n")
+    assert len(response.content) == 2048
+    assert response.headers["X-Renders-Used"] == "1"
+
+
+def test_get_rejects_invalid_token(api_credentials, fake_server):
+    api_key, _ = api_credentials
+    urlbox_client = UrlboxClient(
+        api_key=api_key,
+        api_secret="wrong_secret",
+        api_host_name=fake_server.api_host_name,
+    )
+
+    assert urlbox_client.get({"url": fake.url()}).status_code == 401
+
+
+def test_get_accepts_unsigned_requests(api_credentials, fake_server):
+    api_key, _ = api_credentials
+    urlbox_client = UrlboxClient(
+        api_key=api_key, api_host_name=fake_server.api_host_name
+    )
+
+    assert urlbox_client.get({"url": fake.url()}).status_code == 200
+
+
+def test_get_rejects_unknown_api_key(fake_server):
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), api_host_name=fake_server.api_host_name
+    )
+
+    assert urlbox_client.get({"url": fake.url()}).status_code == 401
+
+
+@pytest.mark.parametrize("format", ["html", "svg", "pdf", "jpg"])
+def test_get_other_formats(urlbox_client, format):
+    response = urlbox_client.get({"url": fake.url(), "format": format})
+
+    assert response.status_code == 200
+    assert len(response.content) > 0
+
+
+# Test HEAD and DELETE
+def test_head_returns_headers_only(urlbox_client):
+    response = urlbox_client.head({"url": fake.url()})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Length"] == "2048"
+    assert response.content == b""
+
+
+def test_delete(urlbox_client, fake_server):
+    response = urlbox_client.delete({"url": fake.url()})
+
+    assert response.status_code == 200
+    assert fake_server.requests[-1][0] == "DELETE"
+
+
+# Test fault injection
+def test_rate_limit_injection(api_credentials):
+    api_key, api_secret = api_credentials
+
+    with FakeUrlboxServer(
+        api_key=api_key, api_secret=api_secret, rate_limit_probability=1
+    ) as server:
+        urlbox_client = UrlboxClient(
+            api_key=api_key,
+            api_secret=api_secret,
+            api_host_name=server.api_host_name,
+        )
+
+        response = urlbox_client.get({"url": fake.url()})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_latency_injection(api_credentials):
+    api_key, api_secret = api_credentials
+
+    with FakeUrlboxServer(
+        api_key=api_key, api_secret=api_secret, latency=constant_latency(0.1)
+    ) as server:
+        urlbox_client = UrlboxClient(
+            api_key=api_key,
+            api_secret=api_secret,
+            api_host_name=server.api_host_name,
+        )
+
+        started_at = time.monotonic()
+        urlbox_client.get({"url": fake.url()})
+
+    assert time.monotonic() - started_at >= 0.1
+
+
+# Test POST and webhooks
+def test_post_sends_signed_webhook(urlbox_client):
+    received = queue.Queue()
+
+    class WebhookHandler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.put((self.headers["x-urlbox-signature"], body))
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    webhook_server = http.server.HTTPServer(("127.0.0.1", 0), WebhookHandler)
+    threading.Thread(target=webhook_server.handle_request).start()
+    webhook_url = f"http://127.0.0.1:{webhook_server.server_address[1]}/"
+
+    try:
+        response = urlbox_client.post(
+            {"url": fake.url(), "webhook_url": webhook_url}
+        )
+        header_signature, body = received.get(timeout=5)
+    finally:
+        webhook_server.server_close()
+
+    payload = json.loads(body)
+
+    assert response.status_code == 201
+    assert payload["renderId"] == response.json()["renderId"]
+    assert webhook_validator.call(header_signature, payload, "webhook_secret")
+
+
+def test_post_requires_api_secret(api_credentials, fake_server):
+    api_key, _ = api_credentials
+    urlbox_client = UrlboxClient(
+        api_key=api_key,
+        api_secret="wrong_secret",
+        api_host_name=fake_server.api_host_name,
+    )
+
+    with pytest.warns(UserWarning):
+        response = urlbox_client.post({"url": fake.url()})
+
+    assert response.status_code == 401
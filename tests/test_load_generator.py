@@ -0,0 +1,92 @@
+from faker import Faker
+from urlbox import UrlboxClient
+from urlbox.testing import FakeUrlboxServer, LoadGenerator
+from urlbox.testing.load_generator import main
+import json
+import pytest
+
+
+fake = Faker()
+
+pytestmark = pytest.mark.enable_socket
+
+
+@pytest.fixture
+def urlbox_client():
+    api_key, api_secret = fake.pystr(), fake.pystr()
+
+    with FakeUrlboxServer(
+        api_key=api_key, api_secret=api_secret, image_size=512
+    ) as server:
+        yield UrlboxClient(
+            api_key=api_key,
+            api_secret=api_secret,
+            api_host_name=server.api_host_name,
+        )
+
+
+# Test LoadGenerator
+@pytest.mark.parametrize("mode", ["sync", "threaded", "async"])
+def test_closed_loop_sends_requested_number(urlbox_client, mode):
+    report = LoadGenerator(urlbox_client).run_closed_loop(
+        concurrency=4, requests=20, mode=mode
+    )
+
+    assert report.requests == 20
+    assert report.errors == {}
+    assert report.throughput > 0
+    assert 0 < report.percentile(50) <= report.percentile(99)
+    assert report.cpu_seconds_per_request > 0
+
+
+@pytest.mark.parametrize("mode", ["threaded", "async"])
+def test_open_loop_sends_at_rate(urlbox_client, mode):
+    report = LoadGenerator(urlbox_client).run_open_loop(
+        rate=100, duration=0.2, mode=mode
+    )
+
+    assert report.requests == 20
+    assert report.duration >= 0.19
+
+
+def test_open_loop_rejects_sync_mode(urlbox_client):
+    with pytest.raises(ValueError):
+        LoadGenerator(urlbox_client).run_open_loop(
+            rate=10, requests=1, mode="sync"
+        )
+
+
+def test_run_requires_a_limit(urlbox_client):
+    with pytest.raises(ValueError):
+        LoadGenerator(urlbox_client).run_closed_loop()
+
+
+def test_errors_are_broken_down():
+    api_key = fake.pystr()
+
+    with FakeUrlboxServer(api_key=api_key, rate_limit_probability=1) as server:
+        urlbox_client = UrlboxClient(
+            api_key=api_key, api_host_name=server.api_host_name
+        )
+        report = LoadGenerator(urlbox_client).run_closed_loop(requests=5)
+
+    assert report.errors == {"429": 5}
+
+
+def test_memory_tracing(urlbox_client):
+    report = LoadGenerator(urlbox_client, trace_memory=True).run_closed_loop(
+        requests=5
+    )
+
+    assert report.peak_memory_bytes > 0
+    assert report.retained_memory_bytes_per_request is not None
+    assert report.as_dict()["peak_memory_bytes"] == report.peak_memory_bytes
+
+
+def test_command_line(capsys):
+    main(["--fake-server", "--requests", "10", "--concurrency", "2"])
+
+    report = json.loads(capsys.readouterr().out)
+
+    assert report["requests"] == 10
+    assert report["loop"] == "closed"
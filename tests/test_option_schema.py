@@ -0,0 +1,157 @@
+from faker import Faker
+from urlbox import InvalidOptionsError, OptionSchema, UrlboxClient
+from urlbox.transports import InMemoryTransport
+import pytest
+import timeit
+import warnings
+
+
+fake = Faker()
+
+
+@pytest.fixture
+def schema():
+    return OptionSchema()
+
+
+# Test OptionSchema.validate
+def test_documented_options_are_valid(schema):
+    assert (
+        schema.validate(
+            {
+                "url": fake.url(),
+                "format": "pdf",
+                "width": 1280,
+                "height": "800",
+                "full_page": True,
+                "retina": "false",
+                "pdf_scale": 0.5,
+                "block_urls": ["ads.example.com", "tracker.example.com"],
+                "wait_until": "requestsfinished",
+            }
+        )
+        == []
+    )
+
+
+def test_unknown_option_suggests_closest_match(schema):
+    with pytest.raises(InvalidOptionsError) as error:
+        schema.validate({"url": fake.url(), "fullpage": True})
+
+    assert "Unknown option 'fullpage', did you mean 'full_page'?" in str(
+        error.value
+    )
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        ({"width": "abc"}, "'width' must be an integer"),
+        ({"width": True}, "'width' must be an integer"),
+        ({"width": 0}, "'width' must be at least 1"),
+        ({"quality": 101}, "'quality' must be at most 100"),
+        ({"full_page": "yes"}, "'full_page' must be True or False"),
+        ({"format": "gif"}, "'format' must be one of png, jpg"),
+        ({"latitude": "north"}, "'latitude' must be a number"),
+        ({"latitude": True}, "'latitude' must be a number"),
+        ({"block_urls": [1]}, "'block_urls' must be a string"),
+    ],
+)
+def test_invalid_values(schema, options, message):
+    with pytest.raises(InvalidOptionsError) as error:
+        schema.validate({"url": fake.url(), **options})
+
+    assert message in str(error.value)
+
+
+def test_mutually_exclusive_options(schema):
+    with pytest.raises(InvalidOptionsError) as error:
+        schema.validate({"url": fake.url(), "html": "<h1>Hi</h1>"})
+
+    assert "'url' and 'html' cannot be used together" in str(error.value)
+
+
+def test_every_problem_is_reported(schema):
+    with pytest.raises(InvalidOptionsError) as error:
+        schema.validate({"url": fake.url(), "fullpage": True, "width": "abc"})
+
+    assert "fullpage" in str(error.value) and "width" in str(error.value)
+
+
+def test_warn_mode():
+    schema = OptionSchema(mode="warn")
+
+    with pytest.warns(UserWarning, match="fullpage"):
+        problems = schema.validate({"url": fake.url(), "fullpage": True})
+
+    assert len(problems) == 1
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        OptionSchema(mode="lenient")
+
+
+def test_extra_options():
+    schema = OptionSchema(
+        extra_options={"new_option": lambda name, value: None}
+    )
+
+    assert schema.validate({"url": fake.url(), "new_option": 1}) == []
+
+
+def test_validation_is_compiled_per_shape(schema):
+    schema.validate({"url": fake.url(), "width": 300})
+    schema.validate({"url": fake.url(), "width": 500})
+    schema.validate({"url": fake.url(), "height": 500})
+
+    assert len(schema._compiled) == 2
+
+
+def test_validation_takes_microseconds(schema):
+    options = {"url": fake.url(), "format": "png", "width": 300}
+    schema.validate(options)
+
+    seconds = min(
+        timeit.repeat(lambda: schema.validate(options), number=1000, repeat=3)
+    )
+
+    assert seconds / 1000 < 50e-6
+
+
+# Test UrlboxClient validate_options
+def test_client_fails_fast_before_sending():
+    transport = InMemoryTransport()
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), transport=transport, validate_options="strict"
+    )
+
+    with pytest.raises(InvalidOptionsError):
+        urlbox_client.get({"url": fake.url(), "width": "abc"})
+
+    with pytest.raises(InvalidOptionsError):
+        urlbox_client.generate_url({"url": fake.url(), "fullpage": True})
+
+    assert transport.requests == []
+
+
+def test_client_warn_mode_still_sends():
+    transport = InMemoryTransport()
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), transport=transport, validate_options="warn"
+    )
+
+    with pytest.warns(UserWarning):
+        urlbox_client.get({"url": fake.url(), "fullpage": True})
+
+    assert len(transport.requests) == 1
+
+
+def test_client_does_not_validate_by_default():
+    urlbox_client = UrlboxClient(api_key=fake.pystr())
+
+    assert urlbox_client.option_schema is None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        urlbox_client.generate_url({"url": fake.url(), "fullpage": True})
@@ -0,0 +1,50 @@
+from urlbox import RateLimiter
+import pytest
+import threading
+import time
+
+
+# Test RateLimiter
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+def test_burst_is_not_delayed():
+    rate_limiter = RateLimiter(1, burst=5)
+    started_at = time.monotonic()
+
+    for _ in range(5):
+        rate_limiter.acquire()
+
+    assert time.monotonic() - started_at < 0.1
+
+
+def test_acquire_spreads_requests_at_rate():
+    rate_limiter = RateLimiter(50)
+    started_at = time.monotonic()
+
+    for _ in range(11):
+        rate_limiter.acquire()
+
+    # The first token is available straight away, the next 10 every 20ms.
+    assert 0.18 < time.monotonic() - started_at < 0.5
+
+
+def test_rate_is_shared_between_threads():
+    rate_limiter = RateLimiter(100)
+    started_at = time.monotonic()
+    threads = [
+        threading.Thread(
+            target=lambda: [rate_limiter.acquire() for _ in range(5)]
+        )
+        for _ in range(4)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert time.monotonic() - started_at > 0.18
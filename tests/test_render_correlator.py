@@ -0,0 +1,226 @@
+from faker import Faker
+from urlbox import (
+    InvalidHeaderSignatureError,
+    RenderCorrelator,
+    UrlboxClient,
+)
+from tests.helpers import WEBHOOK_SECRET, sign_webhook, webhook_payload
+from urlbox.testing import FakeUrlboxServer
+from urlbox.transports import InMemoryTransport
+import concurrent.futures
+import http.server
+import json
+import pytest
+import requests
+import threading
+import time
+
+
+fake = Faker()
+
+
+@pytest.fixture
+def correlator():
+    return RenderCorrelator(webhook_secret=WEBHOOK_SECRET)
+
+
+# Test RenderCorrelator
+def test_resolve_completes_registered_future(correlator):
+    render_id = fake.uuid4()
+    future = correlator.register(render_id)
+    payload = webhook_payload(render_id)
+
+    assert correlator.resolve(sign_webhook(payload), payload)
+    assert future.result(0) == payload
+    assert len(correlator) == 0
+
+
+def test_register_is_idempotent(correlator):
+    render_id = fake.uuid4()
+
+    assert correlator.register(render_id) is correlator.register(render_id)
+    assert correlator.future(render_id) is not None
+
+
+def test_resolve_rejects_invalid_signatures(correlator):
+    render_id = fake.uuid4()
+    future = correlator.register(render_id)
+    payload = webhook_payload(render_id)
+
+    with pytest.raises(InvalidHeaderSignatureError):
+        correlator.resolve(sign_webhook(payload, "not_the_secret"), payload)
+
+    assert not future.done()
+
+
+def test_early_callbacks_are_kept_until_registered(correlator):
+    render_id = fake.uuid4()
+    payload = webhook_payload(render_id)
+
+    assert not correlator.resolve(sign_webhook(payload), payload)
+    assert correlator.register(render_id).result(0) == payload
+
+
+def test_pending_renders_are_bounded():
+    correlator = RenderCorrelator(webhook_secret=WEBHOOK_SECRET, max_pending=2)
+    oldest = correlator.register(fake.uuid4())
+    correlator.register(fake.uuid4())
+    correlator.register(fake.uuid4())
+
+    assert len(correlator) == 2
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        oldest.result(0)
+
+    for _ in range(5):
+        payload = webhook_payload(fake.uuid4())
+        correlator.resolve(sign_webhook(payload), payload)
+
+    assert len(correlator._early) == 2
+
+
+# Test UrlboxClient.post_and_wait
+@pytest.fixture
+def fake_server():
+    with FakeUrlboxServer(
+        api_key="api_key",
+        api_secret="api_secret",
+        webhook_secret=WEBHOOK_SECRET,
+    ) as fake_server:
+        yield fake_server
+
+
+@pytest.fixture
+def webhook_url(correlator):
+    class WebhookHandler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(
+                self.rfile.read(int(self.headers["Content-Length"]))
+            )
+            correlator.resolve(self.headers["x-urlbox-signature"], payload)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    webhook_server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), WebhookHandler
+    )
+    threading.Thread(target=webhook_server.serve_forever, daemon=True).start()
+
+    yield f"http://127.0.0.1:{webhook_server.server_address[1]}/"
+
+    webhook_server.shutdown()
+    webhook_server.server_close()
+
+
+@pytest.mark.enable_socket
+def test_post_and_wait_returns_webhook_payload(
+    fake_server, correlator, webhook_url
+):
+    urlbox_client = UrlboxClient(
+        api_key="api_key",
+        api_secret="api_secret",
+        api_host_name=fake_server.api_host_name,
+        correlator=correlator,
+    )
+
+    payloads = list(
+        concurrent.futures.ThreadPoolExecutor(4).map(
+            lambda _: urlbox_client.post_and_wait(
+                {"url": fake.url(), "webhook_url": webhook_url}, timeout=5
+            ),
+            range(8),
+        )
+    )
+
+    assert {payload["event"] for payload in payloads} == {"render.succeeded"}
+    assert len({payload["renderId"] for payload in payloads}) == 8
+    assert len(correlator) == 0
+
+
+@pytest.mark.enable_socket
+def test_post_and_wait_falls_back_to_polling(fake_server, correlator):
+    urlbox_client = UrlboxClient(
+        api_key="api_key",
+        api_secret="api_secret",
+        api_host_name=fake_server.api_host_name,
+        correlator=correlator,
+    )
+
+    with pytest.warns(UserWarning):
+        status = urlbox_client.post_and_wait(
+            {"url": fake.url()}, timeout=0.1, poll_interval=0.05
+        )
+
+    assert status["status"] == "succeeded"
+    assert len(correlator) == 0
+
+
+@pytest.mark.enable_socket
+def test_post_and_wait_without_webhook_url_polls_at_once(
+    fake_server, correlator
+):
+    urlbox_client = UrlboxClient(
+        api_key="api_key",
+        api_secret="api_secret",
+        api_host_name=fake_server.api_host_name,
+        correlator=correlator,
+    )
+    started_at = time.monotonic()
+
+    with pytest.warns(UserWarning):
+        status = urlbox_client.post_and_wait(
+            {"url": fake.url()}, timeout=30, poll_interval=0.05
+        )
+
+    assert status["status"] == "succeeded"
+    assert time.monotonic() - started_at < 5
+    assert len(correlator) == 0
+
+
+@pytest.mark.enable_socket
+def test_post_and_wait_without_correlator_polls(fake_server):
+    urlbox_client = UrlboxClient(
+        api_key="api_key",
+        api_secret="api_secret",
+        api_host_name=fake_server.api_host_name,
+    )
+
+    with pytest.warns(UserWarning):
+        status = urlbox_client.post_and_wait(
+            {"url": fake.url()}, poll_interval=0.05
+        )
+
+    assert status["status"] == "succeeded"
+
+
+@pytest.mark.parametrize("status_code", [401, 404])
+def test_post_and_wait_raises_when_polling_fails(status_code):
+    status_url = fake.url()
+
+    def handler(method, url, headers, json_body):
+        if method == "POST":
+            body = {
+                "status": "created",
+                "renderId": fake.uuid4(),
+                "statusUrl": status_url,
+            }
+
+            return 201, {}, json.dumps(body).encode()
+
+        return status_code, {}, b'{"error": {"message": "Not found"}}'
+
+    transport = InMemoryTransport(handler)
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), api_secret=fake.pystr(), transport=transport
+    )
+
+    with pytest.warns(UserWarning):
+        with pytest.raises(requests.HTTPError):
+            urlbox_client.post_and_wait(
+                {"url": fake.url()}, poll_interval=0.05, poll_timeout=1
+            )
+
+    assert [request[1] for request in transport.requests][1:] == [status_url]
@@ -0,0 +1,141 @@
+from faker import Faker
+from urlbox import RenderResult, UrlboxClient
+from urlbox.transports import InMemoryTransport
+from urlbox.transports.transport import build_response
+import io
+import json
+import sys
+
+
+fake = Faker()
+
+USAGE_HEADERS = {
+    "Content-Type": "image/png",
+    "X-Renders-Used": "12",
+    "X-Renders-Allowed": "1000",
+    "X-Renders-Reset": "2026-11-01T00:00:00.000Z",
+    "Retry-After": "30",
+}
+
+
+# Test RenderResult.from_response
+def test_from_response_parses_urlbox_headers():
+    response = build_response(
+        "GET", fake.url(), 200, USAGE_HEADERS, content=b"screenshot"
+    )
+
+    result = RenderResult.from_response(response)
+
+    assert result.status_code == 200
+    assert result.ok
+    assert result.content_type == "image/png"
+    assert result.renders_used == 12
+    assert result.renders_allowed == 1000
+    assert result.renders_reset == "2026-11-01T00:00:00.000Z"
+    assert result.retry_after == 30
+    assert result.content == b"screenshot"
+    assert result.file_path is None
+
+
+def test_from_response_ignores_missing_or_invalid_headers():
+    response = build_response(
+        "GET", fake.url(), 429, {"Retry-After": "soon"}, content=b""
+    )
+
+    result = RenderResult.from_response(response)
+
+    assert not result.ok
+    assert result.content_type is None
+    assert result.renders_used is None
+    assert result.retry_after is None
+
+
+def test_from_response_streams_body_to_destination(tmp_path):
+    destination = tmp_path / "screenshot.png"
+    body = fake.binary(length=200_000)
+    response = build_response("GET", fake.url(), 200, {}, content=body)
+
+    result = RenderResult.from_response(response, destination)
+
+    assert result.content is None
+    assert result.file_path == str(destination)
+    assert destination.read_bytes() == body
+
+
+def test_from_response_streams_body_to_file_object():
+    destination = io.BytesIO()
+    body = fake.binary(length=200_000)
+    response = build_response("GET", fake.url(), 200, {}, content=body)
+
+    result = RenderResult.from_response(response, destination)
+
+    assert result.content is None
+    assert result.file_path is None
+    assert destination.getvalue() == body
+
+
+def test_render_result_is_compact():
+    result = RenderResult(200)
+
+    assert not hasattr(result, "__dict__")
+    assert sys.getsizeof(result) < 200
+
+
+# Test RenderResult.json
+def test_json_from_content_and_file(tmp_path):
+    body = {"renderId": fake.uuid4(), "status": "created"}
+    destination = tmp_path / "render.json"
+    destination.write_bytes(json.dumps(body).encode())
+
+    assert RenderResult(201, content=json.dumps(body)).json() == body
+    assert RenderResult(201, file_path=str(destination)).json() == body
+
+
+# Test lean client requests
+def test_get_lean_returns_render_result():
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(),
+        transport=InMemoryTransport(headers=USAGE_HEADERS, body=b"png"),
+    )
+
+    result = urlbox_client.get({"url": fake.url()}, lean=True)
+
+    assert isinstance(result, RenderResult)
+    assert result.content == b"png"
+    assert result.renders_used == 12
+
+
+def test_get_lean_with_destination(tmp_path):
+    destination = tmp_path / "screenshot.png"
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), transport=InMemoryTransport(body=b"png")
+    )
+
+    result = urlbox_client.get(
+        {"url": fake.url()}, lean=True, destination=destination
+    )
+
+    assert result.content is None
+    assert destination.read_bytes() == b"png"
+
+
+def test_head_and_post_lean():
+    render_id = fake.uuid4()
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(),
+        api_secret=fake.pystr(),
+        transport=InMemoryTransport(
+            status_code=201,
+            headers=USAGE_HEADERS,
+            body=json.dumps({"renderId": render_id}).encode(),
+        ),
+    )
+
+    head_result = urlbox_client.head({"url": fake.url()}, lean=True)
+    post_result = urlbox_client.post(
+        {"url": fake.url(), "webhook_url": fake.url()}, lean=True
+    )
+
+    assert head_result.renders_allowed == 1000
+    assert head_result.content == b""
+    assert post_result.json()["renderId"] == render_id
@@ -0,0 +1,137 @@
+from faker import Faker
+from urlbox import RenderScheduler
+import pytest
+import threading
+import time
+
+
+fake = Faker()
+
+
+class _RecordingClient:
+    """
+        Records the order requests are sent in. Blocks until released so that
+        the test can fill the queues first.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def get(self, options):
+        self.release.wait(5)
+        with self._lock:
+            self.sent.append(options["url"])
+        return options["url"]
+
+    def head(self, options):
+        return "head"
+
+
+def _submit_blocker(scheduler):
+    # Occupy the single worker so every other request queues up
+    blocker = scheduler.submit({"url": "blocker"})
+    while scheduler.metrics()["in_flight"] == 0:
+        time.sleep(0.001)
+    return blocker
+
+
+def _fill_queues(scheduler, client, requests):
+    blocker = _submit_blocker(scheduler)
+    futures = [
+        scheduler.submit({"url": url}, tenant=tenant, priority=priority)
+        for url, tenant, priority in requests
+    ]
+    client.release.set()
+    blocker.result(5)
+    for future in futures:
+        future.result(5)
+    return client.sent[1:]
+
+
+# Test RenderScheduler
+def test_submit_returns_future_of_response():
+    client = _RecordingClient()
+    client.release.set()
+
+    with RenderScheduler(client) as scheduler:
+        assert scheduler.submit({"url": "a"}).result(5) == "a"
+        assert scheduler.submit({"url": "a"}, method="head").result(5) == "head"
+
+
+def test_interactive_requests_jump_ahead_of_bulk():
+    client = _RecordingClient()
+
+    with RenderScheduler(client, max_concurrency=1) as scheduler:
+        sent = _fill_queues(
+            scheduler,
+            client,
+            [
+                ("bulk1", "backfill", RenderScheduler.BULK),
+                ("bulk2", "backfill", RenderScheduler.BULK),
+                ("interactive", "web", RenderScheduler.INTERACTIVE),
+            ],
+        )
+
+    assert sent == ["interactive", "bulk1", "bulk2"]
+
+
+def test_tenants_share_fairly_by_weight():
+    client = _RecordingClient()
+
+    with RenderScheduler(
+        client, max_concurrency=1, tenant_weights={"big": 2}
+    ) as scheduler:
+        sent = _fill_queues(
+            scheduler,
+            client,
+            [(f"small{i}", "small", RenderScheduler.BULK) for i in range(3)]
+            + [(f"big{i}", "big", RenderScheduler.BULK) for i in range(6)],
+        )
+
+    # The backfill queued first by "small" does not starve "big", which gets
+    # twice the share of the worker.
+    assert [url[:-1] for url in sent[:6]].count("big") == 4
+    assert [url[:-1] for url in sent[:6]].count("small") == 2
+
+
+def test_errors_are_set_on_future():
+    class FailingClient:
+        def get(self, options):
+            raise ConnectionError()
+
+    with RenderScheduler(FailingClient()) as scheduler:
+        with pytest.raises(ConnectionError):
+            scheduler.submit({"url": fake.url()}).result(5)
+
+
+def test_metrics_report_queue_depth_and_wait_times():
+    client = _RecordingClient()
+    scheduler = RenderScheduler(client, max_concurrency=1)
+
+    _submit_blocker(scheduler)
+    scheduler.submit({"url": "a"}, tenant="acme", priority=1)
+    scheduler.submit({"url": "b"}, tenant="acme", priority=2)
+
+    metrics = scheduler.metrics()
+
+    assert metrics["queue_depth_by_tenant"]["acme"] == 2
+    assert metrics["queue_depth_by_priority"] == {1: 1, 2: 1}
+
+    client.release.set()
+    scheduler.shutdown()
+
+    metrics = scheduler.metrics()
+
+    assert metrics["queue_depth_by_tenant"] == {}
+    assert metrics["in_flight"] == 0
+    assert metrics["wait_time_by_priority"][1]["p95"] is not None
+
+
+def test_submit_after_shutdown_raises():
+    scheduler = RenderScheduler(_RecordingClient())
+    scheduler.shutdown()
+
+    with pytest.raises(RuntimeError):
+        scheduler.submit({"url": fake.url()})
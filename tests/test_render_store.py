@@ -0,0 +1,170 @@
+from faker import Faker
+from tests.helpers import Pages
+from urlbox import RenderStore, UrlboxClient
+from urlbox.transports import InMemoryTransport
+import concurrent.futures
+import os
+import pytest
+
+fake = Faker()
+
+PARKED_PAGE = b"This domain is for sale"
+
+
+@pytest.fixture
+def pages():
+    return Pages(default=PARKED_PAGE)
+
+
+@pytest.fixture
+def transport(pages):
+    return InMemoryTransport(pages)
+
+
+@pytest.fixture
+def store(tmp_path, transport):
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), api_secret=fake.pystr(), transport=transport
+    )
+
+    with RenderStore(urlbox_client, str(tmp_path / "renders")) as store:
+        yield store
+
+
+def _options():
+    # fake.url() alone repeats itself within a few dozen calls.
+    return {"url": f"{fake.url()}{fake.uuid4()}", "format": "png"}
+
+
+# Test RenderStore.get
+def test_identical_renders_are_stored_once(store):
+    first = store.get(_options())
+    second = store.get(_options())
+
+    assert first.file_path == second.file_path
+    assert first.content_type == "image/png"
+    assert open(first.file_path, "rb").read() == PARKED_PAGE
+    assert store.stats() == {
+        "renders": 2,
+        "blobs": 1,
+        "stored_bytes": len(PARKED_PAGE),
+        "logical_bytes": 2 * len(PARKED_PAGE),
+        "released_bytes": 0,
+    }
+
+
+def test_stored_render_is_returned_without_request(store, transport):
+    options = _options()
+
+    first = store.get(options)
+    second = store.get(dict(reversed(list(options.items()))))
+
+    assert len(transport.requests) == 1
+    assert second.status_code == 200
+    assert second.file_path == first.file_path
+    assert second.content_type == "image/png"
+
+
+def test_refresh_renders_again(store, pages, transport):
+    options = _options()
+    store.get(options)
+    pages.renders[options["url"]] = b"Back online"
+
+    result = store.get(options, refresh=True)
+
+    assert len(transport.requests) == 2
+    assert open(result.file_path, "rb").read() == b"Back online"
+    assert store.stats()["released_bytes"] == len(PARKED_PAGE)
+
+
+def test_failed_render_is_not_stored(store, tmp_path):
+    options = {"url": "http://example.com/missing"}
+
+    result = store.get(options)
+
+    assert result.status_code == 404
+    assert result.file_path is None
+    assert result.json() == {}
+    assert store.lookup(options) is None
+    assert not os.listdir(tmp_path / "renders" / "tmp")
+
+
+def test_concurrent_identical_renders(store):
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(store.get, [_options() for _ in range(50)])
+        )
+
+    assert {result.file_path for result in results} == {results[0].file_path}
+    assert store.stats()["blobs"] == 1
+    assert store.stats()["renders"] == 50
+    assert not os.listdir(store.tmp_dir)
+
+
+# Test RenderStore.lookup
+def test_lookup_never_renders(store, transport):
+    assert store.lookup(_options()) is None
+    assert not transport.requests
+
+
+# Test RenderStore.remove and collect_garbage
+def test_blob_is_kept_while_referenced(store):
+    options, other_options = _options(), _options()
+    result = store.get(options)
+    store.get(other_options)
+
+    assert store.remove(options)
+    assert not store.remove(options)
+    assert store.collect_garbage() == 0
+    assert os.path.exists(result.file_path)
+
+    store.remove(other_options)
+
+    assert store.collect_garbage() == 1
+    assert not os.path.exists(result.file_path)
+    assert store.stats()["blobs"] == 0
+
+
+def test_released_blob_is_reused_before_collection(store):
+    options = _options()
+    result = store.get(options)
+    store.remove(options)
+
+    store.get(_options())
+
+    assert store.collect_garbage() == 0
+    assert os.path.exists(result.file_path)
+
+
+def test_collect_garbage_is_incremental(store, pages):
+    all_options = [_options() for _ in range(5)]
+
+    for options in all_options:
+        pages.renders[options["url"]] = fake.binary(length=100)
+        store.get(options)
+        store.remove(options)
+
+    assert store.collect_garbage(limit=2) == 2
+    assert store.collect_garbage(limit=2) == 2
+    assert store.collect_garbage(limit=2) == 1
+    assert store.collect_garbage(limit=2) == 0
+
+
+def test_collect_garbage_grace_period(store):
+    options = _options()
+    store.get(options)
+    store.remove(options)
+
+    assert store.collect_garbage(grace_seconds=60) == 0
+    assert store.collect_garbage() == 1
+
+
+def test_index_persists(tmp_path, transport):
+    urlbox_client = UrlboxClient(api_key=fake.pystr(), transport=transport)
+    options = _options()
+
+    with RenderStore(urlbox_client, str(tmp_path)) as store:
+        result = store.get(options)
+
+    with RenderStore(urlbox_client, str(tmp_path)) as store:
+        assert store.lookup(options).file_path == result.file_path
@@ -0,0 +1,201 @@
+from faker import Faker
+from urlbox import LatencyHistogram, RequestHedger, UrlboxClient
+from urlbox.transports import InMemoryTransport
+import pytest
+import threading
+import time
+
+
+fake = Faker()
+
+
+class _FakeResponse(str):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _warm_histogram(seconds=0.01, samples=200):
+    histogram = LatencyHistogram(min_samples=10)
+
+    for _ in range(samples):
+        histogram.record(seconds)
+
+    return histogram
+
+
+# Test LatencyHistogram
+def test_histogram_percentile_requires_min_samples():
+    histogram = LatencyHistogram(min_samples=5)
+
+    for _ in range(4):
+        histogram.record(0.1)
+
+    assert histogram.percentile(95) is None
+
+    histogram.record(0.1)
+
+    assert histogram.percentile(95) == pytest.approx(0.1, rel=0.2)
+
+
+def test_histogram_percentile_tracks_tail():
+    histogram = LatencyHistogram(min_samples=1)
+
+    for _ in range(90):
+        histogram.record(0.01)
+    for _ in range(10):
+        histogram.record(2.0)
+
+    assert histogram.percentile(50) == pytest.approx(0.01, rel=0.2)
+    assert histogram.percentile(99) == pytest.approx(2.0, rel=0.2)
+
+
+def test_histogram_only_keeps_window():
+    histogram = LatencyHistogram(window_size=10, min_samples=1)
+
+    for _ in range(10):
+        histogram.record(5.0)
+    for _ in range(10):
+        histogram.record(0.01)
+
+    assert len(histogram) == 10
+    assert histogram.percentile(99) == pytest.approx(0.01, rel=0.2)
+
+
+# Test RequestHedger
+def test_hedger_does_not_hedge_fast_requests():
+    hedger = RequestHedger(histogram=_warm_histogram(0.5), max_hedge_ratio=1)
+    sent = []
+
+    response = hedger.call(
+        lambda url: sent.append(url) or _FakeResponse(url), "primary"
+    )
+
+    assert response == "primary"
+    assert sent == ["primary"]
+    assert hedger.hedges_count == 0
+
+
+def test_hedger_hedges_slow_requests_and_returns_first():
+    hedger = RequestHedger(histogram=_warm_histogram(), max_hedge_ratio=1)
+    release_primary = threading.Event()
+
+    def send(url):
+        if url == "primary":
+            release_primary.wait(5)
+        return _FakeResponse(url)
+
+    response = hedger.call(send, "primary", "hedge")
+    release_primary.set()
+
+    assert response == "hedge"
+    assert hedger.hedges_count == 1
+
+
+def test_hedger_caps_hedge_ratio():
+    hedger = RequestHedger(histogram=_warm_histogram(), max_hedge_ratio=0.5)
+
+    def send(url):
+        if url == "primary":
+            time.sleep(0.1)
+        return _FakeResponse(url)
+
+    results = [hedger.call(send, "primary", "hedge") for _ in range(4)]
+
+    assert hedger.hedges_count == 2
+    assert results.count("hedge") == 2
+
+
+def test_hedger_falls_back_when_hedge_fails():
+    hedger = RequestHedger(histogram=_warm_histogram(), max_hedge_ratio=1)
+
+    def send(url):
+        if url == "hedge":
+            raise ConnectionError()
+        time.sleep(0.1)
+        return _FakeResponse(url)
+
+    assert hedger.call(send, "primary", "hedge") == "primary"
+
+
+def test_hedger_does_not_time_queued_requests():
+    histogram = LatencyHistogram(min_samples=2)
+    hedger = RequestHedger(
+        histogram=histogram, max_hedge_ratio=0, max_workers=1
+    )
+    first_started = threading.Event()
+
+    def send(url):
+        if url == "slow":
+            first_started.set()
+            time.sleep(0.2)
+
+        return _FakeResponse(url)
+
+    slow = threading.Thread(target=hedger.call, args=(send, "slow"))
+    slow.start()
+    first_started.wait()
+    hedger.call(send, "fast")
+    slow.join()
+
+    assert histogram.percentile(1) < 0.1
+
+
+def test_hedger_validates_arguments():
+    with pytest.raises(ValueError):
+        RequestHedger(percentile=100)
+
+    with pytest.raises(ValueError):
+        RequestHedger(max_hedge_ratio=2)
+
+
+# Test UrlboxClient(hedger=...)
+def test_get_hedges_to_alternate_host():
+    api_key = fake.pystr()
+    hedger = RequestHedger(
+        histogram=_warm_histogram(),
+        max_hedge_ratio=1,
+        alternate_api_host_name="backup.example.com",
+    )
+
+    def handler(method, url, headers, json):
+        if url.startswith(UrlboxClient.BASE_API_URL):
+            time.sleep(0.2)
+            return 200, {}, b"primary"
+        return 200, {}, b"hedge"
+
+    transport = InMemoryTransport(handler)
+    urlbox_client = UrlboxClient(
+        api_key=api_key,
+        api_secret=fake.pystr(),
+        hedger=hedger,
+        transport=transport,
+    )
+    options = {"url": fake.url()}
+
+    response = urlbox_client.get(options)
+
+    primary_url = urlbox_client.generate_url(options)
+    hedge_url = primary_url.replace(
+        UrlboxClient.BASE_API_URL, "https://backup.example.com/"
+    )
+
+    assert response.content == b"hedge"
+    assert {request[1] for request in transport.requests} == {
+        primary_url,
+        hedge_url,
+    }
+
+
+def test_close_shuts_down_hedger():
+    hedger = RequestHedger()
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), hedger=hedger, transport=InMemoryTransport()
+    )
+    urlbox_client.get({"url": fake.url()})
+
+    urlbox_client.close()
+
+    with pytest.raises(RuntimeError):
+        hedger.call(lambda url: _FakeResponse(url), "primary")
@@ -0,0 +1,199 @@
+from faker import Faker
+from urlbox import (
+    RenderBudgetExceededError,
+    SharedRateLimiter,
+    UrlboxClient,
+)
+from urlbox.transports import InMemoryTransport
+import asyncio
+import multiprocessing
+import pytest
+import requests
+import threading
+import time
+
+
+fake = Faker()
+
+
+def _usage(used, allowed=10_000):
+    response = requests.Response()
+    response.headers["X-Renders-Used"] = str(used)
+    response.headers["X-Renders-Allowed"] = str(allowed)
+
+    return response
+
+
+def _acquire_in_process(path, count, timestamps):
+    with SharedRateLimiter(path, rate=50) as rate_limiter:
+        for _ in range(count):
+            rate_limiter.acquire()
+            timestamps.put(time.time())
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "urlbox.limiter")
+
+
+# Test SharedRateLimiter rate
+def test_rate_is_shared_between_instances(path):
+    first = SharedRateLimiter(path, rate=10)
+    second = SharedRateLimiter(path, rate=10)
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+
+
+def test_rate_is_shared_between_processes(path):
+    context = multiprocessing.get_context("fork")
+    timestamps = context.Queue()
+    processes = [
+        context.Process(
+            target=_acquire_in_process, args=(path, 5, timestamps)
+        )
+        for _ in range(4)
+    ]
+
+    for process in processes:
+        process.start()
+
+    for process in processes:
+        process.join(10)
+
+    times = sorted(timestamps.get(timeout=1) for _ in range(20))
+
+    # 20 tokens at 50 per second, the first one straight away.
+    assert times[-1] - times[0] >= 0.35
+
+
+def test_acquire_timeout(path):
+    rate_limiter = SharedRateLimiter(path, rate=1)
+    rate_limiter.acquire()
+
+    with pytest.raises(TimeoutError):
+        rate_limiter.acquire(timeout=0.1)
+
+
+def test_no_rate_never_waits(path):
+    rate_limiter = SharedRateLimiter(path)
+    started_at = time.monotonic()
+
+    for _ in range(100):
+        rate_limiter.acquire()
+
+    assert time.monotonic() - started_at < 0.5
+
+
+# Test SharedRateLimiter budget
+def test_renders_are_counted_from_usage_headers(path):
+    rate_limiter = SharedRateLimiter(path, daily_budget=100)
+    rate_limiter.record(_usage(500))
+    rate_limiter.record(_usage(510))
+    rate_limiter.record(_usage(505))
+    rate_limiter.record(_usage(512))
+
+    metrics = rate_limiter.metrics()
+
+    assert metrics["renders_today"] == 13
+    assert metrics["renders_used"] == 512
+    assert metrics["renders_allowed"] == 10_000
+    assert metrics["budget_remaining"] == 87
+
+
+def test_new_billing_period_is_not_counted(path):
+    rate_limiter = SharedRateLimiter(path)
+    rate_limiter.record(_usage(9000))
+    rate_limiter.record(_usage(3))
+    rate_limiter.record(_usage(5))
+
+    assert rate_limiter.metrics()["renders_today"] == 3
+
+
+def test_first_usage_recorded_counts_one_render(path):
+    rate_limiter = SharedRateLimiter(path, daily_budget=1)
+    rate_limiter.record(_usage(500))
+
+    assert rate_limiter.metrics()["renders_today"] == 1
+    assert not rate_limiter.budget_available()
+
+
+def test_daily_budget_is_enforced_across_instances(path):
+    first = SharedRateLimiter(path, daily_budget=10)
+    second = SharedRateLimiter(path, daily_budget=10)
+    first.record(_usage(100))
+    first.record(_usage(110))
+
+    assert not second.budget_available()
+    assert not second.try_acquire()
+
+    with pytest.raises(RenderBudgetExceededError):
+        second.acquire()
+
+
+def test_account_quota_is_enforced(path):
+    rate_limiter = SharedRateLimiter(path)
+    rate_limiter.record(_usage(1000, allowed=1000))
+
+    assert not rate_limiter.budget_available()
+
+
+def test_budget_resets_every_day(path, monkeypatch):
+    rate_limiter = SharedRateLimiter(path, daily_budget=10)
+    rate_limiter.record(_usage(100))
+    rate_limiter.record(_usage(110))
+    tomorrow = time.time() + 24 * 60 * 60
+    monkeypatch.setattr(time, "time", lambda: tomorrow)
+
+    assert rate_limiter.budget_available()
+    assert rate_limiter.metrics()["renders_today"] == 0
+
+
+# Test UrlboxClient with a SharedRateLimiter
+def test_client_consults_and_records_usage(path):
+    used = iter(range(100, 200))
+    transport = InMemoryTransport(
+        lambda *args: (
+            200,
+            {"X-Renders-Used": str(next(used)), "X-Renders-Allowed": "1000"},
+            b"",
+        )
+    )
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(),
+        transport=transport,
+        rate_limiter=SharedRateLimiter(path, daily_budget=3),
+    )
+
+    for _ in range(3):
+        urlbox_client.get({"url": fake.url()})
+
+    with pytest.raises(RenderBudgetExceededError):
+        urlbox_client.get({"url": fake.url()})
+
+    assert len(transport.requests) == 3
+
+
+def test_get_async_records_usage_off_the_event_loop(path):
+    rate_limiter = SharedRateLimiter(path)
+    record = rate_limiter.record
+    recording_threads = []
+
+    def recording_record(response):
+        recording_threads.append(threading.current_thread())
+        record(response)
+
+    rate_limiter.record = recording_record
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(),
+        transport=InMemoryTransport(
+            lambda *args: (200, {"X-Renders-Used": "100"}, b"")
+        ),
+        rate_limiter=rate_limiter,
+    )
+
+    asyncio.run(urlbox_client.get_async({"url": fake.url()}))
+
+    assert recording_threads
+    assert threading.main_thread() not in recording_threads
+    assert rate_limiter.metrics()["renders_today"] == 1
@@ -0,0 +1,155 @@
+from faker import Faker
+from urlbox import SitemapReader, UrlboxClient
+from urlbox.transports import InMemoryTransport
+import gzip
+import requests_mock
+import threading
+
+
+fake = Faker()
+
+SITEMAP_INDEX = "tests/files/sitemaps/sitemap_index.xml"
+
+PAGES = [
+    "https://example.com/",
+    "https://example.com/about",
+    "https://example.com/pricing",
+]
+POSTS = [f"https://example.com/posts/{i}" for i in range(1, 6)]
+
+
+# Test SitemapReader.urls
+def test_reads_plain_sitemap():
+    reader = SitemapReader("tests/files/sitemaps/sitemap_pages.xml")
+
+    assert list(reader.urls()) == PAGES
+
+
+def test_reads_gzipped_sitemap():
+    reader = SitemapReader("tests/files/sitemaps/sitemap_posts.xml.gz")
+
+    assert list(reader.urls()) == POSTS + ["https://example.com/about"]
+
+
+def test_follows_nested_indexes_and_drops_duplicates():
+    reader = SitemapReader(SITEMAP_INDEX)
+
+    assert list(reader.urls()) == PAGES + POSTS
+    assert reader.sitemaps_read == 4
+    assert reader.duplicates_count == 1
+
+
+def test_can_be_read_more_than_once():
+    reader = SitemapReader(SITEMAP_INDEX)
+
+    assert list(reader) == list(reader)
+    assert list(reader.urls()) == PAGES + POSTS
+
+
+def test_dedup_can_be_disabled():
+    reader = SitemapReader(SITEMAP_INDEX, dedup=False)
+
+    assert list(reader.urls()).count("https://example.com/about") == 2
+
+
+def test_max_depth_limits_nested_indexes():
+    reader = SitemapReader(SITEMAP_INDEX, max_depth=1)
+
+    assert list(reader.urls()) == PAGES
+
+
+def test_yields_before_reading_whole_sitemap(tmp_path):
+    sitemap = tmp_path / "huge.xml.gz"
+
+    with gzip.open(sitemap, "wt") as file:
+        file.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+
+        for i in range(200_000):
+            file.write(f"<url><loc>https://example.com/{i}</loc></url>")
+
+        file.write("</urlset>")
+
+    urls = SitemapReader(sitemap).urls()
+
+    assert next(urls) == "https://example.com/0"
+
+    urls.close()
+
+
+def test_reads_sitemaps_over_http():
+    with open("tests/files/sitemaps/sitemap_posts.xml.gz", "rb") as file:
+        posts = file.read()
+
+    index = (
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        "<sitemap><loc>/sitemap_posts.xml.gz</loc></sitemap>"
+        "</sitemapindex>"
+    )
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(
+            "https://example.com/sitemap.xml", content=index.encode()
+        )
+        requests_mocker.get(
+            "https://example.com/sitemap_posts.xml.gz", content=posts
+        )
+
+        urls = list(SitemapReader("https://example.com/sitemap.xml").urls())
+
+    assert urls == POSTS + ["https://example.com/about"]
+
+
+# Test SitemapReader.options_iter
+def test_yields_render_options():
+    reader = SitemapReader(
+        "tests/files/sitemaps/sitemap_pages.xml", options={"format": "pdf"}
+    )
+
+    assert list(reader)[0] == {"format": "pdf", "url": "https://example.com/"}
+
+
+# Test SitemapReader.render
+def test_renders_every_url():
+    transport = InMemoryTransport(body=b"screenshot")
+    urlbox_client = UrlboxClient(api_key=fake.pystr(), transport=transport)
+
+    results = list(SitemapReader(SITEMAP_INDEX).render(urlbox_client))
+
+    assert sorted(options["url"] for options, _ in results) == sorted(
+        PAGES + POSTS
+    )
+    assert all(response.content == b"screenshot" for _, response in results)
+    assert len(transport.requests) == len(PAGES + POSTS)
+
+
+def test_render_reads_ahead_a_bounded_number_of_urls():
+    release = threading.Event()
+    transport = InMemoryTransport(
+        lambda *args: release.wait(5) and (200, {}, b"")
+    )
+    urlbox_client = UrlboxClient(api_key=fake.pystr(), transport=transport)
+    reader = SitemapReader(SITEMAP_INDEX)
+    renders = reader.render(urlbox_client, max_workers=1)
+    thread = threading.Thread(target=lambda: next(renders))
+    thread.start()
+    thread.join(0.2)
+
+    assert reader.sitemaps_read == 2
+
+    release.set()
+    thread.join()
+    renders.close()
+
+
+def test_render_yields_errors():
+    reader = SitemapReader("tests/files/sitemaps/sitemap_pages.xml")
+
+    results = list(reader.render(_FailingClient()))
+
+    assert len(results) == len(PAGES)
+    assert all(isinstance(error, ValueError) for _, error in results)
+
+
+class _FailingClient:
+    def get(self, options):
+        raise ValueError(options["url"])
@@ -0,0 +1,185 @@
+from faker import Faker
+from hashlib import sha256
+from urlbox import (
+    CircuitBreaker,
+    OptionSchema,
+    RateLimiter,
+    SharedRateLimiter,
+    UrlboxClient,
+    webhook_validator,
+)
+from urlbox.testing import FakeUrlboxServer
+import concurrent.futures
+import hmac
+import json
+import pytest
+import threading
+import time
+
+pytestmark = pytest.mark.enable_socket
+
+fake = Faker()
+
+THREADS = 32
+
+
+def _hammer(function, arguments):
+    """
+        Calls function with each of arguments from THREADS threads, all
+        released at once to maximise contention, and returns the results in
+        order.
+    """
+
+    start = threading.Event()
+
+    def call(argument):
+        start.wait()
+
+        return function(argument)
+
+    with concurrent.futures.ThreadPoolExecutor(THREADS) as executor:
+        futures = [executor.submit(call, argument) for argument in arguments]
+        start.set()
+
+        return [future.result() for future in futures]
+
+
+@pytest.fixture(scope="module")
+def fake_server():
+    with FakeUrlboxServer(
+        api_key="api_key",
+        api_secret="api_secret",
+        webhook_secret="webhook_secret",
+        image_size=2000,
+    ) as fake_server:
+        yield fake_server
+
+
+@pytest.fixture
+def urlbox_client(fake_server):
+    with UrlboxClient(
+        api_key="api_key",
+        api_secret="api_secret",
+        api_host_name=fake_server.api_host_name,
+        circuit_breaker=CircuitBreaker(),
+        rate_limiter=RateLimiter(100000, burst=100000),
+        validate_options="strict",
+    ) as urlbox_client:
+        yield urlbox_client
+
+
+# Test a shared UrlboxClient
+def test_generate_url_from_many_threads(urlbox_client):
+    options = [
+        {"url": f"http://example.com/{i}", "width": i % 1000 + 1}
+        for i in range(2000)
+    ]
+    expected = [urlbox_client.generate_url(option) for option in options]
+
+    assert _hammer(urlbox_client.generate_url, options) == expected
+
+
+def test_get_from_many_threads(urlbox_client, fake_server):
+    urls = [f"http://example.com/{i}" for i in range(256)]
+    expected = {
+        url: fake_server.render_body({"url": url}, "png") for url in urls
+    }
+
+    responses = _hammer(lambda url: urlbox_client.get({"url": url}), urls)
+
+    assert [response.status_code for response in responses] == [200] * 256
+    assert [response.content for response in responses] == [
+        expected[url] for url in urls
+    ]
+    assert urlbox_client.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_post_from_many_threads(urlbox_client):
+    with pytest.warns(UserWarning):
+        responses = _hammer(
+            lambda i: urlbox_client.post({"url": f"http://example.com/{i}"}),
+            range(128),
+        )
+
+    render_ids = {response.json()["renderId"] for response in responses}
+
+    assert [response.status_code for response in responses] == [201] * 128
+    assert len(render_ids) == 128
+
+
+def test_submit_from_many_threads(urlbox_client):
+    futures = _hammer(
+        lambda i: urlbox_client.submit({"url": f"http://example.com/{i}"}),
+        range(256),
+    )
+
+    assert {future.result(10).status_code for future in futures} == {200}
+
+
+def test_lean_get_from_many_threads(urlbox_client):
+    results = _hammer(
+        lambda i: urlbox_client.get(
+            {"url": f"http://example.com/{i}"}, lean=True
+        ),
+        range(256),
+    )
+
+    assert sorted(result.renders_used for result in results)[-1] >= 256
+
+
+# Test shared helpers
+def test_webhook_validator_from_many_threads():
+    def sign(payload):
+        timestamp = int(time.time())
+        signature = hmac.new(
+            b"webhook_secret",
+            msg=f"{timestamp}.{json.dumps(payload, separators=(',', ':'))}".encode(),
+            digestmod=sha256,
+        ).hexdigest()
+
+        return f"t={timestamp},sha256={signature}", payload
+
+    signed = [sign({"renderId": fake.uuid4(), "i": i}) for i in range(2000)]
+
+    results = _hammer(
+        lambda signature_and_payload: webhook_validator.call(
+            *signature_and_payload, "webhook_secret"
+        ),
+        signed,
+    )
+
+    assert results == [True] * 2000
+
+
+def test_option_schema_from_many_threads():
+    schema = OptionSchema()
+    shapes = [
+        {"url": fake.url(), f"block_{kind}": True}
+        for kind in ("images", "fonts", "medias", "styles", "scripts")
+    ] * 400
+
+    assert _hammer(schema.validate, shapes) == [[]] * 2000
+    assert len(schema._compiled) == 5
+
+
+def test_shared_rate_limiter_from_many_threads(tmp_path):
+    with SharedRateLimiter(tmp_path / "limiter", rate=0.001) as limiter:
+        holders = []
+
+        def hold(_):
+            with limiter._locked():
+                holders.append(1)
+                time.sleep(0.001)
+                concurrent = len(holders)
+                holders.pop()
+
+            return concurrent
+
+        assert max(_hammer(hold, range(200))) == 1
+
+        for _ in range(5):
+            limiter._write(limiter._read(), tokens=1, updated_at=time.time())
+
+            assert (
+                sum(_hammer(lambda _: limiter.try_acquire(), range(64))) == 1
+            )
@@ -0,0 +1,494 @@
+from faker import Faker
+from urlbox import CircuitBreaker, CircuitOpenError, UrlboxClient
+from urlbox.testing import FakeUrlboxServer
+from urlbox.transports import (
+    Http2Transport,
+    InMemoryTransport,
+    RequestsTransport,
+    Transport,
+    Urllib3Transport,
+)
+import asyncio
+import http.server
+import os
+import pytest
+import requests
+import requests_mock
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+
+
+fake = Faker()
+
+
+# Test Transport
+def test_transport_interface_is_abstract():
+    with pytest.raises(NotImplementedError):
+        Transport().request("GET", fake.url())
+
+
+def test_client_defaults_to_requests_transport():
+    urlbox_client = UrlboxClient(api_key=fake.pystr())
+
+    assert isinstance(urlbox_client.transport, RequestsTransport)
+
+
+# Test RequestsTransport
+def test_requests_transport_reuses_session():
+    transport = RequestsTransport()
+    urlbox_client = UrlboxClient(api_key=fake.pystr(), transport=transport)
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(requests_mock.ANY, content=b"screenshot")
+
+        response = urlbox_client.get({"url": fake.url()})
+
+    assert response.content == b"screenshot"
+    assert isinstance(transport.session, requests.Session)
+
+
+# Test InMemoryTransport
+def test_in_memory_transport_records_requests():
+    transport = InMemoryTransport(
+        body=b"screenshot", headers={"Content-Type": "image/png"}
+    )
+    api_secret = fake.pystr()
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), api_secret=api_secret, transport=transport
+    )
+    options = {"url": fake.url()}
+
+    response = urlbox_client.get(options)
+    urlbox_client.post(
+        {"url": fake.url(), "webhook_url": "http://example.com/webhook"}
+    )
+
+    assert isinstance(response, requests.Response)
+    assert response.content == b"screenshot"
+    assert response.headers["content-type"] == "image/png"
+    assert transport.requests[0][:2] == (
+        "GET",
+        urlbox_client.generate_url(options),
+    )
+    assert transport.requests[1][2]["Authorization"] == f"Bearer {api_secret}"
+
+
+def test_in_memory_transport_handler():
+    def handler(method, url, headers, json):
+        return 503, {}, b"unavailable"
+
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), transport=InMemoryTransport(handler)
+    )
+
+    response = urlbox_client.head({"url": fake.url()})
+
+    assert response.status_code == 503
+    assert response.content == b""
+
+
+# Test Urllib3Transport
+@pytest.mark.enable_socket
+def test_urllib3_transport_against_fake_server():
+    api_key, api_secret = fake.pystr(), fake.pystr()
+
+    with FakeUrlboxServer(
+        api_key=api_key, api_secret=api_secret, image_size=1024
+    ) as server:
+        with Urllib3Transport() as transport:
+            urlbox_client = UrlboxClient(
+                api_key=api_key,
+                api_secret=api_secret,
+                api_host_name=server.api_host_name,
+                transport=transport,
+            )
+
+            response = urlbox_client.get({"url": fake.url()})
+            post_response = urlbox_client.post(
+                {"url": fake.url(), "webhook_url": "http://127.0.0.1:1/"}
+            )
+
+    assert response.status_code == 200
+    assert len(response.content) == 1024
+    assert response.headers["content-type"] == "image/png"
+    assert post_response.status_code == 201
+    assert "renderId" in post_response.json()
+
+
+@pytest.mark.enable_socket
+@pytest.mark.parametrize(
+    "transport", [RequestsTransport(), Urllib3Transport()]
+)
+def test_transports_follow_redirects(transport):
+    api_key = fake.pystr()
+
+    with FakeUrlboxServer(api_key=api_key, image_size=1024) as server:
+        render_url = UrlboxClient(
+            api_key=api_key, api_host_name=server.api_host_name
+        ).generate_url({"url": fake.url()})
+
+        class RedirectHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(302)
+                self.send_header("Location", render_url)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        redirect_server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), RedirectHandler
+        )
+        threading.Thread(
+            target=redirect_server.serve_forever, daemon=True
+        ).start()
+        redirect_url = f"http://127.0.0.1:{redirect_server.server_address[1]}/"
+
+        try:
+            followed = transport.request("GET", redirect_url)
+            not_followed = transport.request(
+                "GET", redirect_url, allow_redirects=False
+            )
+        finally:
+            transport.close()
+            redirect_server.shutdown()
+            redirect_server.server_close()
+
+    assert followed.status_code == 200
+    assert len(followed.content) == 1024
+    assert not_followed.status_code == 302
+    assert not_followed.headers["Location"] == render_url
+
+
+@pytest.mark.enable_socket
+def test_urllib3_transport_raises_requests_exceptions():
+    transport = Urllib3Transport()
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        transport.request("GET", "http://127.0.0.1:1/", timeout=1)
+
+
+# Test Transport.arequest() and UrlboxClient.get_async()
+def test_get_async_through_default_arequest():
+    transport = InMemoryTransport(body=b"screenshot")
+    urlbox_client = UrlboxClient(api_key=fake.pystr(), transport=transport)
+    options = {"url": fake.url()}
+
+    response = asyncio.run(urlbox_client.get_async(options))
+
+    assert response.content == b"screenshot"
+    assert transport.requests[0][1] == urlbox_client.generate_url(options)
+
+
+def test_get_async_through_circuit_breaker():
+    circuit_breaker = CircuitBreaker(min_calls=1)
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(),
+        transport=InMemoryTransport(status_code=503),
+        circuit_breaker=circuit_breaker,
+    )
+
+    asyncio.run(urlbox_client.get_async({"url": fake.url()}))
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(urlbox_client.get_async({"url": fake.url()}))
+
+
+# Test Http2Transport
+@pytest.mark.enable_socket
+def test_http2_transport_sync_and_async():
+    pytest.importorskip("httpx")
+    api_key, api_secret = fake.pystr(), fake.pystr()
+
+    with FakeUrlboxServer(
+        api_key=api_key, api_secret=api_secret, image_size=1024
+    ) as server:
+        transport = Http2Transport()
+        urlbox_client = UrlboxClient(
+            api_key=api_key,
+            api_secret=api_secret,
+            api_host_name=server.api_host_name,
+            transport=transport,
+        )
+
+        async def get_many():
+            try:
+                return await asyncio.gather(
+                    *(
+                        urlbox_client.get_async({"url": fake.url()})
+                        for _ in range(5)
+                    )
+                )
+            finally:
+                await transport.aclose()
+
+        response = urlbox_client.get({"url": fake.url()})
+        async_responses = asyncio.run(get_many())
+        streamed = transport.request(
+            "GET", urlbox_client.generate_url({"url": fake.url()}), stream=True
+        )
+        streamed_content = b"".join(streamed.iter_content(100))
+        transport.close()
+
+    assert isinstance(response, requests.Response)
+    assert len(response.content) == 1024
+    assert [r.status_code for r in async_responses] == [200] * 5
+    assert len(streamed_content) == 1024
+
+
+@pytest.mark.enable_socket
+def test_http2_transport_across_event_loops():
+    pytest.importorskip("httpx")
+    api_key, api_secret = fake.pystr(), fake.pystr()
+
+    with FakeUrlboxServer(api_key=api_key, api_secret=api_secret) as server:
+        transport = Http2Transport()
+        urlbox_client = UrlboxClient(
+            api_key=api_key,
+            api_secret=api_secret,
+            api_host_name=server.api_host_name,
+            transport=transport,
+        )
+
+        first = asyncio.run(urlbox_client.get_async({"url": fake.url()}))
+        second = asyncio.run(urlbox_client.get_async({"url": fake.url()}))
+
+        loop = asyncio.new_event_loop()
+        third = loop.run_until_complete(
+            urlbox_client.get_async({"url": fake.url()})
+        )
+        transport.close()
+        loop.close()
+
+    assert [first.status_code, second.status_code] == [200, 200]
+    assert third.status_code == 200
+    assert transport._async_clients == {}
+
+
+@pytest.mark.enable_socket
+def test_http2_transport_negotiates_http2():
+    pytest.importorskip("httpx")
+    hypercorn = pytest.importorskip("hypercorn.asyncio")
+    from hypercorn.config import Config
+
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is not installed")
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"image/png")],
+            }
+        )
+        await send({"type": "http.response.body", "body": b"png"})
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    with tempfile.TemporaryDirectory() as directory:
+        config = Config()
+        config.bind = [f"127.0.0.1:{port}"]
+        config.certfile, config.keyfile = _self_signed_certificate(directory)
+        config.alpn_protocols = ["h2", "http/1.1"]
+        config.loglevel = "WARNING"
+
+        loop = asyncio.new_event_loop()
+        shutdown = asyncio.Event()
+        server = threading.Thread(
+            target=loop.run_until_complete,
+            args=(
+                hypercorn.serve(app, config, shutdown_trigger=shutdown.wait),
+            ),
+            daemon=True,
+        )
+        server.start()
+        _wait_for_port(port)
+
+        transport = Http2Transport(verify=False)
+        url = f"https://127.0.0.1:{port}/"
+
+        async def arequest():
+            try:
+                return await transport.arequest("GET", url)
+            finally:
+                await transport.aclose()
+
+        try:
+            response = transport.request("GET", url)
+            async_response = asyncio.run(arequest())
+        finally:
+            transport.close()
+            loop.call_soon_threadsafe(shutdown.set)
+            server.join(5)
+
+    assert not server.is_alive()
+
+    assert response.status_code == 200
+    assert response.http_version == "HTTP/2"
+    assert async_response.content == b"png"
+    assert async_response.http_version == "HTTP/2"
+
+
+@pytest.mark.enable_socket
+def test_http2_transport_raises_requests_exceptions():
+    pytest.importorskip("httpx")
+    transport = Http2Transport()
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        transport.request("GET", "http://127.0.0.1:1/", timeout=1)
+
+
+# Test Transport.warm_up() and UrlboxClient.warm_up()
+def test_warm_up_without_connection_pool():
+    transport = InMemoryTransport()
+
+    assert (
+        UrlboxClient(api_key=fake.pystr(), transport=transport).warm_up(4) == 0
+    )
+
+
+@pytest.mark.enable_socket
+@pytest.mark.parametrize(
+    "transport",
+    [RequestsTransport(pool_maxsize=4), Urllib3Transport(maxsize=4)],
+)
+def test_warm_up_opens_pooled_connections(transport):
+    api_key = fake.pystr()
+
+    with FakeUrlboxServer(api_key=api_key) as server, transport:
+        urlbox_client = UrlboxClient(
+            api_key=api_key,
+            api_host_name=server.api_host_name,
+            transport=transport,
+        )
+
+        # Capped at the connections the pool keeps per host.
+        assert urlbox_client.warm_up(8) == 4
+        assert urlbox_client.warm_up(8) == 0
+        assert not server.requests
+
+        pool = _pool(transport, urlbox_client.base_api_url)
+
+        for _ in range(4):
+            assert urlbox_client.get({"url": fake.url()}).ok
+
+        assert pool.num_connections == 4
+
+
+@pytest.mark.enable_socket
+def test_warm_up_reopens_dropped_connections():
+    api_key = fake.pystr()
+
+    with FakeUrlboxServer(api_key=api_key) as server:
+        with RequestsTransport() as transport:
+            urlbox_client = UrlboxClient(
+                api_key=api_key,
+                api_host_name=server.api_host_name,
+                transport=transport,
+            )
+
+            assert urlbox_client.warm_up(2) == 2
+
+            for connection in list(
+                _pool(transport, urlbox_client.base_api_url).pool.queue
+            ):
+                if connection is not None:
+                    connection.sock.shutdown(socket.SHUT_RDWR)
+
+            assert urlbox_client.warm_up(2) == 2
+
+
+@pytest.mark.enable_socket
+def test_warm_up_raises_requests_exceptions():
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), api_host_name="http://127.0.0.1:1"
+    )
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        urlbox_client.warm_up(1)
+
+
+@pytest.mark.enable_socket
+def test_keep_warm_until_closed():
+    api_key = fake.pystr()
+    warm_ups = []
+
+    with FakeUrlboxServer(api_key=api_key) as server:
+        urlbox_client = UrlboxClient(
+            api_key=api_key, api_host_name=server.api_host_name
+        )
+        warm_up = urlbox_client.warm_up
+        urlbox_client.warm_up = lambda n: warm_ups.append(warm_up(n))
+
+        urlbox_client.keep_warm(2, interval=0.01)
+
+        with pytest.raises(RuntimeError):
+            urlbox_client.keep_warm()
+
+        time.sleep(0.2)
+        urlbox_client.close()
+        calls = len(warm_ups)
+        time.sleep(0.05)
+
+    assert warm_ups[0] == 2
+    assert calls > 2 and not any(warm_ups[1:])
+    assert len(warm_ups) == calls
+
+
+def _pool(transport, url):
+    if isinstance(transport, Urllib3Transport):
+        return transport.pool_manager.connection_from_url(url)
+
+    return transport._connection_pool(url)
+
+
+def _self_signed_certificate(directory):
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-keyout",
+            keyfile,
+            "-out",
+            certfile,
+            "-days",
+            "1",
+            "-subj",
+            "/CN=127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+    return certfile, keyfile
+
+
+def _wait_for_port(port, timeout=5):
+    deadline = time.monotonic() + timeout
+
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+
+            time.sleep(0.05)
@@ -1,13 +1,19 @@
 from faker import Faker
 from hashlib import sha1
-from urlbox import InvalidUrlException, UrlboxClient
+from urlbox import InvalidUrlException, RenderResult, UrlboxClient
+from urlbox.testing import FakeUrlboxServer
+from urlbox.transports import InMemoryTransport, Urllib3Transport
+import concurrent.futures
 import json
 import hmac
 import pytest
 import random
 import requests
 import requests_mock
+import threading
+import time
 import urllib.parse
+import urllib3
 import warnings
 
 
@@ -381,6 +387,18 @@ def test_get_with_different_host_name():
             assert isinstance(response.content, bytes)
 
 
+def test_api_host_name_with_scheme():
+    api_key = fake.pystr()
+    urlbox_client = UrlboxClient(
+        api_key=api_key, api_host_name="http://127.0.0.1:8080/"
+    )
+
+    assert urlbox_client.base_api_url == "http://127.0.0.1:8080/"
+    assert urlbox_client.generate_url({"url": "example.com"}).startswith(
+        f"http://127.0.0.1:8080/{api_key}/png?"
+    )
+
+
 def test_get_successful_with_html_not_url():
     api_key = fake.pystr()
 
@@ -443,6 +461,55 @@ def test_get_unsuccessful_without_html_not_url():
     )
 
 
+def test_get_negotiates_compression_for_text_formats():
+    transport = InMemoryTransport()
+    urlbox_client = UrlboxClient(api_key=fake.pystr(), transport=transport)
+
+    for format in ["html", "svg", "png", "pdf"]:
+        urlbox_client.get({"url": fake.url(), "format": format})
+
+    accept_encodings = [
+        headers["Accept-Encoding"] for _, _, headers, _ in transport.requests
+    ]
+
+    assert accept_encodings[:2] == [urllib3.util.request.ACCEPT_ENCODING] * 2
+    assert accept_encodings[2:] == ["identity"] * 2
+
+
+@pytest.mark.enable_socket
+@pytest.mark.parametrize("transport", [None, Urllib3Transport()])
+def test_get_decompresses_text_formats_while_streaming(tmp_path, transport):
+    api_key = fake.pystr()
+    destination = tmp_path / "render.html"
+
+    with FakeUrlboxServer(api_key=api_key, image_size=100_000) as server:
+        urlbox_client = UrlboxClient(
+            api_key=api_key,
+            api_host_name=server.api_host_name,
+            transport=transport,
+        )
+        options = {"url": fake.url(), "format": "html"}
+
+        result = urlbox_client.get(options, lean=True, destination=destination)
+        in_memory = urlbox_client.get(options, lean=True)
+        png = urlbox_client.get({"url": fake.url()}, lean=True)
+
+        with urlbox_client.get(options, stream=True) as response:
+            chunks = list(response.iter_content(4096))
+            wire_bytes = RenderResult.wire_bytes_read(response)
+
+    body = server.render_body(options, "html")
+
+    assert destination.read_bytes() == body
+    assert result.decoded_bytes == len(body)
+    assert result.wire_bytes < len(body) / 5
+    assert in_memory.content == body
+    assert in_memory.wire_bytes == result.wire_bytes
+    assert png.wire_bytes == png.decoded_bytes == 100_000
+    assert b"".join(chunks) == body
+    assert wire_bytes == result.wire_bytes
+
+
 # DELETE
 def test_delete_request():
     api_key = fake.pystr()
@@ -750,3 +817,207 @@ def test_get_successful_as_str_with_api_secret():
     assert isinstance(urlbox_url, str)
     # It doesn't leak the api_secret (uses the tokenised options instead)
     assert api_secret not in urlbox_url
+
+
+def _blocking_transport(release):
+    def handler(method, url, headers, json):
+        release.wait(5)
+        return 200, {}, b"screenshot"
+
+    return InMemoryTransport(handler)
+
+
+# Test submit()
+def test_submit_returns_future_of_response():
+    with UrlboxClient(
+        api_key=fake.pystr(), transport=InMemoryTransport(body=b"screenshot")
+    ) as urlbox_client:
+        future = urlbox_client.submit({"url": fake.url()})
+
+        assert isinstance(future, concurrent.futures.Future)
+        assert future.result(5).content == b"screenshot"
+
+
+def test_submit_supports_as_completed_and_callbacks():
+    completed = []
+
+    with UrlboxClient(
+        api_key=fake.pystr(), transport=InMemoryTransport(body=b"screenshot")
+    ) as urlbox_client:
+        futures = [
+            urlbox_client.submit(
+                {"url": fake.url()}, callback=completed.append
+            )
+            for _ in range(10)
+        ]
+
+        results = [
+            future.result()
+            for future in concurrent.futures.as_completed(futures, timeout=5)
+        ]
+
+    assert len(results) == 10
+    assert sorted(map(id, completed)) == sorted(map(id, futures))
+
+
+def test_submit_other_methods():
+    transport = InMemoryTransport()
+
+    with UrlboxClient(
+        api_key=fake.pystr(), api_secret=fake.pystr(), transport=transport
+    ) as urlbox_client:
+        urlbox_client.submit({"url": fake.url()}, method="head").result(5)
+        urlbox_client.submit({"url": fake.url()}, method="delete").result(5)
+
+        with pytest.raises(ValueError):
+            urlbox_client.submit({"url": fake.url()}, method="patch")
+
+    assert [request[0] for request in transport.requests] == [
+        "HEAD",
+        "DELETE",
+    ]
+
+
+def test_submit_applies_backpressure():
+    release = threading.Event()
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(),
+        transport=_blocking_transport(release),
+        max_workers=1,
+        max_pending=2,
+    )
+
+    urlbox_client.submit({"url": fake.url()})
+    urlbox_client.submit({"url": fake.url()})
+
+    with pytest.raises(TimeoutError):
+        urlbox_client.submit({"url": fake.url()}, timeout=0.05)
+
+    release.set()
+    urlbox_client.close()
+
+
+def test_cancelled_submit_frees_queue():
+    release = threading.Event()
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(),
+        transport=_blocking_transport(release),
+        max_workers=1,
+        max_pending=2,
+    )
+
+    urlbox_client.submit({"url": fake.url()})
+    queued = urlbox_client.submit({"url": fake.url()})
+
+    assert queued.cancel()
+
+    urlbox_client.submit({"url": fake.url()}, timeout=1)
+    release.set()
+    urlbox_client.close()
+
+
+def test_submit_errors_are_set_on_future():
+    with UrlboxClient(
+        api_key=fake.pystr(), transport=InMemoryTransport()
+    ) as urlbox_client:
+        future = urlbox_client.submit({"format": "png"})
+
+        with pytest.raises(KeyError):
+            future.result(5)
+
+
+# Test delete_many
+def test_delete_many_expands_formats():
+    transport = InMemoryTransport()
+    urlbox_client = UrlboxClient(api_key=fake.pystr(), transport=transport)
+    urls = [fake.url() for _ in range(10)]
+
+    summary = urlbox_client.delete_many(
+        ({"url": url} for url in urls), formats=["png", "pdf"]
+    )
+
+    assert summary["deleted"] == 20
+    assert summary["failed"] == 0
+    assert [item["options"]["format"] for item in summary["items"]] == [
+        "png",
+        "pdf",
+    ] * 10
+    assert sorted(url for _, url, _, _ in transport.requests) == sorted(
+        f"{urlbox_client.base_api_url}{urlbox_client.api_key}/{format}"
+        f"?url={urllib.parse.quote(url, safe='')}&format={format}"
+        for url in urls
+        for format in ("png", "pdf")
+    )
+    assert {method for method, _, _, _ in transport.requests} == {"DELETE"}
+
+
+def test_delete_many_reports_failures_per_item():
+    def handler(method, url, headers, json):
+        return (500 if "fail" in url else 200), {}, b""
+
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), transport=InMemoryTransport(handler)
+    )
+
+    summary = urlbox_client.delete_many(
+        [
+            {"url": "http://example.com/ok"},
+            {"url": "http://example.com/fail"},
+            {"format": "png"},
+        ]
+    )
+
+    assert summary["deleted"] == 1
+    assert summary["failed"] == 2
+    assert [item["status_code"] for item in summary["items"]] == [
+        200,
+        500,
+        None,
+    ]
+    assert isinstance(summary["items"][2]["error"], KeyError)
+
+
+def test_delete_many_runs_concurrently():
+    release = threading.Event()
+    in_flight = []
+
+    def handler(method, url, headers, json):
+        in_flight.append(url)
+        release.wait(5)
+        return 200, {}, b""
+
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), transport=InMemoryTransport(handler)
+    )
+    thread = threading.Thread(
+        target=urlbox_client.delete_many,
+        args=([{"url": fake.url()} for _ in range(8)],),
+        kwargs={"max_workers": 4},
+    )
+    thread.start()
+
+    deadline = time.monotonic() + 5
+
+    while len(in_flight) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    time.sleep(0.05)
+
+    assert len(in_flight) == 4
+
+    release.set()
+    thread.join()
+
+
+def test_delete_many_rate_limit():
+    urlbox_client = UrlboxClient(
+        api_key=fake.pystr(), transport=InMemoryTransport()
+    )
+    started_at = time.monotonic()
+
+    summary = urlbox_client.delete_many(
+        [{"url": fake.url()} for _ in range(6)], rate_limit=50
+    )
+
+    assert summary["deleted"] == 6
+    assert time.monotonic() - started_at > 0.08
@@ -0,0 +1,224 @@
+from faker import Faker
+from urlbox import (
+    NoHealthyEndpointError,
+    RenderResult,
+    RenderStore,
+    UrlboxClient,
+    UrlboxEndpoint,
+    UrlboxPoolClient,
+)
+import pytest
+import requests
+import requests_mock
+
+
+fake = Faker()
+
+
+def _endpoints(count, **kwargs):
+    return [
+        UrlboxEndpoint(
+            api_key=fake.pystr(),
+            api_secret=fake.pystr(),
+            api_host_name=f"render{i}.example.com",
+            **kwargs,
+        )
+        for i in range(count)
+    ]
+
+
+# test_init()
+def test_pool_requires_endpoints():
+    with pytest.raises(ValueError):
+        UrlboxPoolClient([])
+
+
+def test_pool_rejects_unknown_strategy():
+    with pytest.raises(ValueError):
+        UrlboxPoolClient(_endpoints(1), strategy="random")
+
+
+# Test get()
+def test_get_signs_request_with_selected_endpoint_secret():
+    endpoints = _endpoints(2)
+    urlbox_pool_client = UrlboxPoolClient(
+        endpoints, strategy=UrlboxPoolClient.WEIGHTED_ROUND_ROBIN
+    )
+    options = {"url": fake.url()}
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(requests_mock.ANY, content=b"screenshot")
+
+        urlbox_pool_client.get(options)
+        urlbox_pool_client.get(options)
+
+        requested_urls = [r.url for r in requests_mocker.request_history]
+
+    for endpoint in endpoints:
+        assert endpoint.client.generate_url(options) in requested_urls
+
+
+def test_weighted_round_robin_respects_weights():
+    light, heavy = _endpoints(2)
+    heavy.weight = 3
+    urlbox_pool_client = UrlboxPoolClient(
+        [light, heavy], strategy=UrlboxPoolClient.WEIGHTED_ROUND_ROBIN
+    )
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(requests_mock.ANY, content=b"screenshot")
+
+        for _ in range(8):
+            urlbox_pool_client.get({"url": fake.url()})
+
+        hosts = [r.hostname for r in requests_mocker.request_history]
+
+    assert hosts.count("render0.example.com") == 2
+    assert hosts.count("render1.example.com") == 6
+
+
+def test_least_outstanding_prefers_idle_endpoint():
+    busy, idle = _endpoints(2)
+    busy.outstanding = 5
+    urlbox_pool_client = UrlboxPoolClient([busy, idle])
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(requests_mock.ANY, content=b"screenshot")
+
+        urlbox_pool_client.get({"url": fake.url()})
+
+        assert requests_mocker.last_request.hostname == "render1.example.com"
+
+
+# Test failover
+def test_endpoint_ejected_after_consecutive_failures():
+    failing, healthy = _endpoints(2)
+    urlbox_pool_client = UrlboxPoolClient(
+        [failing, healthy],
+        strategy=UrlboxPoolClient.WEIGHTED_ROUND_ROBIN,
+        max_consecutive_failures=2,
+    )
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(
+            requests_mock.ANY, status_code=200, content=b"screenshot"
+        )
+        requests_mocker.register_uri(
+            "GET",
+            requests_mock.ANY,
+            additional_matcher=lambda r: r.hostname == "render0.example.com",
+            status_code=503,
+        )
+
+        for _ in range(4):
+            urlbox_pool_client.get({"url": fake.url()})
+
+        assert failing.ejected
+        assert not healthy.ejected
+
+        requests_mocker.reset_mock()
+
+        for _ in range(3):
+            urlbox_pool_client.get({"url": fake.url()})
+
+        hosts = {r.hostname for r in requests_mocker.request_history}
+
+    assert hosts == {"render1.example.com"}
+
+
+def test_ejected_endpoint_probed_after_ejection_period():
+    (endpoint,) = _endpoints(1)
+    urlbox_pool_client = UrlboxPoolClient(
+        [endpoint], max_consecutive_failures=1, ejection_seconds=0
+    )
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(requests_mock.ANY, status_code=500)
+        urlbox_pool_client.get({"url": fake.url()})
+
+        assert endpoint.ejected
+
+        requests_mocker.get(requests_mock.ANY, content=b"screenshot")
+        response = urlbox_pool_client.get({"url": fake.url()})
+
+    assert response.status_code == 200
+    assert not endpoint.ejected
+    assert endpoint.consecutive_failures == 0
+
+
+def test_connection_errors_count_as_failures():
+    (endpoint,) = _endpoints(1)
+    urlbox_pool_client = UrlboxPoolClient(
+        [endpoint], max_consecutive_failures=1, ejection_seconds=60
+    )
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(
+            requests_mock.ANY, exc=requests.exceptions.ConnectTimeout
+        )
+
+        with pytest.raises(requests.exceptions.ConnectTimeout):
+            urlbox_pool_client.get({"url": fake.url()})
+
+    with pytest.raises(NoHealthyEndpointError):
+        urlbox_pool_client.get({"url": fake.url()})
+
+
+def test_invalid_options_do_not_count_as_failures():
+    (endpoint,) = _endpoints(1)
+    urlbox_pool_client = UrlboxPoolClient(
+        [endpoint], max_consecutive_failures=1
+    )
+
+    with pytest.raises(KeyError):
+        urlbox_pool_client.get({"format": "png"})
+
+    assert not endpoint.ejected
+    assert endpoint.outstanding == 0
+
+
+def test_get_forwards_arguments(tmp_path):
+    urlbox_pool_client = UrlboxPoolClient(_endpoints(2))
+    destination = tmp_path / "render.png"
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(requests_mock.ANY, content=b"screenshot")
+
+        result = urlbox_pool_client.get(
+            {"url": fake.url()}, lean=True, destination=destination
+        )
+
+    assert isinstance(result, RenderResult)
+    assert result.file_path == str(destination)
+    assert destination.read_bytes() == b"screenshot"
+
+
+def test_render_store_with_pool_client(tmp_path):
+    urlbox_pool_client = UrlboxPoolClient(_endpoints(2))
+    options = {"url": fake.url()}
+
+    with requests_mock.Mocker() as requests_mocker:
+        requests_mocker.get(requests_mock.ANY, content=b"screenshot")
+
+        with RenderStore(urlbox_pool_client, str(tmp_path)) as store:
+            first = store.get(options)
+            second = store.get(options)
+
+        request_count = requests_mocker.call_count
+
+    assert first.ok
+    assert open(first.file_path, "rb").read() == b"screenshot"
+    assert second.file_path == first.file_path
+    assert request_count == 1
+
+
+# Test generate_url()
+def test_generate_url_uses_pool_endpoint():
+    (endpoint,) = _endpoints(1)
+    urlbox_pool_client = UrlboxPoolClient([endpoint])
+    options = {"url": fake.url()}
+
+    assert urlbox_pool_client.generate_url(
+        options
+    ) == endpoint.client.generate_url(options)
+    assert isinstance(endpoint.client, UrlboxClient)
@@ -0,0 +1,270 @@
+from faker import Faker
+from tests.helpers import WEBHOOK_SECRET, sign_webhook, webhook_payload
+from urlbox import InvalidHeaderSignatureError, WebhookEventLog
+import concurrent.futures
+import os
+import pytest
+
+
+fake = Faker()
+
+
+@pytest.fixture
+def event_log(tmp_path):
+    with WebhookEventLog(
+        tmp_path / "events", webhook_secret=WEBHOOK_SECRET, segment_bytes=2048
+    ) as event_log:
+        yield event_log
+
+
+def _segments(event_log):
+    return sorted(
+        name
+        for name in os.listdir(event_log.directory)
+        if name.endswith(".log")
+    )
+
+
+# Test WebhookEventLog.record and get
+def test_record_verified_payload(event_log):
+    render_id = fake.uuid4()
+    payload = webhook_payload(render_id)
+
+    assert event_log.record(sign_webhook(payload), payload) == 1
+    assert event_log.get(render_id) == payload
+    assert render_id in event_log
+    assert len(event_log) == 1
+
+
+def test_record_rejects_invalid_signature(event_log):
+    payload = webhook_payload(fake.uuid4())
+
+    with pytest.raises(InvalidHeaderSignatureError):
+        event_log.record(sign_webhook(payload, "wrong_secret"), payload)
+
+    assert len(event_log) == 0
+    assert list(event_log.replay()) == []
+
+
+def test_get_returns_latest_event(event_log):
+    render_id = fake.uuid4()
+    event_log.append(webhook_payload(render_id, "render.failed"))
+    succeeded = webhook_payload(render_id)
+    event_log.append(succeeded)
+
+    assert event_log.get(render_id) == succeeded
+    assert event_log.get(fake.uuid4()) is None
+    assert len(event_log) == 1
+
+
+def test_index_grows(event_log):
+    payloads = [webhook_payload(fake.uuid4()) for _ in range(1500)]
+
+    for payload in payloads:
+        event_log.append(payload)
+
+    assert len(event_log) == 1500
+    assert all(
+        event_log.get(payload["renderId"]) == payload for payload in payloads
+    )
+
+
+def test_segments_rotate(event_log):
+    payloads = [webhook_payload(fake.uuid4()) for _ in range(50)]
+
+    for payload in payloads:
+        event_log.append(payload)
+
+    assert len(_segments(event_log)) > 1
+    assert all(
+        os.path.getsize(os.path.join(event_log.directory, name)) <= 2048
+        for name in _segments(event_log)
+    )
+    assert event_log.get(payloads[0]["renderId"]) == payloads[0]
+
+
+def test_concurrent_appends(event_log):
+    payloads = [webhook_payload(fake.uuid4()) for _ in range(200)]
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        sequences = list(executor.map(event_log.append, payloads))
+
+    assert sorted(sequences) == list(range(1, 201))
+    assert [sequence for sequence, _ in event_log.replay()] == list(
+        range(1, 201)
+    )
+    assert all(
+        event_log.get(payload["renderId"]) == payload for payload in payloads
+    )
+
+
+# Test WebhookEventLog.replay
+def test_replay_in_order_after_sequence(event_log):
+    payloads = [webhook_payload(fake.uuid4()) for _ in range(50)]
+
+    for payload in payloads:
+        event_log.append(payload)
+
+    assert [payload for _, payload in event_log.replay()] == payloads
+    assert [payload for _, payload in event_log.replay(after=37)] == payloads[
+        37:
+    ]
+    assert list(event_log.replay(after=50)) == []
+
+
+def test_replay_includes_events_recorded_while_replaying(event_log):
+    for _ in range(20):
+        event_log.append(webhook_payload(fake.uuid4()))
+
+    replayed = 0
+
+    for sequence, _ in event_log.replay():
+        replayed += 1
+
+        if sequence <= 20:
+            event_log.append(webhook_payload(fake.uuid4()))
+
+    assert replayed == 40
+
+
+# Test WebhookEventLog.compact
+def test_compact_keeps_latest_event_per_render(event_log):
+    render_ids = [fake.uuid4() for _ in range(10)]
+
+    for render_id in render_ids:
+        event_log.append(webhook_payload(render_id, "render.failed"))
+
+    no_render_id = {"event": "render.ping"}
+    event_log.append(no_render_id)
+    latest = {
+        render_id: webhook_payload(render_id) for render_id in render_ids
+    }
+
+    for payload in latest.values():
+        event_log.append(payload)
+
+    size = sum(
+        os.path.getsize(os.path.join(event_log.directory, name))
+        for name in _segments(event_log)
+    )
+
+    stats = event_log.compact()
+
+    assert stats["events_removed"] == 10
+    assert stats["bytes_reclaimed"] == size - sum(
+        os.path.getsize(os.path.join(event_log.directory, name))
+        for name in _segments(event_log)
+    )
+    assert [payload for _, payload in event_log.replay()] == [
+        no_render_id
+    ] + list(latest.values())
+    assert all(
+        event_log.get(render_id) == payload
+        for render_id, payload in latest.items()
+    )
+    assert event_log.compact() == {"events_removed": 0, "bytes_reclaimed": 0}
+
+
+def test_replay_after_compaction_keeps_sequences(event_log):
+    render_id = fake.uuid4()
+
+    for _ in range(30):
+        event_log.append(webhook_payload(render_id, "render.failed"))
+
+    last = webhook_payload(render_id)
+    sequence = event_log.append(last)
+    event_log.compact()
+    replayed = list(event_log.replay(after=10))
+    sequences = [sequence for sequence, _ in replayed]
+
+    # Only the segment being written to still holds superseded events.
+    assert len(replayed) < 21
+    assert sequences == sorted(sequences)
+    assert sequences[0] > 10
+    assert replayed[-1] == (sequence, last)
+
+
+def test_compact_after_reopen(tmp_path):
+    directory = tmp_path / "events"
+    render_id = fake.uuid4()
+
+    with WebhookEventLog(
+        directory, webhook_secret=WEBHOOK_SECRET, segment_bytes=2048
+    ) as event_log:
+        for _ in range(30):
+            event_log.append(webhook_payload(render_id, "render.failed"))
+
+        latest = webhook_payload(fake.uuid4())
+        event_log.append(latest)
+
+    # Nothing is read from the sealed segments before compacting them.
+    with WebhookEventLog(
+        directory, webhook_secret=WEBHOOK_SECRET, segment_bytes=2048
+    ) as event_log:
+        stats = event_log.compact()
+
+        assert stats["events_removed"] > 0
+        assert event_log.get(render_id)["event"] == "render.failed"
+        assert not [
+            name for name in os.listdir(directory) if name.endswith(".partial")
+        ]
+
+
+def test_failed_compaction_removes_partial_segment(event_log, monkeypatch):
+    render_id = fake.uuid4()
+
+    for _ in range(15):
+        event_log.append(webhook_payload(render_id, "render.failed"))
+        event_log.append(webhook_payload(fake.uuid4()))
+
+    def replace(source, destination):
+        raise OSError("Disk full")
+
+    monkeypatch.setattr(os, "replace", replace)
+
+    with pytest.raises(OSError):
+        event_log.compact()
+
+    assert not [
+        name
+        for name in os.listdir(event_log.directory)
+        if name.endswith(".partial")
+    ]
+    assert len(list(event_log.replay())) == 30
+
+
+# Test reopening
+def test_reopen_uses_clean_index(tmp_path, event_log):
+    payloads = [webhook_payload(fake.uuid4()) for _ in range(30)]
+
+    for payload in payloads:
+        event_log.append(payload)
+
+    event_log.close()
+
+    with WebhookEventLog(
+        event_log.directory, webhook_secret=WEBHOOK_SECRET
+    ) as reopened:
+        assert len(reopened) == 30
+        assert reopened.get(payloads[0]["renderId"]) == payloads[0]
+        assert reopened.append(webhook_payload(fake.uuid4())) == 31
+
+
+def test_reopen_after_crash_rebuilds_index_and_drops_torn_record(tmp_path):
+    directory = tmp_path / "events"
+    event_log = WebhookEventLog(directory, webhook_secret=WEBHOOK_SECRET)
+    payloads = [webhook_payload(fake.uuid4()) for _ in range(5)]
+
+    for payload in payloads:
+        event_log.append(payload)
+
+    # Crash: the index is never marked clean and the last write is torn.
+    segment = os.path.join(directory, _segments(event_log)[-1])
+    os.truncate(segment, os.path.getsize(segment) - 3)
+
+    with WebhookEventLog(directory, webhook_secret=WEBHOOK_SECRET) as reopened:
+        assert len(reopened) == 4
+        assert reopened.get(payloads[4]["renderId"]) is None
+        assert reopened.get(payloads[3]["renderId"]) == payloads[3]
+        assert reopened.append(payloads[4]) == 5
+        assert [payload for _, payload in reopened.replay()] == payloads
@@ -1,4 +1,26 @@
+from urlbox.adaptive_concurrency_limiter import AdaptiveConcurrencyLimiter
+from urlbox.bloom_filter import BloomFilter
+from urlbox.change_monitor import ChangeMonitor
+from urlbox.circuit_breaker import CircuitBreaker
+from urlbox.circuit_open_error import CircuitOpenError
+from urlbox.conditional_renderer import ConditionalRenderer
+from urlbox.dns_cache import DnsCache
 from urlbox.invalid_header_signature_error import InvalidHeaderSignatureError
+from urlbox.invalid_options_error import InvalidOptionsError
 from urlbox.invalid_url_exception import InvalidUrlException
+from urlbox.latency_histogram import LatencyHistogram
+from urlbox.no_healthy_endpoint_error import NoHealthyEndpointError
+from urlbox.option_schema import OptionSchema
+from urlbox.rate_limiter import RateLimiter
+from urlbox.render_budget_exceeded_error import RenderBudgetExceededError
+from urlbox.render_correlator import RenderCorrelator
+from urlbox.render_result import RenderResult
+from urlbox.render_scheduler import RenderScheduler
+from urlbox.render_store import RenderStore
+from urlbox.request_hedger import RequestHedger
+from urlbox.shared_rate_limiter import SharedRateLimiter
+from urlbox.sitemap_reader import SitemapReader
 from urlbox.urlbox_client import UrlboxClient
+from urlbox.urlbox_pool_client import UrlboxEndpoint, UrlboxPoolClient
+from urlbox.webhook_event_log import WebhookEventLog
 
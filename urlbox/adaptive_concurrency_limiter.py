@@ -0,0 +1,226 @@
+import collections
+import concurrent.futures
+import threading
+import time
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+        Limits the number of requests in flight, adapting the limit AIMD-style
+        (additive increase, multiplicative decrease) to how the API copes.
+
+        Every healthy response grows the limit by increase_by / limit, so the
+        limit grows by about increase_by for each full window of requests.
+        A 429 or 5xx response, an exception or a latency spike shrinks the
+        limit by decrease_factor. Responses to requests started before the last
+        decrease are not counted again, so one burst of errors only backs off
+        once.
+
+        Latency spikes only count as overload when asked for, as render times
+        vary a lot from page to page: a spike is a response slower than
+        latency_threshold_seconds or, when latency_tolerance is set, slower
+        than latency_tolerance times the moving average of the latencies of
+        successful responses. Spikes are added to that average too, so it
+        follows a lasting change in latency rather than backing off forever.
+
+        :param initial_limit: (Optional) requests allowed in flight to begin with. Defaults to 4.
+
+        :param min_limit: (Optional) the limit never drops below this. Defaults to 1.
+
+        :param max_limit: (Optional) the limit never grows above this. Defaults to 64.
+
+        :param increase_by: (Optional) growth of the limit per full window of healthy requests. Defaults to 1.
+
+        :param decrease_factor: (Optional) the limit is multiplied by this on overload. Defaults to 0.5.
+
+        :param latency_threshold_seconds: (Optional) absolute latency treated as a spike. Defaults to None.
+
+        :param latency_tolerance: (Optional) latency, relative to the moving average, treated as a spike, eg: 3. Defaults to None.
+
+        Example:
+        limiter = AdaptiveConcurrencyLimiter(max_limit=32)
+        for response in limiter.map(urlbox_client.get, options_list):
+            ...
+        limiter.limit  # the current concurrency limit
+    """
+
+    LATENCY_SMOOTHING = 0.1
+
+    def __init__(
+        self,
+        *,
+        initial_limit=4,
+        min_limit=1,
+        max_limit=64,
+        increase_by=1,
+        decrease_factor=0.5,
+        latency_threshold_seconds=None,
+        latency_tolerance=None,
+    ):
+        if not min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "initial_limit must be between min_limit and max_limit"
+            )
+
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_by = increase_by
+        self.decrease_factor = decrease_factor
+        self.latency_threshold_seconds = latency_threshold_seconds
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.successes_count = 0
+        self.overloads_count = 0
+        self._limit = float(initial_limit)
+        self._average_latency = None
+        self._last_decrease_at = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """
+            The current concurrency limit.
+        """
+
+        return int(self._limit)
+
+    def metrics(self):
+        """
+            Returns a dictionary describing the limiter, for monitoring.
+        """
+
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "average_latency": self._average_latency,
+                "successes_count": self.successes_count,
+                "overloads_count": self.overloads_count,
+            }
+
+    def acquire(self, timeout=None):
+        """
+            Blocks until a request may be sent and returns its start time,
+            to pass back to release(). Raises a TimeoutError if timeout seconds
+            elapse first.
+        """
+
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.in_flight < self.limit, timeout
+            ):
+                raise TimeoutError("Timed out waiting for a concurrency slot")
+
+            self.in_flight += 1
+
+        return time.monotonic()
+
+    def release(self, started_at, response=None, error=None):
+        """
+            Releases the slot taken by acquire() and adapts the limit to the
+            outcome of the request: its response, or the error it raised.
+        """
+
+        latency = time.monotonic() - started_at
+
+        with self._condition:
+            self.in_flight -= 1
+
+            failed = self._is_failure(response, error)
+            spiked = not failed and self._is_spike(latency)
+
+            if not failed:
+                self._record_latency(latency)
+
+            if failed or spiked:
+                self.overloads_count += 1
+
+                if started_at >= self._last_decrease_at:
+                    self._limit = max(
+                        self.min_limit, self._limit * self.decrease_factor
+                    )
+                    self._last_decrease_at = time.monotonic()
+            else:
+                self.successes_count += 1
+                self._limit = min(
+                    self.max_limit,
+                    self._limit + self.increase_by / self._limit,
+                )
+
+            self._condition.notify_all()
+
+    def call(self, func, *args, **kwargs):
+        """
+            Calls func(*args, **kwargs), eg: urlbox_client.get, within the limit.
+        """
+
+        return self._run_acquired(self.acquire(), func, *args, **kwargs)
+
+    def map(self, func, iterable):
+        """
+            Calls func on every item of iterable, eg: a list of options,
+            with as many calls in flight as the limit allows.
+
+            Results are yielded in the order of iterable. Items are only pulled
+            from iterable as slots free up, so it may be a lazy generator.
+        """
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_limit,
+            thread_name_prefix="urlbox-adaptive",
+        ) as executor:
+            futures = collections.deque()
+
+            for item in iterable:
+                while futures and futures[0].done():
+                    yield futures.popleft().result()
+
+                started_at = self.acquire()
+                futures.append(
+                    executor.submit(self._run_acquired, started_at, func, item)
+                )
+
+            while futures:
+                yield futures.popleft().result()
+
+    # private
+
+    def _run_acquired(self, started_at, func, *args, **kwargs):
+        try:
+            response = func(*args, **kwargs)
+        except Exception as error:
+            self.release(started_at, error=error)
+            raise
+
+        self.release(started_at, response=response)
+
+        return response
+
+    def _is_failure(self, response, error):
+        if error is not None:
+            return True
+
+        status_code = getattr(response, "status_code", 200)
+
+        return status_code == 429 or status_code >= 500
+
+    def _is_spike(self, latency):
+        if self.latency_threshold_seconds is not None:
+            return latency > self.latency_threshold_seconds
+
+        return (
+            self.latency_tolerance is not None
+            and self._average_latency is not None
+            and latency > self._average_latency * self.latency_tolerance
+        )
+
+    def _record_latency(self, latency):
+        if self._average_latency is None:
+            self._average_latency = latency
+        else:
+            self._average_latency += self.LATENCY_SMOOTHING * (
+                latency - self._average_latency
+            )
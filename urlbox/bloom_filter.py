@@ -0,0 +1,72 @@
+import math
+from hashlib import blake2b
+
+
+class BloomFilter:
+    """
+        A set of strings in a fixed amount of memory, whatever the number added.
+
+        Membership tests never miss an item that was added, but may wrongly
+        report an item that was not as present, with a probability of about
+        error_rate as long as no more than capacity items are added.
+        10 million URLs at a 0.1% error rate take about 18MB.
+
+        :param capacity: (Optional) number of items the filter is sized for. Defaults to 1,000,000.
+
+        :param error_rate: (Optional) false positive rate at capacity. Defaults to 0.001.
+
+        Example:
+        seen = BloomFilter(capacity=10_000_000)
+        if seen.add(url):
+            ...  # first time url was seen
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def __contains__(self, item):
+        return all(
+            self._bits[index >> 3] & (1 << (index & 7))
+            for index in self._indexes(item)
+        )
+
+    def __len__(self):
+        return self.count
+
+    def add(self, item):
+        """
+            Adds item and returns True, or returns False if it was already present.
+        """
+
+        added = False
+
+        for index in self._indexes(item):
+            if not self._bits[index >> 3] & (1 << (index & 7)):
+                self._bits[index >> 3] |= 1 << (index & 7)
+                added = True
+
+        self.count += added
+
+        return added
+
+    # private
+
+    def _indexes(self, item):
+        # Double hashing: k indexes from the two halves of a single digest.
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return (
+            (first + i * second) % self.size for i in range(self.hash_count)
+        )
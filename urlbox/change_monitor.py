@@ -0,0 +1,351 @@
+import concurrent.futures
+import io
+import math
+import mimetypes
+import os
+import sqlite3
+import threading
+import time
+from hashlib import sha1
+
+try:
+    import numpy
+    from PIL import Image
+except ImportError:
+    numpy = None
+
+_DCT_MATRICES = {}
+
+
+class ChangeMonitor:
+    """
+        Re-captures a set of pages on a schedule, keeping a render only when
+        the page visibly changed.
+
+        Every render is reduced to a 64 bit perceptual hash: the sign of the
+        low frequencies of its 2D discrete cosine transform, computed with two
+        NumPy matrix products. Renders whose hash is within threshold bits of
+        the previous one are visually the same page and are discarded.
+
+        Each page's re-capture interval adapts to how often it actually
+        changes: it halves when a change is found and grows by
+        interval_growth when not, between min_interval and max_interval.
+        Hashes and schedules are kept in a SQLite index, so the monitor can
+        be run from cron and pick up where it left off.
+        Requires NumPy and Pillow: pip install "urlbox[monitor]"
+
+        :param client: the UrlboxClient (or UrlboxPoolClient) to render with.
+
+        :param index_path: path of the SQLite index, created if needed.
+
+        :param output_dir: directory changed renders are saved in.
+
+        :param options: (Optional) options passed with every render, eg: {"full_page": True}.
+
+        :param threshold: (Optional) hash bits that must differ for a render to count as changed. Defaults to 6.
+
+        :param initial_interval: (Optional) seconds between the first captures of a page. Defaults to 1 day.
+
+        :param min_interval: (Optional) Defaults to 1 hour.
+
+        :param max_interval: (Optional) Defaults to 30 days.
+
+        :param interval_growth: (Optional) factor the interval grows by when a page is unchanged. Defaults to 1.5.
+
+        Example:
+        monitor = ChangeMonitor(urlbox_client, "monitor.sqlite3", "renders/")
+        monitor.add(urls)
+        for result in monitor.run(max_workers=16):
+            if result["changed"]:
+                print(result["url"], result["file_path"])
+    """
+
+    DEFAULT_INTERVAL = 24 * 60 * 60
+
+    def __init__(
+        self,
+        client,
+        index_path,
+        output_dir,
+        *,
+        options=None,
+        threshold=6,
+        initial_interval=DEFAULT_INTERVAL,
+        min_interval=60 * 60,
+        max_interval=30 * DEFAULT_INTERVAL,
+        interval_growth=1.5,
+    ):
+        if numpy is None:
+            raise ImportError(
+                'ChangeMonitor requires NumPy and Pillow: pip install "urlbox[monitor]"'
+            )
+
+        self.client = client
+        self.output_dir = output_dir
+        self.options = dict(options or {})
+        self.threshold = threshold
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval_growth = interval_growth
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(index_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, hash BLOB, interval REAL, next_check REAL, "
+            "checks INTEGER DEFAULT 0, changes INTEGER DEFAULT 0, file_path TEXT)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS pages_next_check ON pages (next_check)"
+        )
+        self._db.commit()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, urls, now=None):
+        """
+            Starts monitoring urls, due for capture straight away.
+            URLs already monitored keep their schedule.
+        """
+
+        now = time.time() if now is None else now
+
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO pages (url, interval, next_check) "
+                "VALUES (?, ?, ?)",
+                ((url, self.initial_interval, now) for url in urls),
+            )
+
+    def remove(self, urls):
+        with self._lock, self._db:
+            self._db.executemany(
+                "DELETE FROM pages WHERE url = ?", ((url,) for url in urls)
+            )
+
+    def due(self, now=None, limit=None):
+        """
+            Returns the URLs due for capture, most overdue first.
+        """
+
+        now = time.time() if now is None else now
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url FROM pages WHERE next_check <= ? "
+                "ORDER BY next_check LIMIT ?",
+                (now, -1 if limit is None else limit),
+            ).fetchall()
+
+        return [url for url, in rows]
+
+    def page(self, url):
+        """
+            Returns the schedule and statistics of a monitored URL, or None.
+        """
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT interval, next_check, checks, changes, file_path "
+                "FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        interval, next_check, checks, changes, file_path = row
+
+        return {
+            "url": url,
+            "interval": interval,
+            "next_check": next_check,
+            "checks": checks,
+            "changes": changes,
+            "file_path": file_path,
+        }
+
+    def check(self, url, now=None):
+        """
+            Renders url, compares it with the previous render and reschedules it.
+
+            Returns a dictionary with the "url", whether it "changed", the
+            hash "distance" from the previous render (None on the first one),
+            the "file_path" of the saved render and the "error", if the render
+            failed.
+        """
+
+        now = time.time() if now is None else now
+        result = {
+            "url": url,
+            "changed": False,
+            "distance": None,
+            "file_path": None,
+            "error": None,
+        }
+
+        try:
+            render = self.client.get({**self.options, "url": url}, lean=True)
+
+            if not render.ok:
+                raise RuntimeError(
+                    f"Render failed with status {render.status_code}"
+                )
+
+            hash = perceptual_hash(render.content)
+        except Exception as error:
+            result["error"] = error
+
+            # Retry failed renders soon, without touching the interval.
+            with self._lock, self._db:
+                self._db.execute(
+                    "UPDATE pages SET next_check = ? WHERE url = ?",
+                    (now + self.min_interval, url),
+                )
+
+            return result
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash, interval FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+        previous_hash, interval = row or (None, self.initial_interval)
+
+        if previous_hash is not None:
+            result["distance"] = hamming_distance(
+                hash, int.from_bytes(previous_hash, "big")
+            )
+
+        result["changed"] = (
+            result["distance"] is None or result["distance"] > self.threshold
+        )
+
+        if result["changed"]:
+            result["file_path"] = self._save(url, render, now)
+
+            if previous_hash is not None:
+                interval = max(self.min_interval, interval / 2)
+        else:
+            interval = min(self.max_interval, interval * self.interval_growth)
+
+        # An insert followed by an update, rather than an upsert, which needs
+        # SQLite 3.24.
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO pages (url) VALUES (?)", (url,)
+            )
+            self._db.execute(
+                "UPDATE pages SET hash = ?, interval = ?, next_check = ?, "
+                "checks = checks + 1, changes = changes + ?, "
+                "file_path = COALESCE(?, file_path) WHERE url = ?",
+                (
+                    hash.to_bytes(8, "big"),
+                    interval,
+                    now + interval,
+                    int(result["changed"] and previous_hash is not None),
+                    result["file_path"],
+                    url,
+                ),
+            )
+
+        return result
+
+    def run(self, now=None, limit=None, max_workers=8):
+        """
+            Checks every URL due, max_workers at a time, and returns the list
+            of check() results.
+
+            :param limit: (Optional) maximum number of URLs to check, most overdue first.
+        """
+
+        now = time.time() if now is None else now
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix="urlbox-monitor"
+        ) as executor:
+            return list(
+                executor.map(
+                    lambda url: self.check(url, now), self.due(now, limit)
+                )
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # private
+
+    def _save(self, url, render, now):
+        # Content types may carry parameters, eg: "; charset=utf-8", and
+        # do not always end in an extension, eg: image/svg+xml.
+        content_type = (render.content_type or "").split(";")[0].strip()
+        extension = (
+            mimetypes.guess_extension(content_type)
+            or f".{self.options.get('format', 'png')}"
+        )
+        file_path = os.path.join(
+            self.output_dir,
+            f"{sha1(url.encode()).hexdigest()}-{int(now)}{extension}",
+        )
+
+        with open(file_path, "wb") as file:
+            file.write(render.content)
+
+        return file_path
+
+
+def perceptual_hash(image, hash_size=8, resolution=32):
+    """
+        Returns the perceptual hash of an image, as an int of hash_size ** 2 bits.
+
+        The image is reduced to a resolution x resolution grayscale square,
+        transformed with a 2D DCT and each of the hash_size x hash_size lowest
+        frequencies becomes a bit: set when above their median. Similar looking
+        images get hashes a few bits apart, whatever their size or encoding.
+
+        :param image: the image, as bytes in any format Pillow can read.
+    """
+
+    if numpy is None:
+        raise ImportError(
+            'perceptual_hash requires NumPy and Pillow: pip install "urlbox[monitor]"'
+        )
+
+    with Image.open(io.BytesIO(image)) as decoded:
+        pixels = numpy.asarray(
+            decoded.convert("L").resize(
+                (resolution, resolution), Image.LANCZOS
+            ),
+            dtype=numpy.float64,
+        )
+
+    dct = _dct_matrix(resolution)[:hash_size]
+    frequencies = (dct @ pixels @ dct.T).ravel()
+    bits = frequencies > numpy.median(frequencies[1:])
+
+    return int.from_bytes(numpy.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(hash, other_hash):
+    """
+        Returns the number of bits that differ between two hashes.
+    """
+
+    return bin(hash ^ other_hash).count("1")
+
+
+def _dct_matrix(size):
+    if size not in _DCT_MATRICES:
+        k = numpy.arange(size)[:, numpy.newaxis]
+        n = numpy.arange(size)[numpy.newaxis, :]
+        matrix = numpy.cos(math.pi * k * (2 * n + 1) / (2 * size))
+        matrix[0] /= math.sqrt(2)
+        _DCT_MATRICES[size] = matrix * math.sqrt(2 / size)
+
+    return _DCT_MATRICES[size]
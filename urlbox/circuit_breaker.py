@@ -0,0 +1,289 @@
+import collections
+import threading
+import time
+from urlbox.circuit_open_error import CircuitOpenError
+
+
+class CircuitBreaker:
+    """
+        Fails fast instead of piling up requests against a degraded host.
+
+        The breaker keeps the outcome of the last window_size calls. A call is
+        a failure when it raises, or returns a 429 or 5xx response, and is slow
+        when it takes longer than slow_call_seconds. Once at least min_calls
+        have been recorded and either the failure rate reaches
+        failure_rate_threshold or the slow call rate reaches
+        slow_call_rate_threshold, the breaker opens.
+
+        While open, every call raises a CircuitOpenError without touching the
+        network. After open_seconds the breaker is half-open and lets
+        half_open_max_calls probe calls through: if they all succeed it closes,
+        if any fails it opens again.
+
+        The breaker only ever holds its lock for a few bookkeeping operations,
+        so a single instance can be shared by every thread and asyncio task
+        using the same client.
+
+        :param failure_rate_threshold: (Optional) failure rate, between 0 and 1, that opens the breaker. Defaults to 0.5.
+
+        :param slow_call_seconds: (Optional) latency above which a call is slow. Defaults to None (no latency threshold).
+
+        :param slow_call_rate_threshold: (Optional) slow call rate, between 0 and 1, that opens the breaker. Defaults to 0.5.
+
+        :param window_size: (Optional) number of recent calls the rates are computed over. Defaults to 20.
+
+        :param min_calls: (Optional) calls required in the window before the breaker can open. Defaults to 10.
+
+        :param open_seconds: (Optional) how long the breaker stays open before probing. Defaults to 30.
+
+        :param half_open_max_calls: (Optional) probe calls let through while half-open. Defaults to 1.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        *,
+        failure_rate_threshold=0.5,
+        slow_call_seconds=None,
+        slow_call_rate_threshold=0.5,
+        window_size=20,
+        min_calls=10,
+        open_seconds=30,
+        half_open_max_calls=1,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.min_calls = min(min_calls, window_size)
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.opened_count = 0
+        self.rejected_count = 0
+        self._outcomes = collections.deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        # Bumped on every state change, so outcomes of calls allowed in an
+        # earlier state, eg: slow calls from before the breaker opened, are
+        # not mistaken for probe outcomes.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_host(cls, host, **kwargs):
+        """
+            Returns the breaker shared by every client sending requests to host,
+            creating it with kwargs the first time it is requested.
+        """
+
+        with cls._registry_lock:
+            if host not in cls._registry:
+                cls._registry[host] = cls(**kwargs)
+
+            return cls._registry[host]
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def metrics(self):
+        """
+            Returns a dictionary describing the breaker, for monitoring.
+        """
+
+        with self._lock:
+            calls = len(self._outcomes)
+
+            return {
+                "state": self._current_state(),
+                "calls": calls,
+                "failure_rate": self._rate(0, calls),
+                "slow_call_rate": self._rate(1, calls),
+                "opened_count": self.opened_count,
+                "rejected_count": self.rejected_count,
+            }
+
+    def call(self, func, *args, **kwargs):
+        """
+            Calls func(*args, **kwargs) through the breaker.
+
+            Raises a CircuitOpenError, without calling func, while the breaker is open.
+        """
+
+        generation = self.before_call()
+        started_at = time.monotonic()
+
+        try:
+            response = func(*args, **kwargs)
+        except Exception:
+            self.record(False, time.monotonic() - started_at, generation)
+            raise
+        except BaseException:
+            # Cancelled, eg: by asyncio.wait_for: not the host's fault.
+            self.cancel(generation)
+            raise
+
+        self.record(
+            not self._is_failure(response),
+            time.monotonic() - started_at,
+            generation,
+        )
+
+        return response
+
+    async def acall(self, func, *args, **kwargs):
+        """
+            Awaits func(*args, **kwargs) through the breaker.
+
+            Raises a CircuitOpenError, without calling func, while the breaker is open.
+        """
+
+        generation = self.before_call()
+        started_at = time.monotonic()
+
+        try:
+            response = await func(*args, **kwargs)
+        except Exception:
+            self.record(False, time.monotonic() - started_at, generation)
+            raise
+        except BaseException:
+            # Cancelled, eg: by asyncio.wait_for: not the host's fault.
+            self.cancel(generation)
+            raise
+
+        self.record(
+            not self._is_failure(response),
+            time.monotonic() - started_at,
+            generation,
+        )
+
+        return response
+
+    def before_call(self):
+        """
+            Raises a CircuitOpenError if a call is not allowed right now.
+            Every allowed call must be followed by a call to record(), or to
+            cancel() if it was abandoned before completing, passing them the
+            generation returned.
+        """
+
+        with self._lock:
+            state = self._current_state()
+
+            if state == self.OPEN or (
+                state == self.HALF_OPEN
+                and self._half_open_calls >= self.half_open_max_calls
+            ):
+                self.rejected_count += 1
+                raise CircuitOpenError("Circuit breaker is open")
+
+            if state == self.HALF_OPEN:
+                self._half_open_calls += 1
+
+            return self._generation
+
+    def record(self, success, elapsed_seconds, generation=None):
+        """
+            Records the outcome of a call allowed by before_call(). Outcomes
+            of calls allowed before the breaker last changed state are
+            ignored.
+
+            :param generation: (Optional) the value before_call() returned. Defaults to None (always recorded).
+        """
+
+        slow = (
+            self.slow_call_seconds is not None
+            and elapsed_seconds > self.slow_call_seconds
+        )
+
+        with self._lock:
+            state = self._current_state()
+
+            if generation is not None and generation != self._generation:
+                return
+
+            if state == self.HALF_OPEN:
+                if success and not slow:
+                    self._half_open_successes += 1
+
+                    if self._half_open_successes >= self.half_open_max_calls:
+                        self._close()
+                else:
+                    self._open()
+
+                return
+
+            self._outcomes.append((not success, slow))
+
+            if state == self.CLOSED and self._should_open():
+                self._open()
+
+    def cancel(self, generation=None):
+        """
+            Releases a call allowed by before_call() without recording an
+            outcome, so an abandoned probe does not keep the breaker half-open.
+
+            :param generation: (Optional) the value before_call() returned. Defaults to None.
+        """
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    # private
+
+    def _current_state(self):
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self._opened_at >= self.open_seconds
+        ):
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+            self._half_open_successes = 0
+            self._generation += 1
+
+        return self._state
+
+    def _should_open(self):
+        calls = len(self._outcomes)
+
+        if calls < self.min_calls:
+            return False
+
+        return (
+            self._rate(0, calls) >= self.failure_rate_threshold
+            or self._rate(1, calls) >= self.slow_call_rate_threshold
+        )
+
+    def _rate(self, index, calls):
+        if calls == 0:
+            return 0.0
+
+        return sum(outcome[index] for outcome in self._outcomes) / calls
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.opened_count += 1
+        self._generation += 1
+
+    def _close(self):
+        self._state = self.CLOSED
+        self._outcomes.clear()
+        self._generation += 1
+
+    def _is_failure(self, response):
+        status_code = getattr(response, "status_code", 200)
+
+        return status_code == 429 or status_code >= 500
@@ -0,0 +1,2 @@
+class CircuitOpenError(Exception):
+    pass
@@ -0,0 +1,234 @@
+import concurrent.futures
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import requests
+from urlbox.render_key import render_key
+from urlbox.render_result import RenderResult
+
+
+class ConditionalRenderer:
+    """
+        Skips renders of pages that have not changed since they were last
+        rendered.
+
+        Before rendering, a conditional HEAD request is sent to the target
+        page itself with the ETag and Last-Modified validators it returned
+        last time. When the page answers 304 Not Modified, or with the same
+        validators, the render is skipped and the stored output is returned
+        instead, as a RenderResult with a status_code of 304 and the
+        file_path of the previous render.
+
+        Pages that return neither validator, or whose check fails, are always
+        rendered. Failed renders are returned with their error body as
+        content, and no file_path. Validators and output paths are kept in a SQLite index keyed
+        by method and options, so different options of the same page are
+        tracked separately.
+
+        :param client: the UrlboxClient (or UrlboxPoolClient) to render with.
+
+        :param index_path: path of the SQLite index, created if needed.
+
+        :param output_dir: directory renders are saved in.
+
+        :param session: (Optional) requests.Session used for the checks to target pages.
+
+        :param check_timeout: (Optional) seconds to wait for a target page to answer its check. Defaults to 10.
+
+        Example:
+        renderer = ConditionalRenderer(urlbox_client, "renders.sqlite3", "renders/")
+        result = renderer.get({"url": "http://example.com/"})
+        result.status_code  # 304 when the stored render was reused
+        result.file_path
+    """
+
+    def __init__(
+        self, client, index_path, output_dir, *, session=None, check_timeout=10
+    ):
+        self.client = client
+        self.output_dir = output_dir
+        self.session = session or requests.Session()
+        self.check_timeout = check_timeout
+        self.rendered_count = 0
+        self.skipped_count = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(index_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS renders ("
+            "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "content_type TEXT, file_path TEXT, rendered_at REAL)"
+        )
+        self._db.commit()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, options):
+        """
+            Renders options with client.get, unless the target page is unchanged.
+        """
+
+        return self._render("get", options)
+
+    def post(self, options):
+        """
+            Sends options with client.post, unless the target page is unchanged,
+            in which case the stored response of the previous post is returned.
+        """
+
+        return self._render("post", options)
+
+    def render_many(self, options_iterable, *, method="get", max_workers=8):
+        """
+            Checks and renders many pages, max_workers at a time, and returns
+            their RenderResults in the same order. A render that raises returns
+            the exception in its place instead of interrupting the others.
+        """
+
+        def render(options):
+            try:
+                return self._render(method, options)
+            except Exception as error:
+                return error
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix="urlbox-conditional"
+        ) as executor:
+            return list(executor.map(render, options_iterable))
+
+    def close(self):
+        self.session.close()
+
+        with self._lock:
+            self._db.close()
+
+    # private
+
+    def _render(self, method, options):
+        key = render_key(method, options)
+
+        with self._lock:
+            stored = self._db.execute(
+                "SELECT etag, last_modified, content_type, file_path "
+                "FROM renders WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+        if stored is not None and os.path.exists(stored[3]):
+            etag, last_modified, content_type, file_path = stored
+        else:
+            etag, last_modified, content_type, file_path = None, None, None, None
+
+        unchanged, etag, last_modified = self._check(
+            options, etag, last_modified
+        )
+
+        # A 304 to a check sent without validators, eg: by a misbehaving
+        # server or when the stored output is gone, says nothing about a
+        # render to reuse.
+        if unchanged and file_path is not None:
+            with self._lock:
+                self.skipped_count += 1
+
+            return RenderResult(
+                304, content_type=content_type, file_path=file_path
+            )
+
+        file_path = os.path.join(self.output_dir, key)
+        # Render to a temporary file, so a failed render never replaces the
+        # stored output of a successful one. Its name is unique, as the same
+        # options may be rendered concurrently, eg: by render_many.
+        partial_path = f"{file_path}.{uuid.uuid4().hex}.partial"
+
+        try:
+            if method == "get":
+                result = self.client.get(
+                    options, lean=True, destination=partial_path
+                )
+            else:
+                result = self.client.post(options, lean=True)
+
+                with open(partial_path, "wb") as file:
+                    file.write(result.content)
+
+            with self._lock:
+                self.rendered_count += 1
+
+            if not result.ok:
+                # Keep the error body, eg: for result.json(), but not the
+                # file.
+                with open(partial_path, "rb") as file:
+                    result.content = file.read()
+
+                result.file_path = None
+
+                return result
+
+            os.replace(partial_path, file_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        result.file_path = file_path
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO renders VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    etag,
+                    last_modified,
+                    result.content_type,
+                    file_path,
+                    time.time(),
+                ),
+            )
+
+        return result
+
+    def _check(self, options, etag, last_modified):
+        if "url" not in options:
+            return False, None, None
+
+        url = options["url"].strip()
+        headers = {}
+
+        if etag is not None:
+            headers["If-None-Match"] = etag
+
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+
+        try:
+            response = self.session.head(
+                url if "://" in url else f"http://{url}",
+                headers=headers,
+                allow_redirects=True,
+                timeout=self.check_timeout,
+            )
+        except requests.exceptions.RequestException:
+            return False, None, None
+
+        if response.status_code == 304:
+            return True, etag, last_modified
+
+        if response.status_code >= 400:
+            return False, None, None
+
+        new_etag = response.headers.get("ETag")
+        new_last_modified = response.headers.get("Last-Modified")
+
+        # Not every server answers conditional HEAD requests with a 304.
+        unchanged = (etag is not None or last_modified is not None) and (
+            new_etag == etag
+            if etag is not None
+            else new_last_modified == last_modified
+        )
+
+        return unchanged, new_etag, new_last_modified
@@ -0,0 +1,140 @@
+import socket
+import threading
+import time
+import urllib3
+
+
+class DnsCache:
+    """
+        Caches DNS resolutions in process, for ttl seconds.
+
+        Installed on the connection pools of a transport, new connections to a
+        host reuse its cached address instead of resolving it again, which
+        saves a DNS round trip on every connection opened during a burst. TLS
+        certificates are still verified against the host name.
+
+        When an entry has expired and resolving the host fails, the expired
+        address keeps being used, so a DNS outage does not take down requests
+        to hosts that were reachable. Addresses are tried in order, as when
+        resolving, and when none can be connected to the host is evicted, so
+        the next connection resolves it again.
+
+        :param ttl: (Optional) seconds an address is reused for. Defaults to 300.
+
+        Example:
+        transport = RequestsTransport(dns_cache=DnsCache(ttl=60))
+        urlbox_client = UrlboxClient(api_key="YOUR_API_KEY", transport=transport)
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port):
+        """
+            Returns the cached addresses of host, resolving it if needed.
+        """
+
+        key = (host, port)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+
+        try:
+            addresses = tuple(
+                dict.fromkeys(
+                    info[4][0]
+                    for info in socket.getaddrinfo(
+                        host, port, type=socket.SOCK_STREAM
+                    )
+                )
+            )
+        except socket.gaierror:
+            if entry is None:
+                raise
+
+            return entry[1]
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, addresses)
+
+        return addresses
+
+    def invalidate(self, host=None):
+        """
+            Evicts the cached addresses of host, or of every host.
+        """
+
+        with self._lock:
+            for key in list(self._entries):
+                if host is None or key[0] == host:
+                    del self._entries[key]
+
+    def install(self, pool_manager):
+        """
+            Makes the connections of a urllib3.PoolManager resolve hosts
+            through this cache.
+        """
+
+        pool_classes = pool_manager.pool_classes_by_scheme
+
+        pool_manager.pool_classes_by_scheme = {
+            scheme: self._pool_class(pool_class)
+            for scheme, pool_class in pool_classes.items()
+        }
+
+    # private
+
+    def _pool_class(self, pool_class):
+        connection_class = type(
+            pool_class.ConnectionCls.__name__,
+            (_DnsCachingConnection, pool_class.ConnectionCls),
+            {"dns_cache": self},
+        )
+
+        return type(
+            pool_class.__name__,
+            (pool_class,),
+            {"ConnectionCls": connection_class},
+        )
+
+
+class _DnsCachingConnection:
+    dns_cache = None
+
+    def _new_conn(self):
+        # urllib3 connects to _dns_host, but still sends self.host as the TLS
+        # server name and verifies the certificate against it.
+        host = self._dns_host
+
+        try:
+            addresses = self.dns_cache.resolve(host, self.port)
+        except socket.gaierror as error:
+            # NewConnectionError, unlike NameResolutionError, exists in both
+            # urllib3 1.26 and 2.
+            raise urllib3.exceptions.NewConnectionError(
+                self, f"Failed to resolve '{host}' ({error})"
+            )
+
+        try:
+            for address in addresses:
+                self._dns_host = address
+
+                try:
+                    return super()._new_conn()
+                except urllib3.exceptions.ConnectTimeoutError as error:
+                    last_error = error
+        finally:
+            self._dns_host = host
+
+        self.dns_cache.invalidate(host)
+        raise last_error
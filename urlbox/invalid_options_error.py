@@ -0,0 +1,2 @@
+class InvalidOptionsError(Exception):
+    pass
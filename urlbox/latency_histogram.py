@@ -0,0 +1,96 @@
+import bisect
+import collections
+import math
+import threading
+
+
+class LatencyHistogram:
+    """
+        A rolling histogram of request latencies.
+
+        Latencies are counted in logarithmically spaced buckets (each bucket is
+        bucket_growth times wider than the previous one) so recording a sample
+        and reading a percentile are both cheap, whatever the window size.
+        Only the most recent window_size samples are kept.
+
+        :param window_size: (Optional) number of recent samples to keep. Defaults to 1000.
+
+        :param min_samples: (Optional) samples required before percentile()
+        returns a value. Defaults to 20.
+    """
+
+    MIN_LATENCY = 0.001
+    MAX_LATENCY = 600.0
+    BUCKET_GROWTH = 1.2
+
+    def __init__(self, window_size=1000, min_samples=20):
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+
+        self.window_size = window_size
+        self.min_samples = min_samples
+
+        bucket_count = (
+            int(
+                math.ceil(
+                    math.log(self.MAX_LATENCY / self.MIN_LATENCY)
+                    / math.log(self.BUCKET_GROWTH)
+                )
+            )
+            + 1
+        )
+        self._bounds = [
+            self.MIN_LATENCY * self.BUCKET_GROWTH ** i
+            for i in range(bucket_count)
+        ]
+        self._counts = [0] * (bucket_count + 1)
+        self._samples = collections.deque()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, seconds):
+        """
+            Record a single request latency, in seconds.
+        """
+
+        bucket = bisect.bisect_left(self._bounds, seconds)
+
+        with self._lock:
+            self._samples.append(bucket)
+            self._counts[bucket] += 1
+
+            if len(self._samples) > self.window_size:
+                self._counts[self._samples.popleft()] -= 1
+
+    def percentile(self, percentile):
+        """
+            Returns the latency, in seconds, below which the given percentage of
+            recorded requests completed, or None until min_samples latencies
+            have been recorded.
+
+            The value is the upper bound of the bucket the percentile falls in.
+
+            :param percentile: a number between 0 and 100, eg: 95
+        """
+
+        with self._lock:
+            total = len(self._samples)
+
+            if total == 0 or total < self.min_samples:
+                return None
+
+            rank = max(1, int(math.ceil(total * percentile / 100.0)))
+            seen = 0
+
+            for bucket, count in enumerate(self._counts):
+                seen += count
+
+                if seen >= rank:
+                    break
+
+        if bucket >= len(self._bounds):
+            return self.MAX_LATENCY
+
+        return self._bounds[bucket]
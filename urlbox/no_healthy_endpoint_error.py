@@ -0,0 +1,2 @@
+class NoHealthyEndpointError(Exception):
+    pass
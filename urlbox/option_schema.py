@@ -0,0 +1,317 @@
+import difflib
+import threading
+import warnings
+from urlbox.invalid_options_error import InvalidOptionsError
+
+FORMATS = ("png", "jpg", "jpeg", "avif", "webp", "pdf", "svg", "html")
+
+
+def _string(name, value):
+    if not isinstance(value, str):
+        return f"'{name}' must be a string, not {value!r}"
+
+
+def _boolean(name, value):
+    if not isinstance(value, bool) and value not in ("true", "false"):
+        return f"'{name}' must be True or False, not {value!r}"
+
+
+def _integer(minimum=None, maximum=None):
+    def check(name, value):
+        if isinstance(value, bool):
+            return f"'{name}' must be an integer, not {value!r}"
+
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return f"'{name}' must be an integer, not {value!r}"
+
+        return _check_range(name, value, number, minimum, maximum)
+
+    return check
+
+
+def _number(minimum=None, maximum=None):
+    def check(name, value):
+        if isinstance(value, bool):
+            return f"'{name}' must be a number, not {value!r}"
+
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return f"'{name}' must be a number, not {value!r}"
+
+        return _check_range(name, value, number, minimum, maximum)
+
+    return check
+
+
+def _check_range(name, value, number, minimum, maximum):
+    if minimum is not None and number < minimum:
+        return f"'{name}' must be at least {minimum}, not {value!r}"
+
+    if maximum is not None and number > maximum:
+        return f"'{name}' must be at most {maximum}, not {value!r}"
+
+
+def _one_of(*choices):
+    allowed = ", ".join(choices)
+
+    def check(name, value):
+        if value not in choices:
+            return f"'{name}' must be one of {allowed}, not {value!r}"
+
+    return check
+
+
+def _strings(name, value):
+    if isinstance(value, (list, tuple)):
+        value = next((item for item in value if not isinstance(item, str)), "")
+
+    return _string(name, value)
+
+
+class OptionSchema:
+    """
+        Validates render options locally, before paying for a round trip.
+
+        Checks that every option is documented (suggesting the closest match
+        for typos, eg: fullpage), that values have the right type and range,
+        that enumerated options such as format are one of their allowed values,
+        and that mutually exclusive options are not combined.
+
+        Validation is compiled and cached per set of option names: checks on
+        the names only run once per shape of options, and each later call only
+        runs one precompiled check per value. A schema can be shared between
+        threads: only compiling a new shape takes a lock.
+
+        :param mode: (Optional) "strict" raises an InvalidOptionsError listing
+        every problem, "warn" issues a UserWarning instead. Defaults to "strict".
+
+        :param extra_options: (Optional) dictionary of option name to check
+        function (name, value) -> error message or None, eg: for options added
+        to the API after this release. Defaults to None.
+
+        Example:
+        urlbox_client = UrlboxClient(api_key="YOUR_API_KEY", validate_options="strict")
+        urlbox_client.get({"url": "http://example.com/", "fullpage": True})
+        # InvalidOptionsError: Unknown option 'fullpage', did you mean 'full_page'?
+    """
+
+    OPTIONS = {
+        # Target
+        "url": _string,
+        "html": _string,
+        "format": _one_of(*FORMATS),
+        # Viewport and capture area
+        "width": _integer(1, 10000),
+        "height": _integer(1, 10000),
+        "full_page": _boolean,
+        "full_page_mode": _one_of("stitch", "native"),
+        "full_width": _boolean,
+        "selector": _string,
+        "clip": _string,
+        "thumb_width": _integer(1, 10000),
+        "thumb_height": _integer(1, 10000),
+        "retina": _boolean,
+        "transparent": _boolean,
+        "quality": _integer(0, 100),
+        "dark_mode": _boolean,
+        "reduced_motion": _boolean,
+        "bg_color": _string,
+        "scroll_to": _string,
+        "allow_infinite": _boolean,
+        "skip_scroll": _boolean,
+        "detect_full_height": _boolean,
+        "max_section_height": _integer(1),
+        "scroll_increment": _integer(1),
+        "scroll_delay": _integer(0),
+        "max_height": _integer(1),
+        # Page interaction
+        "block_ads": _boolean,
+        "hide_cookie_banners": _boolean,
+        "click_accept": _boolean,
+        "block_urls": _strings,
+        "block_images": _boolean,
+        "block_fonts": _boolean,
+        "block_medias": _boolean,
+        "block_styles": _boolean,
+        "block_scripts": _boolean,
+        "block_frames": _boolean,
+        "block_fetch": _boolean,
+        "block_xhr": _boolean,
+        "block_sockets": _boolean,
+        "hide_selector": _string,
+        "js": _string,
+        "css": _string,
+        "click": _strings,
+        "click_all": _string,
+        "hover": _string,
+        "disable_js": _boolean,
+        "highlight": _string,
+        "highlightfg": _string,
+        "highlightbg": _string,
+        "readable": _boolean,
+        # Waiting
+        "delay": _integer(0, 50000),
+        "timeout": _integer(5000, 100000),
+        "wait_until": _one_of(
+            "domloaded", "mostrequestsfinished", "requestsfinished", "loaded"
+        ),
+        "wait_for": _string,
+        "wait_to_leave": _string,
+        "wait_timeout": _integer(0, 100000),
+        "fail_if_selector_missing": _boolean,
+        "fail_if_selector_present": _boolean,
+        "fail_on_4xx": _boolean,
+        "fail_on_5xx": _boolean,
+        # Request
+        "header": _strings,
+        "cookie": _strings,
+        "user_agent": _string,
+        "platform": _string,
+        "accept_lang": _string,
+        "authorization": _string,
+        "tz": _string,
+        "proxy": _string,
+        "latitude": _number(-90, 90),
+        "longitude": _number(-180, 180),
+        "accuracy": _number(0),
+        "engine_version": _one_of("latest", "stable", "lts"),
+        # Caching and storage
+        "force": _boolean,
+        "unique": _string,
+        "ttl": _integer(0, 2592000),
+        "download": _string,
+        "use_s3": _boolean,
+        "s3_path": _string,
+        "s3_bucket": _string,
+        "s3_endpoint": _string,
+        "s3_region": _string,
+        "cdn_host": _string,
+        "s3_storageclass": _one_of(
+            "standard",
+            "reduced_redundancy",
+            "standard_ia",
+            "onezone_ia",
+            "intelligent_tiering",
+            "glacier",
+            "deep_archive",
+            "outposts",
+        ),
+        # PDF
+        "pdf_page_size": _one_of(
+            "A0",
+            "A1",
+            "A2",
+            "A3",
+            "A4",
+            "A5",
+            "A6",
+            "Legal",
+            "Letter",
+            "Ledger",
+            "Tabloid",
+        ),
+        "pdf_page_range": _string,
+        "pdf_page_width": _integer(1),
+        "pdf_page_height": _integer(1),
+        "pdf_margin": _one_of("none", "default", "minimum"),
+        "pdf_margin_top": _integer(0),
+        "pdf_margin_right": _integer(0),
+        "pdf_margin_bottom": _integer(0),
+        "pdf_margin_left": _integer(0),
+        "pdf_auto_crop": _boolean,
+        "pdf_scale": _number(0.1, 2),
+        "pdf_orientation": _one_of("portrait", "landscape"),
+        "pdf_background": _boolean,
+        "pdf_show_header": _boolean,
+        "pdf_header": _string,
+        "pdf_show_footer": _boolean,
+        "pdf_footer": _string,
+        "disable_ligatures": _boolean,
+        "media": _one_of("print", "screen"),
+        # Post requests
+        "webhook_url": _string,
+    }
+
+    MUTUALLY_EXCLUSIVE = (("url", "html"), ("selector", "clip"))
+
+    MAX_CACHED_SHAPES = 1024
+
+    def __init__(self, mode="strict", extra_options=None):
+        if mode not in ("strict", "warn"):
+            raise ValueError("mode must be 'strict' or 'warn'")
+
+        self.mode = mode
+        self.options = {**self.OPTIONS, **(extra_options or {})}
+        self._compiled = {}
+        self._compile_lock = threading.Lock()
+
+    def validate(self, options):
+        """
+            Validates options, raising an InvalidOptionsError (strict mode) or
+            warning (warn mode) about every problem found. Returns the list of
+            problems, empty when the options are valid.
+        """
+
+        shape = frozenset(options)
+        compiled = self._compiled.get(shape)
+
+        if compiled is None:
+            with self._compile_lock:
+                compiled = self._compile(shape)
+
+        shape_problems, checks = compiled
+        problems = list(shape_problems)
+
+        for name, check in checks:
+            problem = check(name, options[name])
+
+            if problem is not None:
+                problems.append(problem)
+
+        if problems:
+            if self.mode == "strict":
+                raise InvalidOptionsError("; ".join(problems))
+
+            for problem in problems:
+                warnings.warn(problem, stacklevel=3)
+
+        return problems
+
+    # private
+
+    def _compile(self, shape):
+        problems = []
+        checks = []
+
+        for name in sorted(shape):
+            check = self.options.get(name)
+
+            if check is not None:
+                checks.append((name, check))
+                continue
+
+            suggestions = difflib.get_close_matches(name, self.options, n=1)
+
+            if suggestions:
+                problems.append(
+                    f"Unknown option '{name}', did you mean '{suggestions[0]}'?"
+                )
+            else:
+                problems.append(f"Unknown option '{name}'")
+
+        for first, second in self.MUTUALLY_EXCLUSIVE:
+            if first in shape and second in shape:
+                problems.append(
+                    f"Options '{first}' and '{second}' cannot be used together"
+                )
+
+        if len(self._compiled) >= self.MAX_CACHED_SHAPES:
+            self._compiled.clear()
+
+        compiled = (tuple(problems), tuple(checks))
+        self._compiled[shape] = compiled
+
+        return compiled
@@ -0,0 +1,59 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+        Token bucket limiting how many requests are started per second.
+
+        The bucket holds up to burst tokens and refills at rate tokens per
+        second. Every acquire() takes a token, waiting for one to be refilled
+        when the bucket is empty, so requests are spread evenly instead of
+        arriving in bursts that trip the API's rate limits.
+
+        :param rate: requests allowed per second.
+
+        :param burst: (Optional) requests allowed back to back after a pause. Defaults to 1.
+
+        Example:
+        rate_limiter = RateLimiter(20)
+        for options in options_list:
+            rate_limiter.acquire()
+            urlbox_client.delete(options)
+    """
+
+    def __init__(self, rate, *, burst=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+            Takes a token, blocking until one is available.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._updated_at) * self.rate,
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate
+
+        # The token is reserved under the lock, so concurrent callers queue
+        # up behind each other instead of all waking up at once.
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, response):
+        """
+            Does nothing: a RateLimiter only limits the request rate. See
+            SharedRateLimiter to also track renders used.
+        """
@@ -0,0 +1,2 @@
+class RenderBudgetExceededError(Exception):
+    pass
@@ -0,0 +1,134 @@
+import collections
+import concurrent.futures
+import threading
+from urlbox import webhook_validator
+
+
+class RenderCorrelator:
+    """
+        Matches the webhook callbacks of renders sent with
+        UrlboxClient.post to the code waiting for them, in the same process.
+
+        A client created with a correlator registers the renderId of every
+        post it sends. Your webhook endpoint hands each callback to resolve(),
+        which verifies its signature with webhook_validator and completes the
+        concurrent.futures.Future of the render with the webhook payload.
+        Futures can be waited on from threads, or from coroutines through
+        asyncio.wrap_future.
+
+        At most max_pending renders are tracked: registering more evicts the
+        oldest, whose future raises a concurrent.futures.TimeoutError, so
+        renders whose webhook never arrives cannot leak memory. Callbacks
+        arriving before their render is registered are kept, up to
+        max_pending too, until it is.
+
+        :param webhook_secret: your webhook secret, to verify callbacks with.
+
+        :param max_pending: (Optional) number of renders tracked at once. Defaults to 10000.
+
+        Example:
+        correlator = RenderCorrelator(webhook_secret="YOUR_WEBHOOK_SECRET")
+        urlbox_client = UrlboxClient(api_key="YOUR_API_KEY", api_secret="YOUR_API_SECRET", correlator=correlator)
+
+        # In your webhook endpoint:
+        correlator.resolve(request.headers["x-urlbox-signature"], request.json)
+
+        # Anywhere else:
+        payload = urlbox_client.post_and_wait({"url": "http://example.com/", "webhook_url": "https://example.com/webhooks/urlbox"})
+    """
+
+    def __init__(self, *, webhook_secret, max_pending=10000):
+        self.webhook_secret = webhook_secret
+        self.max_pending = max_pending
+        self._pending = collections.OrderedDict()
+        self._early = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def register(self, render_id):
+        """
+            Returns the Future of render_id's webhook payload, tracking it if
+            it was not already.
+        """
+
+        evicted = None
+
+        with self._lock:
+            future = self._pending.get(render_id)
+
+            if future is not None:
+                return future
+
+            future = concurrent.futures.Future()
+            payload = self._early.pop(render_id, None)
+
+            if payload is None:
+                self._pending[render_id] = future
+
+                if len(self._pending) > self.max_pending:
+                    _, evicted = self._pending.popitem(last=False)
+
+        if payload is not None:
+            future.set_result(payload)
+
+        if evicted is not None:
+            evicted.set_exception(
+                concurrent.futures.TimeoutError(
+                    "Evicted from the pending renders"
+                )
+            )
+
+        return future
+
+    def future(self, render_id):
+        """
+            Returns the Future of a registered render, or None.
+        """
+
+        with self._lock:
+            return self._pending.get(render_id)
+
+    def discard(self, render_id):
+        """
+            Stops tracking render_id, eg: once its result was found by polling.
+        """
+
+        with self._lock:
+            self._pending.pop(render_id, None)
+            self._early.pop(render_id, None)
+
+    def resolve(self, header_signature, payload):
+        """
+            Verifies a webhook callback and completes the Future of its render.
+
+            Raises an InvalidHeaderSignatureError if the callback is not a
+            genuine Urlbox request. Returns True if a registered render was
+            completed, False if the callback was kept for a render not
+            registered yet.
+
+            :param header_signature: the x-urlbox-signature header of the callback.
+
+            :param payload: the JSON body of the callback, parsed.
+        """
+
+        webhook_validator.call(header_signature, payload, self.webhook_secret)
+        render_id = payload.get("renderId")
+
+        with self._lock:
+            future = self._pending.pop(render_id, None)
+
+            if future is None:
+                self._early[render_id] = payload
+
+                if len(self._early) > self.max_pending:
+                    self._early.popitem(last=False)
+
+        if future is None:
+            return False
+
+        future.set_result(payload)
+
+        return True
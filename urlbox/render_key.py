@@ -0,0 +1,13 @@
+import json
+from hashlib import sha1
+
+
+def render_key(method, options):
+    """
+        Returns a key identifying a request of options with method, whatever
+        the order of the options, eg: to index stored renders by.
+    """
+
+    return sha1(
+        f"{method} {json.dumps(options, sort_keys=True)}".encode()
+    ).hexdigest()
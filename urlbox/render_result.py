@@ -0,0 +1,154 @@
+import json
+
+
+class RenderResult:
+    """
+        A compact result of a Urlbox API request, returned by the lean mode of
+        UrlboxClient.get, head and post.
+
+        Unlike a requests.Response, it keeps no connection, headers dictionary,
+        history or buffers: only the status, the content type, the Urlbox usage
+        headers and either the body or the path of the file it was written to.
+        Attributes are stored in __slots__, so holding hundreds of thousands of
+        results in memory is cheap.
+
+        wire_bytes is the size of the body as it was received, before
+        decompression, when the transport reports it, and decoded_bytes its
+        size once decompressed. For a get with stream=True, which returns a
+        requests.Response instead, RenderResult.wire_bytes_read(response)
+        reports the same count for the part of the body read so far.
+    """
+
+    __slots__ = (
+        "status_code",
+        "content_type",
+        "renders_used",
+        "renders_allowed",
+        "renders_reset",
+        "retry_after",
+        "content",
+        "file_path",
+        "wire_bytes",
+        "decoded_bytes",
+    )
+
+    def __init__(
+        self,
+        status_code,
+        content_type=None,
+        renders_used=None,
+        renders_allowed=None,
+        renders_reset=None,
+        retry_after=None,
+        content=None,
+        file_path=None,
+        wire_bytes=None,
+        decoded_bytes=None,
+    ):
+        self.status_code = status_code
+        self.content_type = content_type
+        self.renders_used = renders_used
+        self.renders_allowed = renders_allowed
+        self.renders_reset = renders_reset
+        self.retry_after = retry_after
+        self.content = content
+        self.file_path = file_path
+        self.wire_bytes = wire_bytes
+        self.decoded_bytes = decoded_bytes
+
+    @classmethod
+    def from_response(cls, response, destination=None, chunk_size=65536):
+        """
+            Builds a RenderResult from a requests.Response and closes the response.
+
+            :param destination: (Optional) path, or binary file object, to
+            stream the body to, instead of keeping it in memory.
+
+            :param chunk_size: (Optional) bytes read at a time when streaming to destination.
+        """
+
+        headers = response.headers
+        content = None
+        file_path = None
+        decoded_bytes = 0
+
+        try:
+            if destination is None:
+                content = response.content
+                decoded_bytes = len(content)
+            elif hasattr(destination, "write"):
+                for chunk in response.iter_content(chunk_size):
+                    destination.write(chunk)
+                    decoded_bytes += len(chunk)
+            else:
+                file_path = str(destination)
+
+                with open(destination, "wb") as file:
+                    for chunk in response.iter_content(chunk_size):
+                        file.write(chunk)
+                        decoded_bytes += len(chunk)
+
+            wire_bytes = cls.wire_bytes_read(response)
+        finally:
+            response.close()
+
+        return cls(
+            response.status_code,
+            content_type=headers.get("Content-Type"),
+            renders_used=_int_header(headers, "X-Renders-Used"),
+            renders_allowed=_int_header(headers, "X-Renders-Allowed"),
+            renders_reset=headers.get("X-Renders-Reset"),
+            retry_after=_int_header(headers, "Retry-After"),
+            content=content,
+            file_path=file_path,
+            wire_bytes=wire_bytes,
+            decoded_bytes=decoded_bytes,
+        )
+
+    @staticmethod
+    def wire_bytes_read(response):
+        """
+            Returns how many bytes of the body of a requests.Response, eg: of
+            a get with stream=True, were received so far, before
+            decompression, or None if its transport does not report it.
+
+            Example:
+            with urlbox_client.get(options, stream=True) as response:
+                decoded_bytes = sum(map(len, response.iter_content(65536)))
+                wire_bytes = RenderResult.wire_bytes_read(response)
+        """
+
+        # urllib3 counts the body bytes read from the socket, before decoding.
+        tell = getattr(response.raw, "tell", None)
+
+        try:
+            return None if tell is None else tell()
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        """
+            Parses the body as JSON, eg: the renderId and statusUrl of a post request.
+        """
+
+        if self.content is None:
+            with open(self.file_path, "rb") as file:
+                return json.load(file)
+
+        return json.loads(self.content)
+
+    def __repr__(self):
+        return f"<RenderResult [{self.status_code}]>"
+
+
+def _int_header(headers, name):
+    value = headers.get(name)
+
+    try:
+        return None if value is None else int(value)
+    except ValueError:
+        return None
@@ -0,0 +1,213 @@
+import collections
+import concurrent.futures
+import heapq
+import itertools
+import threading
+import time
+from urlbox.latency_histogram import LatencyHistogram
+
+
+class RenderScheduler:
+    """
+        Schedules requests to a UrlboxClient by priority, sharing a fixed
+        concurrency budget fairly between tenants.
+
+        Queued requests of a more urgent priority class (lower number) are
+        always sent before less urgent ones, so interactive renders jump ahead
+        of bulk work. Within a priority class, tenants are served by weighted
+        fair queuing: a tenant with weight 2 gets twice the share of the
+        workers of a tenant with weight 1, and a tenant queuing a big backfill
+        cannot starve the others.
+
+        :param client: the UrlboxClient (or UrlboxPoolClient) to send requests with.
+
+        :param max_concurrency: (Optional) number of requests in flight at once,
+        shared by all priorities and tenants. Defaults to 8.
+
+        :param tenant_weights: (Optional) dictionary of tenant name to weight.
+        Tenants not listed have a weight of 1.
+
+        Example:
+        scheduler = RenderScheduler(urlbox_client, max_concurrency=16, tenant_weights={"acme": 3})
+        future = scheduler.submit({"url": "http://example.com/"}, tenant="acme", priority=RenderScheduler.INTERACTIVE)
+        response = future.result()
+    """
+
+    INTERACTIVE = 0
+    DEFAULT = 5
+    BULK = 10
+
+    def __init__(self, client, *, max_concurrency=8, tenant_weights=None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.tenant_weights = dict(tenant_weights or {})
+        self.in_flight = 0
+        self._queues = {}
+        self._virtual_times = collections.defaultdict(float)
+        self._finish_tags = collections.defaultdict(float)
+        self._depths = collections.Counter()
+        self._wait_times = collections.defaultdict(
+            lambda: LatencyHistogram(min_samples=1)
+        )
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._workers = []
+        self._shutdown = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def submit(
+        self, options, *, tenant="default", priority=DEFAULT, method="get"
+    ):
+        """
+            Queues a request and returns a concurrent.futures.Future of its response.
+
+            :param options: dictionary of options passed to the client method.
+
+            :param tenant: (Optional) name of the tenant the request belongs to.
+
+            :param priority: (Optional) priority class, lower is more urgent.
+            eg: RenderScheduler.INTERACTIVE, RenderScheduler.DEFAULT or RenderScheduler.BULK
+
+            :param method: (Optional) client method to call: "get", "head", "post" or "delete". Defaults to "get".
+        """
+
+        future = concurrent.futures.Future()
+        weight = self.tenant_weights.get(tenant, 1)
+
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit after shutdown")
+
+            # Weighted fair queuing: a request finishes, in virtual time,
+            # 1 / weight after the later of now and the tenant's last request.
+            key = (priority, tenant)
+            finish_tag = (
+                max(self._virtual_times[priority], self._finish_tags[key])
+                + 1.0 / weight
+            )
+            self._finish_tags[key] = finish_tag
+
+            heapq.heappush(
+                self._queues.setdefault(priority, []),
+                (
+                    finish_tag,
+                    next(self._sequence),
+                    tenant,
+                    time.monotonic(),
+                    method,
+                    options,
+                    future,
+                ),
+            )
+            self._depths[key] += 1
+            self._start_worker()
+            self._condition.notify()
+
+        return future
+
+    def metrics(self):
+        """
+            Returns a dictionary describing the queues, for monitoring:
+            the number of requests in flight, the queue depth per priority and
+            per tenant, and the p50/p95 queue wait time, in seconds, per priority.
+        """
+
+        with self._condition:
+            depth_by_priority = collections.Counter()
+            depth_by_tenant = collections.Counter()
+
+            for (priority, tenant), depth in self._depths.items():
+                depth_by_priority[priority] += depth
+                depth_by_tenant[tenant] += depth
+
+            return {
+                "in_flight": self.in_flight,
+                "queue_depth_by_priority": dict(depth_by_priority),
+                "queue_depth_by_tenant": dict(depth_by_tenant),
+                "wait_time_by_priority": {
+                    priority: {
+                        "p50": histogram.percentile(50),
+                        "p95": histogram.percentile(95),
+                    }
+                    for priority, histogram in self._wait_times.items()
+                },
+            }
+
+    def shutdown(self, wait=True):
+        """
+            Stops the workers once the queued requests have been sent.
+        """
+
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    # private
+
+    def _start_worker(self):
+        if len(self._workers) < self.max_concurrency and len(
+            self._workers
+        ) < self.in_flight + sum(self._depths.values()):
+            worker = threading.Thread(
+                target=self._work,
+                name=f"urlbox-scheduler-{len(self._workers)}",
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._shutdown or any(self._queues.values())
+                )
+
+                if not any(self._queues.values()):
+                    return
+
+                priority = min(p for p, q in self._queues.items() if q)
+                (
+                    finish_tag,
+                    _,
+                    tenant,
+                    queued_at,
+                    method,
+                    options,
+                    future,
+                ) = heapq.heappop(self._queues[priority])
+
+                self._virtual_times[priority] = finish_tag
+                self._depths[(priority, tenant)] -= 1
+
+                if not self._depths[(priority, tenant)]:
+                    del self._depths[(priority, tenant)]
+
+                self._wait_times[priority].record(
+                    time.monotonic() - queued_at
+                )
+
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                self.in_flight += 1
+
+            try:
+                future.set_result(getattr(self.client, method)(options))
+            except Exception as error:
+                future.set_exception(error)
+            finally:
+                with self._condition:
+                    self.in_flight -= 1
@@ -0,0 +1,285 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from hashlib import sha256
+from urlbox.render_key import render_key
+from urlbox.render_result import RenderResult
+
+
+class RenderStore:
+    """
+        Stores the renders of get requests by content, so that byte-identical
+        renders (error pages, parked domains, login walls) are kept once.
+
+        Each render is streamed to a temporary file while its SHA-256 digest
+        is computed, then moved to blobs/<digest> under root, unless a blob
+        with that digest is already stored. A SQLite index maps the options of
+        every render to the digest of its blob, so a stored render is looked
+        up with a single primary key read and no request to the API.
+
+        Blobs are reference counted. Replacing or removing the render of some
+        options only releases its blob: collect_garbage() deletes released
+        blobs in batches of limit, so cleaning up a large store never blocks
+        renders for long.
+
+        :param client: the UrlboxClient (or UrlboxPoolClient) to render with.
+
+        :param root: directory the blobs, and by default the index, are kept in.
+
+        :param index_path: (Optional) path of the SQLite index. Defaults to index.sqlite3 in root.
+
+        Example:
+        store = RenderStore(urlbox_client, "renders/")
+        result = store.get({"url": "http://example.com/"})
+        result.file_path  # renders/blobs/3f/a9c4...
+        store.collect_garbage(limit=1000)
+    """
+
+    def __init__(self, client, root, *, index_path=None):
+        self.client = client
+        self.root = root
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self._lock = threading.Lock()
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._db = sqlite3.connect(
+            index_path or os.path.join(root, "index.sqlite3"),
+            check_same_thread=False,
+        )
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS renders ("
+            "key TEXT PRIMARY KEY, digest TEXT, content_type TEXT, "
+            "stored_at REAL);"
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "digest TEXT PRIMARY KEY, size INTEGER, refs INTEGER, "
+            "released_at REAL);"
+            "CREATE INDEX IF NOT EXISTS released_blobs "
+            "ON blobs (released_at) WHERE refs = 0;"
+        )
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, options, refresh=False):
+        """
+            Returns the stored render of options as a RenderResult, rendering
+            and storing it with client.get first if it is not stored yet.
+
+            The file_path of the result is the path of its blob, which is
+            shared by every identical render: read it, do not modify it.
+            Failed renders are returned without being stored, with their
+            error body as content.
+
+            :param options: dictionary of options, as for UrlboxClient.get.
+
+            :param refresh: (Optional) render again even if a render is stored. Defaults to False.
+        """
+
+        if not refresh:
+            result = self.lookup(options)
+
+            if result is not None:
+                return result
+
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+
+        try:
+            with open(tmp_path, "wb") as file:
+                writer = _HashingWriter(file)
+                result = self.client.get(
+                    options, lean=True, destination=writer
+                )
+
+            if result.ok:
+                result.file_path = self._store(
+                    render_key("get", options),
+                    writer.digest.hexdigest(),
+                    writer.size,
+                    result.content_type,
+                    tmp_path,
+                )
+            else:
+                # Keep the error body, eg: for result.json().
+                with open(tmp_path, "rb") as file:
+                    result.content = file.read()
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return result
+
+    def lookup(self, options):
+        """
+            Returns the stored render of options as a RenderResult, or None
+            if it is not stored. Never sends a request.
+        """
+
+        with self._lock:
+            stored = self._db.execute(
+                "SELECT digest, content_type FROM renders WHERE key = ?",
+                (render_key("get", options),),
+            ).fetchone()
+
+        if stored is None:
+            return None
+
+        return RenderResult(
+            200, content_type=stored[1], file_path=self._blob_path(stored[0])
+        )
+
+    def remove(self, options):
+        """
+            Forgets the render of options and releases its blob, to be
+            deleted by collect_garbage() once no other render uses it.
+            Returns whether a render was stored.
+        """
+
+        key = render_key("get", options)
+
+        with self._lock, self._db:
+            stored = self._db.execute(
+                "SELECT digest FROM renders WHERE key = ?", (key,)
+            ).fetchone()
+
+            if stored is None:
+                return False
+
+            self._db.execute("DELETE FROM renders WHERE key = ?", (key,))
+            self._release(stored[0])
+
+        return True
+
+    def collect_garbage(self, limit=100, grace_seconds=0):
+        """
+            Deletes up to limit blobs no render uses anymore, released at
+            least grace_seconds ago, oldest first, and returns how many were
+            deleted. Call it repeatedly, eg: from a periodic job, to clean up
+            a large store a batch at a time.
+        """
+
+        with self._lock, self._db:
+            digests = [
+                row[0]
+                for row in self._db.execute(
+                    "SELECT digest FROM blobs WHERE refs = 0 "
+                    "AND released_at <= ? ORDER BY released_at LIMIT ?",
+                    (time.time() - grace_seconds, limit),
+                )
+            ]
+
+            self._db.executemany(
+                "DELETE FROM blobs WHERE digest = ?",
+                [(digest,) for digest in digests],
+            )
+
+            for digest in digests:
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+
+        return len(digests)
+
+    def stats(self):
+        """
+            Returns a dictionary describing the store: the number of renders
+            and blobs, the bytes stored on disk, the bytes the renders would
+            take without deduplication, and the bytes waiting for
+            collect_garbage().
+        """
+
+        with self._lock:
+            renders, logical_bytes = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) "
+                "FROM renders JOIN blobs USING (digest)"
+            ).fetchone()
+            blobs, stored_bytes, released_bytes = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), "
+                "COALESCE(SUM(CASE WHEN refs = 0 THEN size END), 0) FROM blobs"
+            ).fetchone()
+
+        return {
+            "renders": renders,
+            "blobs": blobs,
+            "stored_bytes": stored_bytes,
+            "logical_bytes": logical_bytes,
+            "released_bytes": released_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # private
+
+    def _store(self, key, digest, size, content_type, tmp_path):
+        blob_path = self._blob_path(digest)
+
+        with self._lock, self._db:
+            blob = self._db.execute(
+                "SELECT refs FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+
+            # When an identical render is already stored, the new copy is
+            # dropped with the temporary file.
+            if blob is None or not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(tmp_path, blob_path)
+
+            stored = self._db.execute(
+                "SELECT digest FROM renders WHERE key = ?", (key,)
+            ).fetchone()
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO renders VALUES (?, ?, ?, ?)",
+                (key, digest, content_type, time.time()),
+            )
+
+            if stored is not None and stored[0] == digest:
+                return blob_path
+
+            if blob is None:
+                self._db.execute(
+                    "INSERT INTO blobs VALUES (?, ?, 1, NULL)", (digest, size)
+                )
+            else:
+                self._db.execute(
+                    "UPDATE blobs SET refs = refs + 1, released_at = NULL "
+                    "WHERE digest = ?",
+                    (digest,),
+                )
+
+            if stored is not None:
+                self._release(stored[0])
+
+        return blob_path
+
+    def _release(self, digest):
+        self._db.execute(
+            "UPDATE blobs SET refs = refs - 1, released_at = CASE "
+            "WHEN refs = 1 THEN ? END WHERE digest = ?",
+            (time.time(), digest),
+        )
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blobs_dir, digest[:2], digest[2:])
+
+
+class _HashingWriter:
+    def __init__(self, file):
+        self.file = file
+        self.digest = sha256()
+        self.size = 0
+
+    def write(self, chunk):
+        self.digest.update(chunk)
+        self.size += len(chunk)
+
+        return self.file.write(chunk)
@@ -0,0 +1,152 @@
+import concurrent.futures
+import threading
+import time
+from urlbox.latency_histogram import LatencyHistogram
+
+
+class RequestHedger:
+    """
+        Cuts tail latency by hedging slow requests.
+
+        When a request has not returned within the given latency percentile
+        (tracked from a rolling LatencyHistogram of recent requests), a duplicate
+        request is sent, either to the same host or to alternate_api_host_name,
+        and whichever response arrives first is returned.
+
+        The losing request is cancelled if it has not started yet. A request
+        that is already in flight cannot be interrupted by the requests
+        library, so it is left to finish in the background and its response is
+        closed as soon as it arrives, releasing the connection back to the pool.
+
+        :param percentile: (Optional) latency percentile after which a hedge is sent. Defaults to 95.
+
+        :param max_hedge_ratio: (Optional) the maximum number of hedges as a
+        fraction of all requests, to cap the extra renders hedging costs.
+        Defaults to 0.1 (at most 1 hedge for every 10 requests).
+
+        :param alternate_api_host_name: (Optional) host to send hedges to.
+        Defaults to the host of the client.
+
+        :param histogram: (Optional) a LatencyHistogram to track latencies in.
+
+        :param max_workers: (Optional) size of the thread pool the requests run in. Defaults to 32.
+
+        Example:
+        urlbox_client = UrlboxClient(api_key="YOUR_API_KEY", api_secret="YOUR_API_SECRET", hedger=RequestHedger(percentile=95))
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile=95,
+        max_hedge_ratio=0.1,
+        alternate_api_host_name=None,
+        histogram=None,
+        max_workers=32,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+
+        if not 0 <= max_hedge_ratio <= 1:
+            raise ValueError("max_hedge_ratio must be between 0 and 1")
+
+        self.percentile = percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.alternate_api_host_name = alternate_api_host_name
+        # An empty histogram is falsy, as it has a length.
+        self.histogram = (
+            histogram if histogram is not None else LatencyHistogram()
+        )
+        self.requests_count = 0
+        self.hedges_count = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="urlbox-hedge"
+        )
+        self._lock = threading.Lock()
+
+    def call(self, send, url, hedge_url=None):
+        """
+            Calls send(url), hedging it with send(hedge_url) if it is slow.
+
+            :param send: a callable taking a url and returning a requests.Response.
+
+            :param url: the url of the primary request.
+
+            :param hedge_url: (Optional) the url of the hedge request. Defaults to url.
+        """
+
+        with self._lock:
+            self.requests_count += 1
+
+        delay = self.histogram.percentile(self.percentile)
+        primary = self._submit(send, url)
+
+        if delay is not None:
+            done, _ = concurrent.futures.wait([primary], timeout=delay)
+
+            if not done and self._take_hedge():
+                hedge = self._submit(send, hedge_url or url)
+
+                return self._first_successful(primary, hedge)
+
+        return primary.result()
+
+    def shutdown(self, wait=True):
+        """
+            Releases the thread pool used to run requests.
+        """
+
+        self._executor.shutdown(wait=wait)
+
+    # private
+
+    def _submit(self, send, url):
+        def timed_send():
+            # Timed from when a worker picks the request up, so time spent
+            # queued behind other requests does not inflate the percentiles
+            # hedges are sent after.
+            started_at = time.monotonic()
+            response = send(url)
+            self.histogram.record(time.monotonic() - started_at)
+
+            return response
+
+        return self._executor.submit(timed_send)
+
+    def _take_hedge(self):
+        with self._lock:
+            if (
+                self.hedges_count + 1
+                > self.requests_count * self.max_hedge_ratio
+            ):
+                return False
+
+            self.hedges_count += 1
+
+            return True
+
+    def _first_successful(self, primary, hedge):
+        pending = {primary, hedge}
+
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        self._cancel(loser)
+
+                    return future.result()
+
+        # Both requests failed: surface the error of the primary request
+        return primary.result()
+
+    def _cancel(self, future):
+        if not future.cancel():
+            future.add_done_callback(self._close_response)
+
+    def _close_response(self, future):
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
@@ -0,0 +1,288 @@
+import contextlib
+import mmap
+import os
+import struct
+import threading
+import time
+from urlbox.render_budget_exceeded_error import RenderBudgetExceededError
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# tokens, updated_at, day, renders_today, renders_used, renders_allowed
+STATE = struct.Struct("<ddqqqq")
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class SharedRateLimiter:
+    """
+        Rate limiter and render budget shared by every process on a host.
+
+        The state lives in a small memory mapped file, updated under an
+        exclusive flock, so every worker process (eg: gunicorn or celery
+        workers) that opens the same path draws from the same token bucket and
+        the same daily render budget, whatever client instance it uses.
+
+        Renders consumed are tracked from the X-Renders-Used and
+        X-Renders-Allowed headers of Urlbox responses, so cached screenshots,
+        which are free, are not counted. Once daily_budget renders have been
+        used today (UTC), or the account's quota is used up, acquire() raises a
+        RenderBudgetExceededError instead of sending more requests.
+        An instance can be shared by every thread of a process.
+        Requires fcntl, so only works on Unix.
+
+        :param path: path of the state file, created if needed, eg: "/tmp/urlbox.limiter".
+
+        :param rate: (Optional) requests allowed per second, across all processes. Defaults to no limit.
+
+        :param burst: (Optional) requests allowed back to back after a pause. Defaults to 1.
+
+        :param daily_budget: (Optional) renders allowed per UTC day, across all processes. Defaults to no budget.
+
+        Example:
+        rate_limiter = SharedRateLimiter("/tmp/urlbox.limiter", rate=20, daily_budget=50_000)
+        urlbox_client = UrlboxClient(api_key="YOUR_API_KEY", rate_limiter=rate_limiter)
+    """
+
+    def __init__(self, path, *, rate=None, burst=1, daily_budget=None):
+        if fcntl is None:
+            raise ImportError("SharedRateLimiter requires fcntl (Unix only)")
+
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.path = str(path)
+        self.rate = rate
+        self.burst = burst
+        self.daily_budget = daily_budget
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        with self._locked():
+            if os.fstat(self._fd).st_size < STATE.size:
+                os.ftruncate(self._fd, STATE.size)
+                os.pwrite(
+                    self._fd,
+                    STATE.pack(burst, time.time(), self._today(), 0, -1, -1),
+                    0,
+                )
+
+        self._map = mmap.mmap(self._fd, STATE.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def acquire(self, timeout=None):
+        """
+            Takes a token, blocking until one is available.
+
+            Raises a RenderBudgetExceededError if the render budget is used up,
+            or a TimeoutError, without taking a token, if none would be
+            available within timeout seconds.
+        """
+
+        with self._locked():
+            state = self._read()
+            self._raise_if_over_budget(state)
+
+            if self.rate is None:
+                return
+
+            tokens = self._refill(state) - 1
+            wait = -tokens / self.rate
+
+            if timeout is not None and wait > timeout:
+                raise TimeoutError("Timed out waiting for the rate limiter")
+
+            self._write(state, tokens=tokens)
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def try_acquire(self):
+        """
+            Takes a token and returns True if one is available right now and
+            the render budget is not used up, or returns False straight away.
+        """
+
+        with self._locked():
+            state = self._read()
+
+            if self._over_budget(state):
+                return False
+
+            if self.rate is None:
+                return True
+
+            tokens = self._refill(state)
+
+            if tokens < 1:
+                return False
+
+            self._write(state, tokens=tokens - 1)
+
+            return True
+
+    def budget_available(self):
+        """
+            Fast check, without locking, of whether the render budget allows
+            more renders right now.
+        """
+
+        return not self._over_budget(self._read())
+
+    def record(self, response):
+        """
+            Records the renders consumed by a Urlbox response, from its
+            X-Renders-Used and X-Renders-Allowed headers.
+        """
+
+        used = _int_header(response, "X-Renders-Used")
+        allowed = _int_header(response, "X-Renders-Allowed")
+
+        if used is None:
+            return
+
+        with self._locked():
+            state = self._read()
+            previous_used = state["renders_used"]
+            renders_today = state["renders_today"]
+
+            if previous_used < 0:
+                # No reference yet: count this response's own render.
+                previous_used = max(used - 1, 0)
+            elif used <= previous_used // 2:
+                # A new billing period started.
+                previous_used = used
+
+            if used > previous_used:
+                # Responses can arrive out of order: only count renders past
+                # the highest usage seen so far.
+                renders_today += used - previous_used
+                previous_used = used
+
+            self._write(
+                state,
+                renders_today=renders_today,
+                renders_used=previous_used,
+                renders_allowed=state["renders_allowed"]
+                if allowed is None
+                else allowed,
+            )
+
+    def metrics(self):
+        """
+            Returns a dictionary describing the shared state, for monitoring.
+        """
+
+        state = self._read()
+
+        return {
+            "tokens": self._refill(state) if self.rate else None,
+            "renders_today": state["renders_today"],
+            "renders_used": _or_none(state["renders_used"]),
+            "renders_allowed": _or_none(state["renders_allowed"]),
+            "budget_remaining": None
+            if self.daily_budget is None
+            else max(0, self.daily_budget - state["renders_today"]),
+        }
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    # private
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # flock excludes other processes only: threads of this process share
+        # the file descriptor, so the thread lock excludes them.
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _read(self):
+        (
+            tokens,
+            updated_at,
+            day,
+            renders_today,
+            used,
+            allowed,
+        ) = STATE.unpack_from(self._map)
+
+        if day != self._today():
+            day, renders_today = self._today(), 0
+
+        return {
+            "tokens": tokens,
+            "updated_at": updated_at,
+            "day": day,
+            "renders_today": renders_today,
+            "renders_used": used,
+            "renders_allowed": allowed,
+        }
+
+    def _write(self, state, **changes):
+        state = {**state, **changes}
+        STATE.pack_into(
+            self._map,
+            0,
+            state["tokens"],
+            state["updated_at"],
+            state["day"],
+            state["renders_today"],
+            state["renders_used"],
+            state["renders_allowed"],
+        )
+
+    def _refill(self, state):
+        now = time.time()
+        tokens = min(
+            self.burst,
+            state["tokens"] + (now - state["updated_at"]) * self.rate,
+        )
+        state["updated_at"] = now
+
+        return tokens
+
+    def _over_budget(self, state):
+        if (
+            self.daily_budget is not None
+            and state["renders_today"] >= self.daily_budget
+        ):
+            return True
+
+        return 0 <= state["renders_allowed"] <= state["renders_used"]
+
+    def _raise_if_over_budget(self, state):
+        if self._over_budget(state):
+            raise RenderBudgetExceededError(
+                "Render budget exceeded: "
+                f"{state['renders_today']} renders used today"
+            )
+
+    def _today(self):
+        return int(time.time() // SECONDS_PER_DAY)
+
+
+def _int_header(response, name):
+    value = response.headers.get(name)
+
+    try:
+        return None if value is None else int(value)
+    except ValueError:
+        return None
+
+
+def _or_none(value):
+    return None if value < 0 else value
@@ -0,0 +1,221 @@
+import collections
+import concurrent.futures
+import gzip
+import io
+import os
+import requests
+import urllib.parse
+import xml.etree.ElementTree as ElementTree
+from urlbox.bloom_filter import BloomFilter
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class SitemapReader:
+    """
+        Streams the page URLs out of a sitemap, as render options.
+
+        The XML is parsed incrementally as it is read, and each entry is
+        discarded once its URL has been yielded, so a multi-GB sitemap is
+        processed in constant memory and the first URLs come out as soon as
+        the first bytes arrive. Gzipped sitemaps are detected and decompressed
+        on the fly, and sitemap indexes are followed recursively, depth first.
+
+        Each URL is yielded once: duplicates are dropped with a BloomFilter,
+        which may very rarely drop a URL it has not seen (about error_rate of
+        them) but never grows past its initial size.
+
+        :param source: path or http(s) URL of a sitemap or sitemap index, plain or gzipped.
+
+        :param options: (Optional) options added to every URL's render options, eg: {"format": "pdf"}.
+
+        :param session: (Optional) requests.Session used to download sitemaps.
+
+        :param dedup: (Optional) drop duplicate URLs. Defaults to True.
+
+        :param capacity: (Optional) number of URLs the dedup filter is sized for. Defaults to 10,000,000.
+
+        :param error_rate: (Optional) share of URLs the dedup filter may wrongly drop. Defaults to 0.001.
+
+        :param max_depth: (Optional) how many levels of nested sitemap indexes to follow. Defaults to 5.
+
+        :param timeout: (Optional) seconds to wait for a sitemap download to respond. Defaults to 60.
+
+        Example:
+        reader = SitemapReader("https://example.com/sitemap_index.xml.gz", options={"full_page": True})
+        for options, response in reader.render(urlbox_client, max_workers=16):
+            ...
+    """
+
+    def __init__(
+        self,
+        source,
+        *,
+        options=None,
+        session=None,
+        dedup=True,
+        capacity=10_000_000,
+        error_rate=0.001,
+        max_depth=5,
+        timeout=60,
+    ):
+        self.source = str(source)
+        self.options = dict(options or {})
+        self.session = session or requests.Session()
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.sitemaps_read = 0
+        self.duplicates_count = 0
+        self.dedup = dedup
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+    def __iter__(self):
+        return self.options_iter()
+
+    def urls(self):
+        """
+            Yields every page URL in the sitemap, without duplicates.
+        """
+
+        # A fresh filter per pass, so the reader can be iterated again.
+        seen = (
+            BloomFilter(self.capacity, self.error_rate) if self.dedup else None
+        )
+
+        for url in self._read(self.source, 0, set()):
+            if seen is None or seen.add(url):
+                yield url
+            else:
+                self.duplicates_count += 1
+
+    def options_iter(self):
+        """
+            Yields the render options of every page in the sitemap.
+        """
+
+        for url in self.urls():
+            yield {**self.options, "url": url}
+
+    def render(self, client, *, method="get", max_workers=8):
+        """
+            Renders every page in the sitemap with client, max_workers at a
+            time, yielding (options, response) tuples as renders complete.
+
+            Only about twice max_workers URLs are read ahead of the renders,
+            so rendering starts straight away and memory use stays flat.
+            A render that raises yields the exception in place of the response.
+        """
+
+        render = getattr(client, method)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix="urlbox-sitemap"
+        ) as executor:
+            pending = collections.OrderedDict()
+            options_iter = self.options_iter()
+
+            while True:
+                for options in options_iter:
+                    pending[executor.submit(render, options)] = options
+
+                    if len(pending) >= max_workers * 2:
+                        break
+
+                if not pending:
+                    return
+
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+
+                for future in done:
+                    options = pending.pop(future)
+
+                    try:
+                        yield options, future.result()
+                    except Exception as error:
+                        yield options, error
+
+    # private
+
+    def _read(self, source, depth, visited):
+        if source in visited:
+            return
+
+        visited.add(source)
+        self.sitemaps_read += 1
+
+        with self._open(source) as stream:
+            events = ElementTree.iterparse(stream, events=("start", "end"))
+            _, root = next(events)
+            index = _local_name(root.tag) == "sitemapindex"
+
+            for event, element in events:
+                if event != "end" or _local_name(element.tag) not in (
+                    "url",
+                    "sitemap",
+                ):
+                    continue
+
+                location = next(
+                    (
+                        child.text.strip()
+                        for child in element
+                        if _local_name(child.tag) == "loc" and child.text
+                    ),
+                    None,
+                )
+                # Drop the entries already processed, so memory stays flat.
+                root.clear()
+
+                if location is None:
+                    continue
+
+                if not index:
+                    yield location
+                elif depth < self.max_depth:
+                    yield from self._read(
+                        self._resolve(source, location), depth + 1, visited
+                    )
+
+    def _open(self, source):
+        if source.startswith(("http://", "https://")):
+            response = self.session.get(
+                source, stream=True, timeout=self.timeout
+            )
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # Keep the body readable through the buffer once fully received.
+            response.raw.auto_close = False
+            stream = io.BufferedReader(response.raw)
+        else:
+            stream = open(source, "rb")
+
+        if stream.peek(2)[:2] == GZIP_MAGIC:
+            return _GzipStream(stream)
+
+        return stream
+
+    def _resolve(self, source, location):
+        if source.startswith(("http://", "https://")):
+            return urllib.parse.urljoin(source, location)
+
+        if "://" in location:
+            return location
+
+        return os.path.join(os.path.dirname(source), location)
+
+
+class _GzipStream(io.BufferedReader):
+    def __init__(self, stream):
+        super().__init__(gzip.GzipFile(fileobj=stream))
+        self._stream = stream
+
+    def close(self):
+        super().close()
+        self._stream.close()
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
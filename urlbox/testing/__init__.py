@@ -0,0 +1,7 @@
+from urlbox.testing.fake_urlbox_server import (
+    FakeUrlboxServer,
+    constant_latency,
+    lognormal_latency,
+    uniform_latency,
+)
+from urlbox.testing.load_generator import LoadGenerator, LoadReport
@@ -0,0 +1,4 @@
+from urlbox.testing.load_generator import main
+
+if __name__ == "__main__":
+    main()
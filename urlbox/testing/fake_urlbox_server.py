@@ -0,0 +1,511 @@
+import datetime
+import gzip
+import hmac
+import http.server
+import io
+import json
+import random
+import struct
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+import zlib
+from hashlib import sha1, sha256
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "pdf": "application/pdf",
+    "svg": "image/svg+xml",
+    "html": "text/html; charset=utf-8",
+}
+
+TEXT_FORMATS = ("html", "svg")
+
+
+def constant_latency(seconds):
+    """
+        A latency distribution always returning seconds.
+    """
+
+    return lambda: seconds
+
+
+def uniform_latency(low, high):
+    """
+        A latency distribution uniformly spread between low and high seconds.
+    """
+
+    return lambda: random.uniform(low, high)
+
+
+def lognormal_latency(median, sigma=0.5, maximum=None):
+    """
+        A long-tailed latency distribution, like real render times:
+        most renders take around median seconds, a few take many times longer.
+    """
+
+    def latency():
+        seconds = random.lognormvariate(0, sigma) * median
+
+        return seconds if maximum is None else min(seconds, maximum)
+
+    return latency
+
+
+class FakeUrlboxServer:
+    """
+        A local stand-in for the Urlbox API, for load tests, benchmarks and
+        tests that need real sockets.
+
+        It serves the same endpoints as the Urlbox API:
+        GET and HEAD /{api_key}/{token}/{format}, DELETE /{api_key}/{format},
+        POST /render and GET /render/{renderId}, optionally prefixed with /v1.
+        Request signatures (the token and the Bearer api_secret) are verified,
+        renders return fake bodies of image_size bytes (PNG renders are valid
+        PNG images whose pixels depend on the url, html and svg renders are
+        gzipped when the request accepts it), and POST renders with a
+        webhook_url are posted back signed with webhook_secret, as
+        webhook_validator expects.
+
+        :param api_key: the API key requests must use.
+
+        :param api_secret: (Optional) the API secret signed requests are verified with.
+        Unsigned requests are accepted, as they are by the Urlbox API.
+
+        :param webhook_secret: (Optional) the secret webhook callbacks are signed with.
+
+        :param image_size: (Optional) size in bytes of render bodies. Defaults to 10000.
+
+        :param latency: (Optional) a callable returning the render latency in seconds,
+        eg: lognormal_latency(0.5). Defaults to no latency.
+
+        :param rate_limit_probability: (Optional) probability, between 0 and 1,
+        of answering a render request with a 429. Defaults to 0.
+
+        :param host: (Optional) Defaults to "127.0.0.1".
+
+        :param port: (Optional) Defaults to 0, any free port.
+
+        Example:
+        with FakeUrlboxServer(api_key="KEY", api_secret="SECRET") as server:
+            urlbox_client = UrlboxClient(api_key="KEY", api_secret="SECRET", api_host_name=server.api_host_name)
+            urlbox_client.get({"url": "http://example.com/"})
+    """
+
+    RENDERS_ALLOWED = 1000000
+
+    def __init__(
+        self,
+        *,
+        api_key,
+        api_secret=None,
+        webhook_secret=None,
+        image_size=10000,
+        latency=None,
+        rate_limit_probability=0,
+        host="127.0.0.1",
+        port=0,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.webhook_secret = webhook_secret
+        self.image_size = image_size
+        self.latency = latency
+        self.rate_limit_probability = rate_limit_probability
+        self.renders_used = 0
+        self.requests = []
+        self.renders = {}
+        self._lock = threading.Lock()
+        self._httpd = _FakeUrlboxHTTPServer(
+            (host, port), self._handler_class()
+        )
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def api_host_name(self):
+        """
+            The value to pass as api_host_name to a UrlboxClient.
+        """
+
+        host, port = self._httpd.server_address[:2]
+
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="fake-urlbox-server",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def render_body(self, options, format):
+        """
+            Returns the fake body of a render of options in format.
+        """
+
+        seed = sha256(
+            str(options.get("url") or options.get("html")).encode("utf-8")
+        ).digest()
+
+        if format == "png":
+            return _png(seed, self.image_size)
+        elif format in ("html", "svg"):
+            return _text(seed, format, self.image_size)
+        else:
+            return (seed * (self.image_size // len(seed) + 1))[
+                : self.image_size
+            ]
+
+    # private
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(_FakeUrlboxRequestHandler):
+            fake_server = server
+
+        return Handler
+
+    def _record(self, method, path):
+        with self._lock:
+            self.requests.append((method, path))
+
+    def _use_render(self):
+        with self._lock:
+            self.renders_used += 1
+
+            return self.renders_used
+
+    def _sleep(self):
+        if self.latency is not None:
+            time.sleep(max(0, self.latency()))
+
+    def _rate_limited(self):
+        return (
+            self.rate_limit_probability
+            and random.random() < self.rate_limit_probability
+        )
+
+    def _send_webhook(self, render_id, options, status_url):
+        start_time = _iso_now()
+        self._sleep()
+        payload = {
+            "event": "render.succeeded",
+            "renderId": render_id,
+            "result": {
+                "renderUrl": status_url.replace("/render/", "/renders/")
+            },
+            "meta": {"startTime": start_time, "endTime": _iso_now()},
+        }
+
+        with self._lock:
+            self.renders[render_id] = {
+                "status": "succeeded",
+                "renderId": render_id,
+                "renderUrl": payload["result"]["renderUrl"],
+            }
+
+        if not options.get("webhook_url"):
+            return
+
+        timestamp = int(time.time())
+        payload_json_string = json.dumps(payload, separators=(",", ":"))
+        signature = hmac.new(
+            (self.webhook_secret or "").encode("utf-8"),
+            msg=f"{timestamp}.{payload_json_string}".encode("utf-8"),
+            digestmod=sha256,
+        ).hexdigest()
+        request = urllib.request.Request(
+            options["webhook_url"],
+            data=payload_json_string.encode("utf-8"),
+            headers={
+                "Content-Type": "application/json",
+                "x-urlbox-signature": f"t={timestamp},sha256={signature}",
+            },
+            method="POST",
+        )
+
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except OSError:
+            pass
+
+
+class _FakeUrlboxHTTPServer(http.server.ThreadingHTTPServer):
+    # The default backlog of 5 resets connections when many client threads
+    # connect at once.
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class _FakeUrlboxRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately: without TCP_NODELAY, every
+    # response on a kept-alive connection stalls on a delayed ACK.
+    disable_nagle_algorithm = True
+    fake_server = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_HEAD(self):
+        self._dispatch("HEAD")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    # private
+
+    def _dispatch(self, method):
+        server = self.fake_server
+        parsed = urllib.parse.urlsplit(self.path)
+        parts = [part for part in parsed.path.split("/") if part]
+
+        if parts and parts[0] == "v1":
+            parts = parts[1:]
+
+        server._record(method, parsed.path)
+
+        if method == "POST" and parts == ["render"]:
+            return self._post_render()
+
+        if method == "GET" and len(parts) == 2 and parts[0] == "render":
+            return self._render_status(parts[1])
+
+        if method in ("GET", "HEAD") and len(parts) in (2, 3):
+            return self._render(method, parts, parsed.query)
+
+        if method == "DELETE" and len(parts) == 2:
+            return self._delete(parts)
+
+        self._send_json(404, {"error": {"message": "Not found"}})
+
+    def _render(self, method, parts, query):
+        server = self.fake_server
+
+        if parts[0] != server.api_key:
+            return self._send_json(401, {"error": {"message": "Invalid key"}})
+
+        if len(parts) == 3:
+            token = hmac.new(
+                str.encode(server.api_secret or ""), str.encode(query), sha1
+            ).hexdigest()
+
+            if server.api_secret is None or not hmac.compare_digest(
+                token, parts[1]
+            ):
+                return self._send_json(
+                    401, {"error": {"message": "Invalid token"}}
+                )
+
+        if server._rate_limited():
+            return self._send_json(
+                429,
+                {"error": {"message": "Rate limited"}},
+                {"Retry-After": "1"},
+            )
+
+        format = parts[-1]
+
+        if format not in CONTENT_TYPES:
+            return self._send_json(
+                400, {"error": {"message": "Invalid format"}}
+            )
+
+        options = dict(urllib.parse.parse_qsl(query))
+        server._sleep()
+        body = server.render_body(options, format)
+        headers = self._usage_headers(server._use_render())
+
+        if format in TEXT_FORMATS and "gzip" in self.headers.get(
+            "Accept-Encoding", ""
+        ):
+            # gzip.compress only takes mtime from Python 3.8 on.
+            buffer = io.BytesIO()
+
+            with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as file:
+                file.write(body)
+
+            body = buffer.getvalue()
+            headers["Content-Encoding"] = "gzip"
+
+        self._send(
+            200,
+            body,
+            CONTENT_TYPES[format],
+            headers,
+            include_body=method == "GET",
+        )
+
+    def _delete(self, parts):
+        if parts[0] != self.fake_server.api_key:
+            return self._send_json(401, {"error": {"message": "Invalid key"}})
+
+        self._send_json(200, {"status": "deleted"})
+
+    def _post_render(self):
+        server = self.fake_server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+
+        if (
+            server.api_secret is None
+            or self.headers.get("Authorization")
+            != f"Bearer {server.api_secret}"
+        ):
+            return self._send_json(
+                401, {"error": {"message": "Invalid api_secret"}}
+            )
+
+        if server._rate_limited():
+            return self._send_json(
+                429,
+                {"error": {"message": "Rate limited"}},
+                {"Retry-After": "1"},
+            )
+
+        try:
+            options = json.loads(body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"message": "Invalid JSON"}})
+
+        render_id = str(uuid.uuid4())
+        host, port = self.server.server_address[:2]
+        status_url = f"http://{host}:{port}/v1/render/{render_id}"
+
+        with server._lock:
+            server.renders[render_id] = {
+                "status": "created",
+                "renderId": render_id,
+            }
+
+        server._use_render()
+        threading.Thread(
+            target=server._send_webhook,
+            args=(render_id, options, status_url),
+            daemon=True,
+        ).start()
+
+        self._send_json(
+            201,
+            {
+                "status": "created",
+                "renderId": render_id,
+                "statusUrl": status_url,
+            },
+        )
+
+    def _render_status(self, render_id):
+        with self.fake_server._lock:
+            render = self.fake_server.renders.get(render_id)
+
+        if render is None:
+            return self._send_json(404, {"error": {"message": "Not found"}})
+
+        self._send_json(200, render)
+
+    def _usage_headers(self, renders_used):
+        return {
+            "X-Renders-Used": str(renders_used),
+            "X-Renders-Allowed": str(self.fake_server.RENDERS_ALLOWED),
+            "X-Renders-Reset": "Sun Dec 05 2021 09:58:00 GMT+0000 (Coordinated Universal Time)",
+        }
+
+    def _send_json(self, status_code, payload, headers=None):
+        self._send(
+            status_code,
+            json.dumps(payload).encode("utf-8"),
+            "application/json",
+            headers,
+            include_body=self.command != "HEAD",
+        )
+
+    def _send(
+        self, status_code, body, content_type, headers=None, include_body=True
+    ):
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.end_headers()
+
+        if include_body:
+            self.wfile.write(body)
+
+
+def _iso_now():
+    return (
+        datetime.datetime.utcnow().isoformat(timespec="milliseconds") + "Z"
+    )
+
+
+def _png(seed, size, width=32, height=32):
+    rows = b"".join(
+        b"\x00"
+        + bytes(
+            (seed[(x + y) % len(seed)] + x * 4 + y * 4) % 256
+            for x in range(width)
+        )
+        for y in range(height)
+    )
+
+    def chunk(chunk_type, data):
+        return (
+            struct.pack(">I", len(data))
+            + chunk_type
+            + data
+            + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF)
+        )
+
+    header = chunk(
+        b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    )
+    image = chunk(b"IDAT", zlib.compress(rows))
+    end = chunk(b"IEND", b"")
+    png = b"\x89PNG\r\n\x1a\n" + header + image
+    padding = max(0, size - len(png) - len(end) - 12)
+
+    # Pad with an ancillary chunk so the body is as big as a real render
+    return png + chunk(b"zzPD", b"\x00" * padding) + end
+
+
+def _text(seed, format, size):
+    if format == "svg":
+        opening = '<svg xmlns="http://www.w3.org/2000/svg">'
+        closing = "</svg>"
+    else:
+        opening, closing = "<html><body>", "</body></html>"
+
+    line = f"<p>{seed.hex()}</p>\n"
+    repeat = max(0, size - len(opening) - len(closing)) // len(line)
+
+    return (opening + line * repeat + closing).encode("utf-8")
@@ -0,0 +1,549 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import multiprocessing
+import random
+import threading
+import time
+import tracemalloc
+
+
+class LoadReport:
+    """
+        The results of a LoadGenerator run.
+
+        latencies are in seconds, errors maps each status code (as a string,
+        eg: "429") or exception class name to the number of requests that
+        ended with it, and the cpu/memory figures are those of the client
+        process. When memory is traced, peak_memory_bytes is the most memory
+        allocated at once during the run, and retained_memory_bytes how much
+        more was allocated at its end than at its start.
+    """
+
+    def __init__(
+        self,
+        *,
+        mode,
+        loop,
+        latencies,
+        errors,
+        duration,
+        cpu_seconds,
+        peak_memory_bytes,
+        retained_memory_bytes,
+    ):
+        self.mode = mode
+        self.loop = loop
+        self.latencies = sorted(latencies)
+        self.errors = dict(errors)
+        self.duration = duration
+        self.cpu_seconds = cpu_seconds
+        self.peak_memory_bytes = peak_memory_bytes
+        self.retained_memory_bytes = retained_memory_bytes
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    @property
+    def throughput(self):
+        return self.requests / self.duration if self.duration else 0.0
+
+    @property
+    def cpu_seconds_per_request(self):
+        return self.cpu_seconds / self.requests if self.requests else None
+
+    @property
+    def retained_memory_bytes_per_request(self):
+        if self.retained_memory_bytes is None or not self.requests:
+            return None
+
+        return self.retained_memory_bytes / self.requests
+
+    def percentile(self, percentile):
+        if not self.latencies:
+            return None
+
+        rank = max(1, -(-len(self.latencies) * percentile // 100))
+
+        return self.latencies[int(rank) - 1]
+
+    def as_dict(self):
+        return {
+            "mode": self.mode,
+            "loop": self.loop,
+            "requests": self.requests,
+            "duration": self.duration,
+            "throughput": self.throughput,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "errors": self.errors,
+            "cpu_seconds_per_request": self.cpu_seconds_per_request,
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "retained_memory_bytes_per_request": (
+                self.retained_memory_bytes_per_request
+            ),
+        }
+
+
+class LoadGenerator:
+    """
+        Drives a UrlboxClient with load, to measure how many renders per second
+        a worker can push through it, and at what latency.
+
+        Closed-loop runs keep a fixed number of requests in flight, sending a new
+        request as soon as one completes. Open-loop runs send requests at a fixed
+        rate whether or not earlier ones have completed, the way independent
+        users do; their latencies are measured from when each request was due,
+        so a client falling behind shows up in the percentiles.
+
+        Runs can use a single thread ("sync"), a pool of threads ("threaded")
+        or an asyncio event loop ("async").
+
+        :param client: the UrlboxClient (or UrlboxPoolClient) to drive.
+
+        :param options_factory: (Optional) a callable taking the request number and
+        returning the options to send. Defaults to a different url per request.
+
+        :param method: (Optional) client method to call. Defaults to "get".
+
+        :param trace_memory: (Optional) track peak and retained memory
+        allocations with tracemalloc, which slows the client down. Defaults to False.
+
+        Example:
+        load_generator = LoadGenerator(urlbox_client)
+        report = load_generator.run_closed_loop(concurrency=16, requests=1000)
+        report.throughput, report.percentile(99)
+    """
+
+    MODES = ("sync", "threaded", "async")
+
+    def __init__(
+        self, client, *, options_factory=None, method="get", trace_memory=False
+    ):
+        self.client = client
+        self.options_factory = options_factory or _default_options
+        self.method = method
+        self.trace_memory = trace_memory
+
+    def run_closed_loop(
+        self, *, concurrency=8, requests=None, duration=None, mode="threaded"
+    ):
+        """
+            Keeps concurrency requests in flight until requests have been sent
+            or duration seconds have elapsed, and returns a LoadReport.
+        """
+
+        self._check_run(mode, requests, duration)
+
+        if mode == "sync":
+            concurrency = 1
+
+        counter = _Counter(requests)
+        deadline = None if duration is None else time.monotonic() + duration
+
+        def next_request():
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+            return counter.next()
+
+        return self._run(
+            "closed",
+            mode,
+            lambda record: self._closed_loop(
+                mode, concurrency, next_request, record
+            ),
+        )
+
+    def run_open_loop(
+        self,
+        *,
+        rate,
+        requests=None,
+        duration=None,
+        mode="threaded",
+        poisson=False,
+        max_in_flight=1000,
+    ):
+        """
+            Sends rate requests per second until requests have been sent or
+            duration seconds have elapsed, and returns a LoadReport.
+
+            :param poisson: (Optional) space requests randomly, as a Poisson process,
+            rather than evenly. Defaults to False.
+
+            :param max_in_flight: (Optional) stop sending new requests while this
+            many are in flight, so an overloaded client cannot exhaust memory.
+        """
+
+        self._check_run(mode, requests, duration)
+
+        if mode == "sync":
+            raise ValueError("Open loop runs need the threaded or async mode")
+
+        schedule = _schedule(rate, requests, duration, poisson)
+
+        return self._run(
+            "open",
+            mode,
+            lambda record: self._open_loop(
+                mode, schedule, max_in_flight, record
+            ),
+        )
+
+    # private
+
+    def _check_run(self, mode, requests, duration):
+        if mode not in self.MODES:
+            raise ValueError(
+                f"Unknown mode '{mode}', expected one of {self.MODES}"
+            )
+
+        if requests is None and duration is None:
+            raise ValueError("Either requests or duration is required")
+
+    def _run(self, loop, mode, drive):
+        latencies = []
+        errors = collections.Counter()
+        lock = threading.Lock()
+
+        def record(latency, error):
+            with lock:
+                latencies.append(latency)
+
+                if error is not None:
+                    errors[error] += 1
+
+        if self.trace_memory:
+            tracemalloc.start()
+            memory_at_start = tracemalloc.get_traced_memory()[0]
+
+        cpu_started_at = time.process_time()
+        started_at = time.monotonic()
+
+        try:
+            drive(record)
+            duration = time.monotonic() - started_at
+            cpu_seconds = time.process_time() - cpu_started_at
+            peak_memory_bytes = retained_memory_bytes = None
+
+            if self.trace_memory:
+                current, peak_memory_bytes = tracemalloc.get_traced_memory()
+                retained_memory_bytes = current - memory_at_start
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+
+        return LoadReport(
+            mode=mode,
+            loop=loop,
+            latencies=latencies,
+            errors=errors,
+            duration=duration,
+            cpu_seconds=cpu_seconds,
+            peak_memory_bytes=peak_memory_bytes,
+            retained_memory_bytes=retained_memory_bytes,
+        )
+
+    def _send(self, number, due_at, record):
+        try:
+            response = getattr(self.client, self.method)(
+                self.options_factory(number)
+            )
+            error = self._error(response)
+        except Exception as exception:
+            error = type(exception).__name__
+
+        record(time.monotonic() - due_at, error)
+
+    async def _asend(self, number, due_at, record):
+        # Use the client's coroutine, eg: get_async, when it has one
+        send_async = getattr(self.client, f"{self.method}_async", None)
+
+        if send_async is None:
+            loop = asyncio.get_running_loop()
+
+            return await loop.run_in_executor(
+                None, self._send, number, due_at, record
+            )
+
+        try:
+            response = await send_async(self.options_factory(number))
+            error = self._error(response)
+        except Exception as exception:
+            error = type(exception).__name__
+
+        record(time.monotonic() - due_at, error)
+
+    def _error(self, response):
+        if response.status_code >= 400:
+            return str(response.status_code)
+
+        return None
+
+    def _closed_loop(self, mode, concurrency, next_request, record):
+        def worker():
+            while True:
+                number = next_request()
+
+                if number is None:
+                    return
+
+                self._send(number, time.monotonic(), record)
+
+        if mode == "sync":
+            worker()
+        elif mode == "threaded":
+            threads = [
+                threading.Thread(target=worker) for _ in range(concurrency)
+            ]
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+        else:
+            self._run_async(
+                self._async_closed_loop(concurrency, next_request, record),
+                concurrency,
+            )
+
+    async def _async_closed_loop(self, concurrency, next_request, record):
+        async def worker():
+            while True:
+                number = next_request()
+
+                if number is None:
+                    return
+
+                await self._asend(number, time.monotonic(), record)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    def _open_loop(self, mode, schedule, max_in_flight, record):
+        if mode == "async":
+            return self._run_async(
+                self._async_open_loop(schedule, max_in_flight, record),
+                max_in_flight,
+            )
+
+        in_flight = threading.BoundedSemaphore(max_in_flight)
+
+        def send(number, due_at):
+            try:
+                self._send(number, due_at, record)
+            finally:
+                in_flight.release()
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_in_flight
+        ) as executor:
+            for number, due_at in schedule:
+                delay = due_at - time.monotonic()
+
+                if delay > 0:
+                    time.sleep(delay)
+
+                in_flight.acquire()
+                executor.submit(send, number, due_at)
+
+    async def _async_open_loop(self, schedule, max_in_flight, record):
+        loop = asyncio.get_running_loop()
+        in_flight = asyncio.Semaphore(max_in_flight)
+        # Only tasks still in flight are kept, so long runs do not hold on to
+        # every finished task.
+        tasks = set()
+
+        async def send(number, due_at):
+            try:
+                await self._asend(number, due_at, record)
+            finally:
+                in_flight.release()
+
+        for number, due_at in schedule:
+            delay = due_at - time.monotonic()
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            await in_flight.acquire()
+            task = loop.create_task(send(number, due_at))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks)
+
+    def _run_async(self, coroutine, max_workers):
+        # Client methods without a coroutine variant are blocking, so the
+        # event loop hands them to a thread pool sized for the requests in
+        # flight.
+        loop = asyncio.new_event_loop()
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers
+        )
+        loop.set_default_executor(executor)
+
+        try:
+            loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+            executor.shutdown()
+
+
+class _Counter:
+    def __init__(self, limit):
+        self.limit = limit
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            if self.limit is not None and self.value >= self.limit:
+                return None
+
+            self.value += 1
+
+            return self.value - 1
+
+
+def _schedule(rate, requests, duration, poisson):
+    started_at = time.monotonic()
+    offset = 0.0
+    number = 0
+
+    while (requests is None or number < requests) and (
+        duration is None or offset < duration
+    ):
+        yield number, started_at + offset
+        number += 1
+
+        if poisson:
+            offset += random.expovariate(rate)
+        else:
+            offset = number / rate
+
+
+def _default_options(number):
+    return {"url": f"http://example.com/{number}"}
+
+
+def _serve(api_key, api_secret, fake_latency, host_names, stop):
+    from urlbox.testing.fake_urlbox_server import (
+        FakeUrlboxServer,
+        lognormal_latency,
+    )
+
+    with FakeUrlboxServer(
+        api_key=api_key,
+        api_secret=api_secret,
+        latency=lognormal_latency(fake_latency) if fake_latency else None,
+    ) as server:
+        host_names.put(server.api_host_name)
+        stop.wait()
+
+
+def main(argv=None):
+    """
+        Command line entry point, eg:
+        python -m urlbox.testing --fake-server --concurrency 16 --requests 1000
+    """
+
+    from urlbox import UrlboxClient
+
+    parser = argparse.ArgumentParser(
+        description="Load test a UrlboxClient and report its capacity."
+    )
+    parser.add_argument("--api-key", default="load-test-key")
+    parser.add_argument("--api-secret", default="load-test-secret")
+    parser.add_argument("--api-host-name")
+    parser.add_argument(
+        "--fake-server",
+        action="store_true",
+        help="run against a local FakeUrlboxServer",
+    )
+    parser.add_argument(
+        "--fake-latency",
+        type=float,
+        default=0.0,
+        help="median render latency of the fake server, in seconds",
+    )
+    parser.add_argument(
+        "--mode", choices=LoadGenerator.MODES, default="threaded"
+    )
+    parser.add_argument("--method", default="get")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="requests per second: runs an open loop instead of a closed loop",
+    )
+    parser.add_argument("--poisson", action="store_true")
+    parser.add_argument("--requests", type=int)
+    parser.add_argument("--duration", type=float)
+    parser.add_argument("--trace-memory", action="store_true")
+    arguments = parser.parse_args(argv)
+
+    if arguments.requests is None and arguments.duration is None:
+        arguments.requests = 1000
+
+    def run(api_host_name):
+        client = UrlboxClient(
+            api_key=arguments.api_key,
+            api_secret=arguments.api_secret,
+            api_host_name=api_host_name,
+        )
+        load_generator = LoadGenerator(
+            client,
+            method=arguments.method,
+            trace_memory=arguments.trace_memory,
+        )
+
+        if arguments.rate is None:
+            return load_generator.run_closed_loop(
+                concurrency=arguments.concurrency,
+                requests=arguments.requests,
+                duration=arguments.duration,
+                mode=arguments.mode,
+            )
+        else:
+            return load_generator.run_open_loop(
+                rate=arguments.rate,
+                requests=arguments.requests,
+                duration=arguments.duration,
+                mode=arguments.mode,
+                poisson=arguments.poisson,
+            )
+
+    if arguments.fake_server:
+        # The fake server runs in a process of its own, so the CPU time and
+        # memory it uses are not counted as the client's.
+        context = multiprocessing.get_context("spawn")
+        host_names = context.Queue()
+        stop = context.Event()
+        server = context.Process(
+            target=_serve,
+            args=(
+                arguments.api_key,
+                arguments.api_secret,
+                arguments.fake_latency,
+                host_names,
+                stop,
+            ),
+            daemon=True,
+        )
+        server.start()
+
+        try:
+            report = run(host_names.get(timeout=30))
+        finally:
+            stop.set()
+            server.join(5)
+    else:
+        report = run(arguments.api_host_name)
+
+    print(json.dumps(report.as_dict(), indent=2))
@@ -0,0 +1,5 @@
+from urlbox.transports.transport import Transport
+from urlbox.transports.http2_transport import Http2Transport
+from urlbox.transports.in_memory_transport import InMemoryTransport
+from urlbox.transports.requests_transport import RequestsTransport
+from urlbox.transports.urllib3_transport import Urllib3Transport
@@ -0,0 +1,212 @@
+import asyncio
+import contextlib
+import requests
+import threading
+from urlbox.transports.transport import Transport, build_response
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class Http2Transport(Transport):
+    """
+        Sends requests over HTTP/2 with httpx, multiplexing many concurrent
+        requests to the same host over a few connections instead of opening a
+        socket and TLS session per request in flight.
+
+        Supports both request() and, natively on the event loop, arequest(),
+        so it can be used from both UrlboxClient.get and UrlboxClient.get_async.
+        Requires httpx with HTTP/2 support: pip install "httpx[http2]"
+
+        Connection errors and timeouts are raised as their requests.exceptions
+        equivalents, so callers handle every transport the same way.
+
+        :param max_connections: (Optional) connections kept per host.
+        Each carries up to the server's limit of concurrent streams, typically 100.
+        Defaults to 4.
+
+        :param verify: (Optional) verify TLS certificates, or the path to a CA bundle. Defaults to True.
+
+        Example:
+        urlbox_client = UrlboxClient(api_key="YOUR_API_KEY", transport=Http2Transport())
+    """
+
+    def __init__(self, *, max_connections=4, verify=True):
+        if httpx is None:
+            raise ImportError(
+                'Http2Transport requires httpx with HTTP/2 support: pip install "httpx[http2]"'
+            )
+
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._verify = verify
+        self._client = httpx.Client(
+            http2=True, limits=self._limits, verify=verify
+        )
+        # An httpx.AsyncClient is bound to the event loop it first ran on, so
+        # each running loop gets its own.
+        self._async_clients = {}
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method,
+        url,
+        *,
+        headers=None,
+        json=None,
+        timeout=None,
+        allow_redirects=True,
+        stream=False,
+    ):
+        request = self._client.build_request(
+            method, url, headers=headers, json=json, timeout=timeout
+        )
+
+        with _requests_exceptions():
+            response = self._client.send(
+                request, follow_redirects=allow_redirects, stream=stream
+            )
+
+        return self._build_response(method, url, response, stream)
+
+    async def arequest(
+        self,
+        method,
+        url,
+        *,
+        headers=None,
+        json=None,
+        timeout=None,
+        allow_redirects=True,
+        stream=False,
+    ):
+        async_client = self._async_client(asyncio.get_running_loop())
+        request = async_client.build_request(
+            method, url, headers=headers, json=json, timeout=timeout
+        )
+
+        with _requests_exceptions():
+            response = await async_client.send(
+                request, follow_redirects=allow_redirects
+            )
+
+        return self._build_response(method, url, response, False)
+
+    def close(self):
+        """
+            Releases the connections held by the transport, including those
+            used by arequest() on event loops that are still open.
+        """
+
+        self._client.close()
+
+        with self._lock:
+            async_clients = list(self._async_clients.items())
+            self._async_clients.clear()
+
+        for loop, async_client in async_clients:
+            if loop.is_closed():
+                continue
+
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(async_client.aclose(), loop)
+            else:
+                loop.run_until_complete(async_client.aclose())
+
+    async def aclose(self):
+        """
+            Releases the connections arequest() used on the running loop.
+        """
+
+        with self._lock:
+            async_client = self._async_clients.pop(
+                asyncio.get_running_loop(), None
+            )
+
+        if async_client is not None:
+            await async_client.aclose()
+
+    # private
+
+    def _async_client(self, loop):
+        with self._lock:
+            # Clients of loops closed since, eg: by asyncio.run, cannot be
+            # used or closed anymore.
+            closed_loops = [
+                closed_loop
+                for closed_loop in self._async_clients
+                if closed_loop.is_closed()
+            ]
+
+            for closed_loop in closed_loops:
+                del self._async_clients[closed_loop]
+
+            if loop not in self._async_clients:
+                self._async_clients[loop] = httpx.AsyncClient(
+                    http2=True, limits=self._limits, verify=self._verify
+                )
+
+            return self._async_clients[loop]
+
+    def _build_response(self, method, url, response, stream):
+        built = build_response(
+            method,
+            url,
+            response.status_code,
+            response.headers.multi_items(),
+            content=None if stream else response.content,
+            raw=_HttpxRaw(response) if stream else None,
+            reason=response.reason_phrase,
+        )
+        built.http_version = response.http_version
+
+        return built
+
+
+class _HttpxRaw:
+    """
+        A file-like view of a streamed httpx response body, the way requests
+        reads response.raw.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self._chunks = response.iter_bytes()
+        self._buffer = b""
+
+    def read(self, amt=None):
+        while amt is None or len(self._buffer) < amt:
+            chunk = next(self._chunks, None)
+
+            if chunk is None:
+                break
+
+            self._buffer += chunk
+
+        if amt is None:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+
+        return data
+
+    def close(self):
+        self._response.close()
+
+    def release_conn(self):
+        self._response.close()
+
+
+@contextlib.contextmanager
+def _requests_exceptions():
+    try:
+        yield
+    except httpx.TimeoutException as error:
+        raise requests.exceptions.Timeout(error) from error
+    except httpx.TransportError as error:
+        raise requests.exceptions.ConnectionError(error) from error
@@ -0,0 +1,70 @@
+import threading
+from urlbox.transports.transport import Transport, build_response
+
+
+class InMemoryTransport(Transport):
+    """
+        Answers requests in memory, without touching the network.
+
+        For deterministic tests, and for microbenchmarks measuring the overhead
+        of the client itself.
+
+        :param handler: (Optional) a callable taking (method, url, headers, json)
+        and returning a (status_code, headers, body) tuple. Defaults to always
+        answering with status_code, headers and body.
+
+        :param status_code: (Optional) Defaults to 200.
+
+        :param headers: (Optional) Defaults to no headers.
+
+        :param body: (Optional) Defaults to b"".
+
+        :param record: (Optional) keep every request sent in requests. Defaults to True.
+
+        Example:
+        transport = InMemoryTransport(body=b"screenshot", headers={"Content-Type": "image/png"})
+        urlbox_client = UrlboxClient(api_key="YOUR_API_KEY", transport=transport)
+    """
+
+    def __init__(
+        self,
+        handler=None,
+        *,
+        status_code=200,
+        headers=None,
+        body=b"",
+        record=True,
+    ):
+        self.handler = handler or (
+            lambda method, url, headers_, json: (status_code, headers, body)
+        )
+        self.record = record
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method,
+        url,
+        *,
+        headers=None,
+        json=None,
+        timeout=None,
+        allow_redirects=True,
+        stream=False,
+    ):
+        if self.record:
+            with self._lock:
+                self.requests.append((method, url, headers, json))
+
+        status_code, response_headers, body = self.handler(
+            method, url, headers, json
+        )
+
+        return build_response(
+            method,
+            url,
+            status_code,
+            response_headers,
+            content=b"" if method == "HEAD" else body,
+        )
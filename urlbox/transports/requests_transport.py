@@ -0,0 +1,84 @@
+import requests
+from urlbox.transports.transport import Transport, warm_pool
+
+
+class RequestsTransport(Transport):
+    """
+        Sends requests with the requests library, through a requests.Session
+        so that connections are pooled and kept alive between requests.
+
+        The session is shared by every thread using the transport. Its
+        connection pool is thread-safe and, by default, keeps pool_maxsize
+        connections per host, so up to that many threads reuse connections
+        instead of opening and discarding new ones on every request.
+
+        :param session: (Optional) the requests.Session to use, eg: to mount
+        adapters with custom pool sizes or retries. Defaults to a new session.
+
+        :param pool_maxsize: (Optional) connections kept per host by the default
+        session. Defaults to 32.
+
+        :param dns_cache: (Optional) a DnsCache resolving the hosts of the
+        session's adapters. Defaults to None (every new connection resolves).
+    """
+
+    def __init__(self, session=None, pool_maxsize=32, dns_cache=None):
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+        if dns_cache is not None:
+            for adapter in set(session.adapters.values()):
+                dns_cache.install(adapter.poolmanager)
+
+        self.session = session
+        self.dns_cache = dns_cache
+
+    def request(
+        self,
+        method,
+        url,
+        *,
+        headers=None,
+        json=None,
+        timeout=None,
+        allow_redirects=True,
+        stream=False,
+    ):
+        return self.session.request(
+            method,
+            url,
+            headers=headers,
+            json=json,
+            timeout=timeout,
+            allow_redirects=allow_redirects,
+            stream=stream,
+        )
+
+    def warm_up(self, url, n_connections):
+        return warm_pool(self._connection_pool(url), n_connections)
+
+    def close(self):
+        self.session.close()
+
+    # private
+
+    def _connection_pool(self, url):
+        # Picks the pool the way the adapter does when sending, so that the
+        # connections warmed up are the ones requests to url will reuse.
+        adapter = self.session.get_adapter(url)
+        settings = self.session.merge_environment_settings(
+            url, {}, None, None, None
+        )
+
+        if not hasattr(adapter, "get_connection_with_tls_context"):
+            return adapter.get_connection(url, settings["proxies"])
+
+        return adapter.get_connection_with_tls_context(
+            requests.Request("HEAD", url).prepare(),
+            settings["verify"],
+            settings["proxies"],
+            settings["cert"],
+        )
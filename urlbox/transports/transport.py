@@ -0,0 +1,142 @@
+import asyncio
+import functools
+import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
+
+
+class Transport:
+    """
+        The interface UrlboxClient sends every HTTP request through.
+
+        Subclasses implement request() and return a requests.Response, so that
+        the client returns the same kind of response whichever transport it uses.
+    """
+
+    def request(
+        self,
+        method,
+        url,
+        *,
+        headers=None,
+        json=None,
+        timeout=None,
+        allow_redirects=True,
+        stream=False,
+    ):
+        """
+            Sends an HTTP request and returns a requests.Response.
+
+            :param method: eg: "GET", "HEAD", "DELETE" or "POST".
+
+            :param url: the full url of the request.
+
+            :param headers: (Optional) dictionary of request headers.
+
+            :param json: (Optional) object to send as the JSON body of the request.
+
+            :param timeout: (Optional) seconds to wait for the server.
+
+            :param allow_redirects: (Optional) follow redirects. Defaults to True.
+
+            :param stream: (Optional) return before the body has been read,
+            leaving it to be read from the response. Defaults to False.
+        """
+
+        raise NotImplementedError
+
+    async def arequest(self, method, url, **kwargs):
+        """
+            Sends an HTTP request from a coroutine and returns a requests.Response.
+            Takes the same arguments as request().
+
+            Transports without native asyncio support run request() in the
+            default executor of the event loop.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(
+            None, functools.partial(self.request, method, url, **kwargs)
+        )
+
+    def warm_up(self, url, n_connections):
+        """
+            Opens up to n_connections pooled connections to the host of url,
+            so that the next requests skip DNS resolution and the TCP and TLS
+            handshakes. Connections the server has closed since are reopened.
+
+            Returns the number of connections opened. Transports without a
+            connection pool open none.
+        """
+
+        return 0
+
+    def close(self):
+        """
+            Releases the connections held by the transport.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def build_response(
+    method, url, status_code, headers, *, content=None, raw=None, reason=None
+):
+    """
+        Builds a requests.Response, for transports not based on requests.
+        Pass the body either fully read, as content, or as a file-like raw.
+    """
+
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.url = url
+    response.reason = reason
+    response.encoding = requests.utils.get_encoding_from_headers(
+        response.headers
+    )
+    response.request = requests.Request(method, url).prepare()
+    response.raw = raw
+
+    if content is not None:
+        response._content = content
+        response._content_consumed = True
+
+    return response
+
+
+def warm_pool(pool, n_connections):
+    """
+        Opens up to n_connections idle connections of a urllib3 connection
+        pool, and returns how many were opened. Never opens more connections
+        than the pool keeps, and, for a blocking pool, only takes idle ones.
+        Raises a requests.exceptions.ConnectionError when connecting fails.
+    """
+
+    connections = []
+    opened = 0
+
+    try:
+        for _ in range(min(n_connections, pool.pool.maxsize)):
+            try:
+                connection = pool._get_conn(timeout=0)
+            except urllib3.exceptions.EmptyPoolError:
+                break
+
+            connections.append(connection)
+
+            if connection.sock is None:
+                connection.connect()
+                opened += 1
+    except urllib3.exceptions.HTTPError as error:
+        raise requests.exceptions.ConnectionError(error)
+    finally:
+        for connection in connections:
+            pool._put_conn(connection)
+
+    return opened
@@ -0,0 +1,96 @@
+import json as json_module
+import requests
+import urllib3
+from urlbox.transports.transport import Transport, build_response, warm_pool
+
+
+class Urllib3Transport(Transport):
+    """
+        Sends requests with a urllib3 PoolManager, skipping the per-request
+        overhead of requests (hooks, cookies, adapters) for lower client CPU.
+
+        Connection errors and timeouts are raised as their requests.exceptions
+        equivalents, so callers handle every transport the same way.
+
+        :param pool_manager: (Optional) the urllib3.PoolManager to use.
+
+        :param maxsize: (Optional) connections kept per host. Defaults to 10.
+
+        :param dns_cache: (Optional) a DnsCache resolving the hosts of the pool
+        manager. Defaults to None (every new connection resolves).
+    """
+
+    def __init__(self, pool_manager=None, maxsize=10, dns_cache=None):
+        self.pool_manager = pool_manager or urllib3.PoolManager(
+            maxsize=maxsize
+        )
+        self.dns_cache = dns_cache
+
+        if dns_cache is not None:
+            dns_cache.install(self.pool_manager)
+
+    def request(
+        self,
+        method,
+        url,
+        *,
+        headers=None,
+        json=None,
+        timeout=None,
+        allow_redirects=True,
+        stream=False,
+    ):
+        headers = dict(headers or {})
+        body = None
+
+        if json is not None:
+            body = json_module.dumps(json).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+
+        try:
+            raw = self.pool_manager.request(
+                method,
+                url,
+                body=body,
+                headers=headers,
+                timeout=urllib3.Timeout(total=timeout),
+                redirect=allow_redirects,
+                # retries=False would also stop urllib3 following redirects.
+                retries=urllib3.Retry(
+                    total=None,
+                    connect=0,
+                    read=0,
+                    status=0,
+                    redirect=(
+                        requests.models.DEFAULT_REDIRECT_LIMIT
+                        if allow_redirects
+                        else False
+                    ),
+                    raise_on_redirect=False,
+                ),
+                preload_content=not stream,
+            )
+        except urllib3.exceptions.NewConnectionError as error:
+            raise requests.exceptions.ConnectionError(error)
+        except urllib3.exceptions.TimeoutError as error:
+            raise requests.exceptions.Timeout(error)
+        except urllib3.exceptions.HTTPError as error:
+            raise requests.exceptions.ConnectionError(error)
+
+        return build_response(
+            method,
+            url,
+            raw.status,
+            raw.headers,
+            content=None if stream else raw.data,
+            raw=raw,
+            reason=raw.reason,
+        )
+
+    def warm_up(self, url, n_connections):
+        return warm_pool(
+            self.pool_manager.connection_from_url(url), n_connections
+        )
+
+    def close(self):
+        self.pool_manager.clear()
@@ -1,40 +1,132 @@
+import asyncio
+import concurrent.futures
 import json
 import hmac
-import requests
+import threading
+import time
 import urllib.parse
+import urllib3
 import validators
 import warnings
 from hashlib import sha1
 from urlbox import InvalidUrlException
+from urlbox.circuit_breaker import CircuitBreaker
+from urlbox.option_schema import OptionSchema
+from urlbox.rate_limiter import RateLimiter
+from urlbox.render_result import RenderResult
+from urlbox.transports import RequestsTransport
 
 
 class UrlboxClient:
     """
         The core client object used to interact with the Urlbox API
 
+        A client is thread-safe: create one and share it between every thread,
+        rather than one per request or per thread. Its configuration is never
+        modified after initialisation, connections are pooled by the transport,
+        and the state shared between requests (the submit() queue, circuit
+        breaker, hedger, correlator and option schema caches) is protected by
+        locks. A RateLimiter is guarded by a thread lock, and a
+        SharedRateLimiter by a thread lock around its cross-process flock, so
+        either can be shared too. generate_url() has no shared state at all.
+
         :param api_key: Your API key found in your Urlbox Dashboard
         `https://urlbox.io/dashboard/api`
 
         :param api_secret: (Optional) Your API secret found in your Urlbox
         Dashboard`https://urlbox.io/dashboard/api`
         Required for authenticated requests.
+
+        :param api_host_name: (Optional) The host to send requests to.
+        Defaults to the public Urlbox API host. Requests are sent over https
+        unless a scheme is included, eg: "http://127.0.0.1:8080".
+
+        :param hedger: (Optional) A RequestHedger used to hedge slow get requests.
+
+        :param circuit_breaker: (Optional) A CircuitBreaker every request is sent through,
+        or True to use the breaker shared by all clients sending requests to the same host.
+
+        :param transport: (Optional) The Transport every request is sent through.
+        Defaults to a RequestsTransport, pooling connections in a requests.Session.
+
+        :param rate_limiter: (Optional) A RateLimiter, or a SharedRateLimiter shared by
+        every process on the host, consulted before sending each request.
+
+        :param correlator: (Optional) A RenderCorrelator the renderId of every post is
+        registered into, so its webhook callback can be waited on.
+
+        :param validate_options: (Optional) "strict" to raise an InvalidOptionsError, or "warn"
+        to warn, when options are not documented or have invalid values, before
+        sending any request. An OptionSchema can also be passed. Defaults to no validation.
+
+        :param max_workers: (Optional) Number of threads running requests queued with submit(). Defaults to 8.
+
+        :param max_pending: (Optional) Number of requests submit() queues, including
+        those running, before it blocks the caller. Defaults to 64.
     """
 
     BASE_API_URL = "https://api.urlbox.io/v1/"
     POST_END_POINT = "render"
-
-    def __init__(self, *, api_key, api_secret=None, api_host_name=None):
+    TEXT_FORMATS = ("html", "svg")
+
+    def __init__(
+        self,
+        *,
+        api_key,
+        api_secret=None,
+        api_host_name=None,
+        hedger=None,
+        circuit_breaker=None,
+        transport=None,
+        rate_limiter=None,
+        correlator=None,
+        validate_options=None,
+        max_workers=8,
+        max_pending=64,
+    ):
         self.api_key = api_key
         self.api_secret = api_secret
         self.base_api_url = self._init_base_api_url(api_host_name)
-
-    def get(self, options):
+        self.hedger = hedger
+        self.circuit_breaker = self._init_circuit_breaker(circuit_breaker)
+        self.transport = transport or RequestsTransport()
+        self.rate_limiter = rate_limiter
+        self.correlator = correlator
+        self.option_schema = self._init_option_schema(validate_options)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._keep_warm_thread = None
+        self._keep_warm_stop = threading.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, options, lean=False, destination=None, stream=False):
         """
             Make simple get request to Urlbox API
 
+            Text formats (html and svg) are requested compressed, and
+            decompressed as they are read. Other formats are already compressed
+            and are requested as they are.
+
             :param options: dictionary containing all of the options you want to set.
             eg: {"url": "http://example.com/", "format": "png", "full_page": True, "width": 300}
 
+            :param lean: (Optional) return a compact RenderResult instead of a
+            requests.Response, eg: to hold many results in memory. Defaults to False.
+
+            :param destination: (Optional) with lean, path of a file, or binary file
+            object, to stream the render to instead of keeping it in memory.
+
+            :param stream: (Optional) without lean, return before the body has been
+            read, to iterate over it with response.iter_content(). Defaults to False.
+
             format: can be either "png", "jpg", "jpeg", "avif", "webp", "pdf", "svg", "html". Defaults to "png".
 
             Example: urlbox_client.get({"url": "http://example.com/", "format": "png", "full_page": True, "width": 300})
@@ -42,31 +134,148 @@ class UrlboxClient:
             Full options reference: https://urlbox.io/docs/options
         """
 
-        return requests.get(
-            self.generate_url(options), allow_redirects=True, timeout=100
-        )
+        url = self.generate_url(options)
+        stream = stream or destination is not None
+        headers = {"Accept-Encoding": self._accept_encoding(options)}
 
-    def delete(self, options):
+        if self.hedger is None:
+            response = self._get_url(url, stream, headers)
+        else:
+            response = self.hedger.call(
+                lambda hedged_url: self._get_url(hedged_url, stream, headers),
+                url,
+                self._hedge_url(url),
+            )
+
+        return self._lean(response, destination) if lean else response
+
+    async def get_async(self, options):
+        """
+            Make simple get request to Urlbox API from a coroutine.
+
+            Takes the same options as get(). Transports with native asyncio
+            support, such as Http2Transport, send the request on the event loop;
+            others send it from a thread of the default executor.
+            Requests made with get_async are not hedged.
+
+            Example: response = await urlbox_client.get_async({"url": "http://example.com/"})
+        """
+
+        url = self.generate_url(options)
+        headers = {"Accept-Encoding": self._accept_encoding(options)}
+
+        if self.rate_limiter is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.rate_limiter.acquire
+            )
+
+        if self.circuit_breaker is None:
+            response = await self.transport.arequest(
+                "GET", url, headers=headers, allow_redirects=True, timeout=100
+            )
+        else:
+            response = await self.circuit_breaker.acall(
+                self.transport.arequest,
+                "GET",
+                url,
+                headers=headers,
+                allow_redirects=True,
+                timeout=100,
+            )
+
+        if self.rate_limiter is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.rate_limiter.record, response
+            )
+
+        return response
+
+    def delete(self, options, timeout=30):
         """
             Deletes the screenshot from the cache.
 
             :param options: dictionary containing url of the site the screneshot has captured
             and the format of the original screenshot eg: png, jpg, etc
             eg: {"url": "http://example.com/", "format": "png"}
+
+            :param timeout: (Optional) seconds to wait for the API. Defaults to 30.
         """
 
         processed_options, format = self._process_options(options)
 
-        return requests.delete(
+        return self._request(
+            "DELETE",
             (
                 f"{self.base_api_url}"
                 f"{self.api_key}/{format}"
                 f"?{processed_options}"
             ),
             allow_redirects=True,
+            timeout=timeout,
         )
 
-    def head(self, options):
+    def delete_many(
+        self, options_iterable, *, formats=None, max_workers=8, rate_limit=None
+    ):
+        """
+            Deletes many screenshots from the cache concurrently, eg: to purge
+            a whole site after a redesign.
+
+            Deletes run in max_workers threads sharing the client's pooled
+            connections. The iterable is consumed lazily, so it can be a
+            generator over tens of thousands of URLs.
+
+            :param options_iterable: iterable of options dictionaries, as passed to delete().
+
+            :param formats: (Optional) list of formats to delete each URL in,
+            eg: ["png", "jpg", "pdf"]. Defaults to the format in each options.
+
+            :param max_workers: (Optional) number of deletes in flight at once. Defaults to 8.
+
+            :param rate_limit: (Optional) maximum deletes started per second. Defaults to no limit.
+
+            Returns a dictionary with the number of screenshots "deleted", the
+            number "failed" and, in "items", one dictionary per delete with its
+            "options", "ok", "status_code" and "error".
+
+            Example:
+            summary = urlbox_client.delete_many(({"url": url} for url in urls), formats=["png", "pdf"], rate_limit=20)
+            retry = [item["options"] for item in summary["items"] if not item["ok"]]
+        """
+
+        rate_limiter = None if rate_limit is None else RateLimiter(rate_limit)
+        room = threading.BoundedSemaphore(max_workers * 2)
+        items = []
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix="urlbox-delete"
+        ) as executor:
+            for options in self._expand_formats(options_iterable, formats):
+                room.acquire()
+
+                if rate_limiter is not None:
+                    rate_limiter.acquire()
+
+                item = {
+                    "options": options,
+                    "ok": False,
+                    "status_code": None,
+                    "error": None,
+                }
+                items.append(item)
+                executor.submit(self._delete_item, item).add_done_callback(
+                    lambda _: room.release()
+                )
+
+        deleted = sum(item["ok"] for item in items)
+
+        return {
+            "deleted": deleted,
+            "failed": len(items) - deleted,
+            "items": items,
+        }
+
+    def head(self, options, lean=False):
         """
             Make simple head request to Urlbox API
 
@@ -75,6 +284,9 @@ class UrlboxClient:
             :param options: dictionary containing all of the options you want to set.
             eg: {"url": "http://example.com/", "format": "png", "full_page": True, "width": 300}
 
+            :param lean: (Optional) return a compact RenderResult instead of a
+            requests.Response, eg: to hold many results in memory. Defaults to False.
+
             format: can be either "png", "jpg", "jpeg", "avif", "webp", "pdf", "svg", "html". Defaults to "png".
 
             Example: urlbox_client.get({"url": "http://example.com/", "format": "png", "full_page": True, "width": 300})
@@ -84,7 +296,8 @@ class UrlboxClient:
 
         processed_options, format = self._process_options(options)
 
-        return requests.head(
+        response = self._request(
+            "HEAD",
             (
                 f"{self.base_api_url}"
                 f"{self.api_key}/{format}"
@@ -94,41 +307,188 @@ class UrlboxClient:
             timeout=100,
         )
 
-    def post(self, options):
+        return self._lean(response) if lean else response
+
+    def post(self, options, lean=False):
         """
               Make post request to Urlbox API
 
               :param options: dictionary containing all of the options you want to set.
               eg: {"url": "http://example.com/", "webhook_url": "http://yoursite.com/webhook", "format": "png", "full_page": True, "width": 300}
 
+              :param lean: (Optional) return a compact RenderResult instead of a
+              requests.Response. Defaults to False.
+
               format: can be either "png", "jpg", "jpeg", "avif", "webp", "pdf", "svg", "html". Defaults to "png".
 
               Example: urlbox_client.post({"url": "http://example.com/", "webhook_url": "http://yoursite.com/webhook", "format": "png", "full_page": True, "width": 300})
               Full options reference: https://urlbox.io/docs/options
           """
 
-        if "webhook_url" not in options:
-            warnings.warn(
-                "webhook_url not supplied, you will need to poll the statusUrl in order to get your result"
+        return self._post(options, lean)[0]
+
+    def post_and_wait(
+        self, options, timeout=60, poll_interval=2, poll_timeout=60
+    ):
+        """
+            Make post request to Urlbox API and wait for the render to complete.
+
+            With a correlator, waits up to timeout seconds for the render's
+            webhook callback and returns its payload. Without one, or when the
+            callback does not arrive in time, polls the render's statusUrl every
+            poll_interval seconds, for up to poll_timeout seconds, and returns
+            the render status once it succeeded or failed.
+
+            Raises a requests.HTTPError if the post or a status request
+            fails, eg: with a 401 or 404, or a
+            concurrent.futures.TimeoutError if the render is still not complete
+            after polling.
+
+            :param options: dictionary containing all of the options you want to set, as for post().
+
+            :param timeout: (Optional) seconds to wait for the webhook callback. Defaults to 60.
+
+            :param poll_interval: (Optional) seconds between status requests. Defaults to 2.
+
+            :param poll_timeout: (Optional) seconds to poll for. Defaults to 60.
+
+            Example:
+            payload = urlbox_client.post_and_wait({"url": "http://example.com/", "webhook_url": "https://example.com/webhooks/urlbox"})
+            payload["result"]["renderUrl"]
+        """
+
+        response, future = self._post(options, False)
+        response.raise_for_status()
+        body = response.json()
+        render_id = body["renderId"]
+
+        if future is not None:
+            try:
+                return future.result(timeout)
+            except concurrent.futures.TimeoutError:
+                self.correlator.discard(render_id)
+
+        return self._poll_render(
+            body.get("statusUrl")
+            or f"{self.base_api_url}{self.POST_END_POINT}/{render_id}",
+            poll_interval,
+            poll_timeout,
+        )
+
+    def submit(self, options, *, method="get", callback=None, timeout=None):
+        """
+            Queue a request without blocking for the render and return a
+            concurrent.futures.Future of its response.
+
+            Requests run in a thread pool owned by the client. At most
+            max_pending requests are queued or running at once: beyond that,
+            submit() blocks until one completes, so a fast producer cannot pile
+            up unbounded work in memory.
+
+            :param options: dictionary containing all of the options you want to set.
+
+            :param method: (Optional) "get", "head", "post" or "delete". Defaults to "get".
+
+            :param callback: (Optional) called with the future once it completes.
+
+            :param timeout: (Optional) seconds to wait for room in the queue before
+            raising a TimeoutError. Defaults to waiting as long as needed.
+
+            Example:
+            futures = [urlbox_client.submit({"url": url}) for url in urls]
+            for future in concurrent.futures.as_completed(futures):
+                response = future.result()
+        """
+
+        if method not in ("get", "head", "post", "delete"):
+            raise ValueError(f"Unknown method '{method}'")
+
+        if not self._pending.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for room in the queue")
+
+        try:
+            future = self._get_executor().submit(
+                getattr(self, method), options
             )
+        except BaseException:
+            self._pending.release()
+            raise
 
-        if self.api_secret is None:
-            raise Exception(
-                "Missing api_secret when initialising client. Required for authorised post request."
+        future.add_done_callback(lambda _: self._pending.release())
+
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        return future
+
+    def warm_up(self, n_connections=4):
+        """
+            Opens up to n_connections connections to the Urlbox API ahead of the
+            first requests, so that they do not pay for DNS resolution and the
+            TCP and TLS handshakes. Returns the number of connections opened.
+
+            Connections are only kept by transports with a connection pool, and
+            never beyond its size per host (pool_maxsize for a RequestsTransport).
+
+            :param n_connections: (Optional) connections to open. Defaults to 4.
+
+            Example:
+            urlbox_client = UrlboxClient(api_key="YOUR_API_KEY", api_secret="YOUR_API_SECRET")
+            urlbox_client.warm_up(8)
+        """
+
+        return self.transport.warm_up(self.base_api_url, n_connections)
+
+    def keep_warm(self, n_connections=4, interval=30):
+        """
+            Warms up the connections now, then again every interval seconds in a
+            background thread until the client is closed, so that connections
+            the server dropped while idle are reopened before they are needed.
+
+            :param n_connections: (Optional) connections to keep open. Defaults to 4.
+
+            :param interval: (Optional) seconds between warm ups. Should be shorter
+            than the keep-alive timeout of the server. Defaults to 30.
+        """
+
+        with self._executor_lock:
+            if self._keep_warm_thread is not None:
+                raise RuntimeError("Connections are already kept warm")
+
+            self._keep_warm_stop.clear()
+            self._keep_warm_thread = threading.Thread(
+                target=self._keep_warm,
+                args=(n_connections, interval),
+                name="urlbox-keep-warm",
+                daemon=True,
             )
+            self._keep_warm_thread.start()
 
-        processed_options, _ = self._process_options_post_request(options)
+    def close(self):
+        """
+            Waits for the requests queued with submit() and releases the
+            connections and threads held by the client, including those of
+            its hedger.
+        """
 
-        return requests.post(
-            f"{self.base_api_url}{self.POST_END_POINT}",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_secret}",
-            },
-            allow_redirects=True,
-            json=processed_options,
-            timeout=5,
-        )
+        self._keep_warm_stop.set()
+
+        with self._executor_lock:
+            thread, self._keep_warm_thread = self._keep_warm_thread, None
+
+        if thread is not None:
+            thread.join()
+
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+        if self.hedger is not None:
+            # Losing hedges left in flight close their own responses.
+            self.hedger.shutdown(wait=False)
+
+        self.transport.close()
 
     def generate_url(self, options):
         """
@@ -167,9 +527,173 @@ class UrlboxClient:
 
     # private
 
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="urlbox-client",
+                )
+
+            return self._executor
+
+    def _keep_warm(self, n_connections, interval):
+        while True:
+            try:
+                self.warm_up(n_connections)
+            except OSError:
+                # The next requests will connect, or fail, on their own.
+                pass
+
+            if self._keep_warm_stop.wait(interval):
+                return
+
+    def _request(self, method, url, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        if self.circuit_breaker is None:
+            response = self.transport.request(method, url, **kwargs)
+        else:
+            response = self.circuit_breaker.call(
+                self.transport.request, method, url, **kwargs
+            )
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.record(response)
+
+        return response
+
+    def _expand_formats(self, options_iterable, formats):
+        for options in options_iterable:
+            if formats is None:
+                yield options
+            else:
+                for format in formats:
+                    yield {**options, "format": format}
+
+    def _delete_item(self, item):
+        try:
+            response = self.delete(item["options"])
+        except Exception as error:
+            item["error"] = error
+        else:
+            response.close()
+            item["status_code"] = response.status_code
+            item["ok"] = response.ok
+
+    def _post(self, options, lean):
+        if "webhook_url" not in options:
+            warnings.warn(
+                "webhook_url not supplied, you will need to poll the statusUrl in order to get your result"
+            )
+
+        if self.api_secret is None:
+            raise Exception(
+                "Missing api_secret when initialising client. Required for authorised post request."
+            )
+
+        processed_options, _ = self._process_options_post_request(options)
+
+        response = self._request(
+            "POST",
+            f"{self.base_api_url}{self.POST_END_POINT}",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_secret}",
+            },
+            allow_redirects=True,
+            json=processed_options,
+            timeout=5,
+        )
+        result = self._lean(response) if lean else response
+        future = None
+
+        # Without a webhook_url, no callback will ever resolve the render.
+        if (
+            self.correlator is not None
+            and "webhook_url" in options
+            and result.ok
+        ):
+            try:
+                future = self.correlator.register(result.json()["renderId"])
+            except (KeyError, ValueError):
+                pass
+
+        return result, future
+
+    def _poll_render(self, status_url, poll_interval, poll_timeout):
+        deadline = time.monotonic() + poll_timeout
+
+        while True:
+            response = self._request(
+                "GET",
+                status_url,
+                headers={"Authorization": f"Bearer {self.api_secret}"},
+                allow_redirects=True,
+                timeout=5,
+            )
+            response.raise_for_status()
+            status = response.json()
+
+            if status.get("status") in ("succeeded", "failed"):
+                return status
+
+            if time.monotonic() + poll_interval > deadline:
+                raise concurrent.futures.TimeoutError(
+                    f"Render {status.get('renderId')} still {status.get('status')}"
+                )
+
+            time.sleep(poll_interval)
+
+    def _lean(self, response, destination=None):
+        return RenderResult.from_response(response, destination)
+
+    def _get_url(self, url, stream=False, headers=None):
+        return self._request(
+            "GET",
+            url,
+            headers=headers,
+            allow_redirects=True,
+            timeout=100,
+            stream=stream,
+        )
+
+    def _accept_encoding(self, options):
+        if options.get("format", "png") in self.TEXT_FORMATS:
+            return urllib3.util.request.ACCEPT_ENCODING
+
+        return "identity"
+
+    def _hedge_url(self, url):
+        if self.hedger.alternate_api_host_name is None:
+            return url
+
+        alternate_base_api_url = self._init_base_api_url(
+            self.hedger.alternate_api_host_name
+        )
+
+        return f"{alternate_base_api_url}{url[len(self.base_api_url):]}"
+
+    def _init_circuit_breaker(self, circuit_breaker):
+        if circuit_breaker is True:
+            return CircuitBreaker.for_host(self.base_api_url)
+        else:
+            return circuit_breaker or None
+
+    def _init_option_schema(self, validate_options):
+        if validate_options is None or isinstance(
+            validate_options, OptionSchema
+        ):
+            return validate_options
+        else:
+            return OptionSchema(mode=validate_options)
+
     def _init_base_api_url(self, api_host_name):
         if api_host_name is None:
             return self.BASE_API_URL
+        elif "://" in api_host_name:
+            return f"{api_host_name.rstrip('/')}/"
         else:
             return f"https://{api_host_name}/"
 
@@ -182,6 +706,9 @@ class UrlboxClient:
     def _process_options(self, options, url_encode_options=True):
         self._raise_key_error_if_missing_required_keys(options)
 
+        if self.option_schema is not None:
+            self.option_schema.validate(options)
+
         processed_options = options.copy()
 
         if "url" in processed_options:
@@ -0,0 +1,252 @@
+import threading
+import time
+import requests
+from urlbox import CircuitOpenError, NoHealthyEndpointError, UrlboxClient
+
+
+class UrlboxEndpoint:
+    """
+        A single Urlbox API endpoint (host + key pair) in a UrlboxPoolClient pool.
+
+        :param api_key: The API key to use for requests sent to this endpoint.
+
+        :param api_secret: (Optional) The API secret matching api_key.
+        Every request routed to this endpoint is signed with it.
+
+        :param api_host_name: (Optional) The host to send requests to.
+        Defaults to the public Urlbox API host.
+
+        :param weight: (Optional) The relative share of requests this endpoint
+        receives under weighted round robin. Defaults to 1.
+    """
+
+    def __init__(
+        self, *, api_key, api_secret=None, api_host_name=None, weight=1
+    ):
+        if weight <= 0:
+            raise ValueError("weight must be greater than 0")
+
+        self.client = UrlboxClient(
+            api_key=api_key, api_secret=api_secret, api_host_name=api_host_name
+        )
+        self.weight = weight
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = None
+        self.probing = False
+        self._current_weight = 0
+
+    @property
+    def base_api_url(self):
+        return self.client.base_api_url
+
+    @property
+    def ejected(self):
+        return self.ejected_until is not None
+
+
+class UrlboxPoolClient:
+    """
+        Spreads requests across a pool of Urlbox API endpoints.
+
+        Each endpoint has its own host and key pair, and every request is signed
+        with the secret of the endpoint it is routed to. Endpoints that fail
+        max_consecutive_failures times in a row are ejected from the pool for
+        ejection_seconds, after which a single probe request is let through
+        (half-open): if it succeeds the endpoint rejoins the pool, otherwise it
+        is ejected again.
+
+        :param endpoints: list of UrlboxEndpoint instances.
+
+        :param strategy: (Optional) how to pick an endpoint for each request.
+        Either "least_outstanding" (the endpoint with the fewest requests in
+        flight, relative to its weight) or "weighted_round_robin".
+        Defaults to "least_outstanding".
+
+        :param max_consecutive_failures: (Optional) failures in a row before an
+        endpoint is ejected. Defaults to 3.
+
+        :param ejection_seconds: (Optional) how long an ejected endpoint is kept
+        out of the pool before it is probed. Defaults to 30.
+
+        Example:
+        urlbox_client = UrlboxPoolClient(
+            [
+                UrlboxEndpoint(api_key="KEY_1", api_secret="SECRET_1"),
+                UrlboxEndpoint(api_key="KEY_2", api_secret="SECRET_2", api_host_name="render.example.com", weight=2),
+            ]
+        )
+        urlbox_client.get({"url": "http://example.com/"})
+    """
+
+    LEAST_OUTSTANDING = "least_outstanding"
+    WEIGHTED_ROUND_ROBIN = "weighted_round_robin"
+    STRATEGIES = (LEAST_OUTSTANDING, WEIGHTED_ROUND_ROBIN)
+
+    def __init__(
+        self,
+        endpoints,
+        *,
+        strategy=LEAST_OUTSTANDING,
+        max_consecutive_failures=3,
+        ejection_seconds=30,
+    ):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+
+        if strategy not in self.STRATEGIES:
+            raise ValueError(
+                f"Unknown strategy '{strategy}', expected one of {self.STRATEGIES}"
+            )
+
+        self.endpoints = list(endpoints)
+        self.strategy = strategy
+        self.max_consecutive_failures = max_consecutive_failures
+        self.ejection_seconds = ejection_seconds
+        self._lock = threading.Lock()
+
+    def get(self, options, *args, **kwargs):
+        """
+            Make a get request to the next endpoint in the pool.
+            See UrlboxClient.get for the available options and arguments,
+            eg: lean.
+        """
+
+        return self._call("get", options, *args, **kwargs)
+
+    def delete(self, options, *args, **kwargs):
+        """
+            Delete the screenshot from the cache of the next endpoint in the pool.
+            See UrlboxClient.delete for the available options and arguments,
+            eg: lean.
+        """
+
+        return self._call("delete", options, *args, **kwargs)
+
+    def head(self, options, *args, **kwargs):
+        """
+            Make a head request to the next endpoint in the pool.
+            See UrlboxClient.head for the available options and arguments,
+            eg: lean.
+        """
+
+        return self._call("head", options, *args, **kwargs)
+
+    def post(self, options, *args, **kwargs):
+        """
+            Make a post request to the next endpoint in the pool.
+            See UrlboxClient.post for the available options and arguments,
+            eg: lean.
+        """
+
+        return self._call("post", options, *args, **kwargs)
+
+    def generate_url(self, options):
+        """
+            Generate a signed Urlbox URL for the next endpoint in the pool.
+            See UrlboxClient.generate_url for the available options.
+        """
+
+        with self._lock:
+            endpoint = self._select_endpoint(allow_probe=False)
+
+        return endpoint.client.generate_url(options)
+
+    # private
+
+    def _call(self, method_name, options, *args, **kwargs):
+        endpoint = self._acquire()
+        success = None
+
+        try:
+            response = getattr(endpoint.client, method_name)(
+                options, *args, **kwargs
+            )
+            success = not self._is_failure(response)
+            return response
+        except (requests.exceptions.RequestException, CircuitOpenError):
+            success = False
+            raise
+        finally:
+            self._release(endpoint, success)
+
+    def _acquire(self):
+        with self._lock:
+            endpoint = self._select_endpoint()
+            endpoint.outstanding += 1
+
+            return endpoint
+
+    def _release(self, endpoint, success):
+        with self._lock:
+            endpoint.outstanding -= 1
+
+            if success is None:
+                # The request never reached the endpoint, eg: invalid options
+                endpoint.probing = False
+            elif success:
+                endpoint.consecutive_failures = 0
+                endpoint.ejected_until = None
+                endpoint.probing = False
+            else:
+                endpoint.consecutive_failures += 1
+
+                if (
+                    endpoint.probing
+                    or endpoint.consecutive_failures
+                    >= self.max_consecutive_failures
+                ):
+                    endpoint.ejected_until = (
+                        time.monotonic() + self.ejection_seconds
+                    )
+                    endpoint.probing = False
+
+    def _select_endpoint(self, allow_probe=True):
+        if allow_probe:
+            now = time.monotonic()
+
+            # Half-open: let a single probe through to an ejected endpoint
+            # whose ejection period has elapsed.
+            for endpoint in self.endpoints:
+                if (
+                    endpoint.ejected
+                    and not endpoint.probing
+                    and endpoint.ejected_until <= now
+                ):
+                    endpoint.probing = True
+                    return endpoint
+
+        healthy = [e for e in self.endpoints if not e.ejected]
+
+        if not healthy:
+            raise NoHealthyEndpointError(
+                "All endpoints in the pool are currently ejected"
+            )
+
+        if self.strategy == self.WEIGHTED_ROUND_ROBIN:
+            return self._weighted_round_robin(healthy)
+        else:
+            return min(healthy, key=lambda e: e.outstanding / e.weight)
+
+    def _weighted_round_robin(self, endpoints):
+        # Smooth weighted round robin, as used by nginx: spreads picks of
+        # heavier endpoints evenly rather than in bursts.
+        total_weight = 0
+        selected = None
+
+        for endpoint in endpoints:
+            endpoint._current_weight += endpoint.weight
+            total_weight += endpoint.weight
+
+            if (
+                selected is None
+                or endpoint._current_weight > selected._current_weight
+            ):
+                selected = endpoint
+
+        selected._current_weight -= total_weight
+
+        return selected
+
+    def _is_failure(self, response):
+        return response.status_code == 429 or response.status_code >= 500
@@ -0,0 +1,521 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from hashlib import blake2b
+from urlbox import webhook_validator
+
+# length, crc32 of the payload, sequence, recorded_at
+RECORD = struct.Struct("<IIQd")
+# magic, slots, used, clean
+INDEX_HEADER = struct.Struct("<8sQQQ")
+# renderId hash (0 when empty), segment, offset
+SLOT = struct.Struct("<QQQ")
+INDEX_MAGIC = b"UBXEVIDX"
+
+
+class WebhookEventLog:
+    """
+        An append-only local log of verified webhook events, indexed by
+        renderId.
+
+        record() verifies a callback with webhook_validator and appends its
+        payload to the current segment file of directory. Once a segment
+        reaches segment_bytes, a new one is started. Every record carries a
+        sequence number and a checksum, so a record torn by a crash is
+        detected and dropped when the log is opened again.
+
+        A hash table in a memory mapped file maps each renderId to its latest
+        event, so get() finds it with a single read from its segment however
+        long the log is. The index is rebuilt from the segments if the log
+        was not closed cleanly.
+
+        compact() rewrites the full segments, dropping the events superseded
+        by a later event of the same render, eg: a render.failed followed by
+        the render.succeeded of its retry. replay() streams the events in
+        order, to feed them to downstream consumers.
+
+        The log is safe to share between threads, but must only be opened by
+        one process at a time.
+
+        :param directory: directory the segments and index are kept in, created if needed.
+
+        :param webhook_secret: your webhook secret, to verify callbacks with.
+
+        :param segment_bytes: (Optional) size at which a new segment is started. Defaults to 64MB.
+
+        :param fsync: (Optional) flush every event to disk before record() returns. Defaults to False.
+
+        Example:
+        event_log = WebhookEventLog("webhook-events/", webhook_secret="YOUR_WEBHOOK_SECRET")
+
+        # In your webhook endpoint:
+        event_log.record(request.headers["x-urlbox-signature"], request.json)
+
+        # Anywhere else:
+        payload = event_log.get(render_id)
+        for sequence, payload in event_log.replay(after=last_sequence_processed):
+            consume(payload)
+    """
+
+    def __init__(
+        self,
+        directory,
+        *,
+        webhook_secret,
+        segment_bytes=64 * 1024 * 1024,
+        fsync=False,
+    ):
+        self.directory = str(directory)
+        self.webhook_secret = webhook_secret
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._fds = {}
+        self._map = None
+        os.makedirs(self.directory, exist_ok=True)
+
+        segments = self._segments()
+
+        if not segments:
+            segments = [1]
+
+        self._active = segments[-1]
+        self._fd = self._open_segment(self._active)
+        end, last_sequence = _last_record(self._fd)
+        os.ftruncate(self._fd, end)
+        self._next_sequence = max(last_sequence + 1, self._active)
+        self._open_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._used
+
+    def __contains__(self, render_id):
+        return self.get(render_id) is not None
+
+    def record(self, header_signature, payload):
+        """
+            Verifies a webhook callback and appends its payload to the log.
+
+            Raises an InvalidHeaderSignatureError, without recording anything,
+            if the callback is not a genuine Urlbox request. Returns the
+            sequence number of the event.
+
+            :param header_signature: the x-urlbox-signature header of the callback.
+
+            :param payload: the JSON body of the callback, parsed.
+        """
+
+        webhook_validator.call(header_signature, payload, self.webhook_secret)
+
+        return self.append(payload)
+
+    def append(self, payload):
+        """
+            Appends a payload that was already verified to the log and returns
+            its sequence number.
+        """
+
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        render_id = payload.get("renderId")
+
+        with self._lock:
+            offset = os.fstat(self._fd).st_size
+
+            if (
+                offset
+                and offset + RECORD.size + len(body) > self.segment_bytes
+            ):
+                self._rotate()
+                offset = 0
+
+            sequence = self._next_sequence
+            os.write(
+                self._fd,
+                RECORD.pack(len(body), zlib.crc32(body), sequence, time.time())
+                + body,
+            )
+
+            if self.fsync:
+                os.fsync(self._fd)
+
+            self._next_sequence += 1
+
+            if render_id is not None:
+                self._index(str(render_id), self._active, offset)
+
+        return sequence
+
+    def get(self, render_id):
+        """
+            Returns the payload of the latest event of render_id, or None.
+        """
+
+        with self._lock:
+            slot = self._find(str(render_id))
+
+            if slot is None:
+                return None
+
+            return self._read_payload(*self._slot(slot)[1:])
+
+    def replay(self, after=0):
+        """
+            Yields (sequence, payload) for every event in the log, in the
+            order they were recorded, reading one event at a time. Events
+            recorded while replaying are included.
+
+            :param after: (Optional) only yield events with a greater sequence
+            number, eg: the last sequence a consumer processed. Defaults to 0.
+        """
+
+        segment = 0
+
+        while True:
+            with self._lock:
+                segments = self._segments()
+
+            later = [s for s in segments if s > segment]
+
+            if not later:
+                return
+
+            # Skip the segments holding only events up to after.
+            for index, segment in enumerate(later):
+                if index + 1 == len(later) or later[index + 1] > after + 1:
+                    break
+
+            try:
+                file = open(self._segment_path(segment), "rb")
+            except FileNotFoundError:
+                continue
+
+            with file:
+                for sequence, _, body in _records(file):
+                    if sequence > after:
+                        yield sequence, json.loads(body)
+
+    def compact(self):
+        """
+            Rewrites every segment but the one being written to, keeping only
+            the latest event of each render and events without a renderId.
+            Returns a dictionary with the number of events removed and bytes
+            reclaimed.
+        """
+
+        removed = 0
+        reclaimed = 0
+
+        with self._lock:
+            for segment in self._segments()[:-1]:
+                segment_removed, segment_reclaimed = self._compact(segment)
+                removed += segment_removed
+                reclaimed += segment_reclaimed
+
+        return {"events_removed": removed, "bytes_reclaimed": reclaimed}
+
+    def close(self):
+        with self._lock:
+            if self._map is None:
+                return
+
+            INDEX_HEADER.pack_into(
+                self._map, 0, INDEX_MAGIC, self._slots, self._used, 1
+            )
+            self._map.flush()
+            self._map.close()
+            self._map = None
+
+            for fd in self._fds.values():
+                os.close(fd)
+
+            self._fds.clear()
+
+    # private
+
+    def _segments(self):
+        return sorted(
+            int(name[:-4])
+            for name in os.listdir(self.directory)
+            if name.endswith(".log") and name[:-4].isdigit()
+        )
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"{segment:020d}.log")
+
+    def _open_segment(self, segment):
+        if segment not in self._fds:
+            self._fds[segment] = os.open(
+                self._segment_path(segment),
+                os.O_RDWR | os.O_CREAT | os.O_APPEND,
+                0o600,
+            )
+
+        return self._fds[segment]
+
+    def _rotate(self):
+        self._active = self._next_sequence
+        self._fd = self._open_segment(self._active)
+
+    def _read_payload(self, segment, offset):
+        fd = self._open_segment(segment)
+        length = RECORD.unpack(os.pread(fd, RECORD.size, offset))[0]
+
+        return json.loads(os.pread(fd, length, offset + RECORD.size))
+
+    def _compact(self, segment):
+        path = self._segment_path(segment)
+        partial_path = f"{path}.partial"
+
+        try:
+            moves, removed, reclaimed = self._rewrite(
+                segment, path, partial_path
+            )
+
+            if not removed:
+                os.remove(partial_path)
+                return 0, 0
+
+            fd = self._fds.pop(segment, None)
+
+            if fd is not None:
+                os.close(fd)
+
+            if moves:
+                os.replace(partial_path, path)
+            else:
+                os.remove(partial_path)
+                os.remove(path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+            raise
+
+        for slot, new_offset in moves:
+            if slot is not None:
+                SLOT.pack_into(
+                    self._map,
+                    INDEX_HEADER.size + slot * SLOT.size,
+                    self._slot(slot)[0],
+                    segment,
+                    new_offset,
+                )
+
+        return removed, reclaimed
+
+    def _rewrite(self, segment, path, partial_path):
+        moves = []
+        removed = 0
+        offset = 0
+
+        with open(path, "rb") as file, open(partial_path, "wb") as partial:
+            for sequence, recorded_at, body in _records(file):
+                render_id = json.loads(body).get("renderId")
+                record_size = RECORD.size + len(body)
+                slot = None
+
+                if render_id is not None:
+                    slot = self._find(str(render_id))
+
+                if slot is not None and self._slot(slot)[1:] != (
+                    segment,
+                    offset,
+                ):
+                    removed += 1
+                    offset += record_size
+                    continue
+
+                moves.append((slot, partial.tell()))
+                partial.write(
+                    RECORD.pack(
+                        len(body), zlib.crc32(body), sequence, recorded_at
+                    )
+                    + body
+                )
+                offset += record_size
+
+            return moves, removed, offset - partial.tell()
+
+    def _open_index(self):
+        path = os.path.join(self.directory, "index")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        try:
+            header = os.pread(fd, INDEX_HEADER.size, 0)
+        finally:
+            os.close(fd)
+
+        if len(header) == INDEX_HEADER.size:
+            magic, slots, used, clean = INDEX_HEADER.unpack(header)
+
+            if magic == INDEX_MAGIC and clean:
+                self._map_index(path, slots, used)
+                return
+
+        self._rebuild_index()
+
+    def _map_index(self, path, slots, used):
+        with open(path, "r+b") as file:
+            self._map = mmap.mmap(file.fileno(), 0)
+
+        self._slots = slots
+        self._used = used
+        # Marked clean again by close(): until then a crash means the index
+        # may be missing events, and is rebuilt.
+        INDEX_HEADER.pack_into(self._map, 0, INDEX_MAGIC, slots, used, 0)
+        self._map.flush()
+
+    def _create_index(self, slots):
+        path = os.path.join(self.directory, "index")
+        partial_path = f"{path}.partial"
+
+        with open(partial_path, "wb") as file:
+            file.write(INDEX_HEADER.pack(INDEX_MAGIC, slots, 0, 0))
+            file.truncate(INDEX_HEADER.size + slots * SLOT.size)
+
+        if self._map is not None:
+            self._map.close()
+
+        os.replace(partial_path, path)
+        self._map_index(path, slots, 0)
+
+    def _rebuild_index(self):
+        self._create_index(1024)
+
+        for segment in self._segments():
+            offset = 0
+
+            with open(self._segment_path(segment), "rb") as file:
+                for _, _, body in _records(file):
+                    render_id = json.loads(body).get("renderId")
+
+                    if render_id is not None:
+                        self._index(str(render_id), segment, offset)
+
+                    offset += RECORD.size + len(body)
+
+    def _slot(self, slot):
+        return SLOT.unpack_from(
+            self._map, INDEX_HEADER.size + slot * SLOT.size
+        )
+
+    def _probe(self, key):
+        slot = key % self._slots
+
+        while True:
+            yield slot, self._slot(slot)
+            slot = (slot + 1) % self._slots
+
+    def _find(self, render_id):
+        key = _key(render_id)
+
+        for slot, (slot_key, segment, offset) in self._probe(key):
+            if slot_key == 0:
+                return None
+
+            # 64 bit hashes of different renderIds almost never collide, but
+            # the stored event is read to make sure.
+            if slot_key == key and (
+                str(self._read_payload(segment, offset).get("renderId"))
+                == render_id
+            ):
+                return slot
+
+    def _index(self, render_id, segment, offset):
+        slot = self._find(render_id)
+
+        if slot is None:
+            if (self._used + 1) * 2 > self._slots:
+                self._grow()
+
+            self._used += 1
+            slot = next(
+                slot
+                for slot, (slot_key, _, _) in self._probe(_key(render_id))
+                if slot_key == 0
+            )
+
+        SLOT.pack_into(
+            self._map,
+            INDEX_HEADER.size + slot * SLOT.size,
+            _key(render_id),
+            segment,
+            offset,
+        )
+
+    def _grow(self):
+        entries = [
+            self._slot(slot)
+            for slot in range(self._slots)
+            if self._slot(slot)[0] != 0
+        ]
+        self._create_index(self._slots * 2)
+        self._used = len(entries)
+
+        for key, segment, offset in entries:
+            slot = next(
+                slot
+                for slot, (slot_key, _, _) in self._probe(key)
+                if slot_key == 0
+            )
+            SLOT.pack_into(
+                self._map,
+                INDEX_HEADER.size + slot * SLOT.size,
+                key,
+                segment,
+                offset,
+            )
+
+
+def _key(render_id):
+    key = int.from_bytes(
+        blake2b(render_id.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+    return key or 1
+
+
+def _records(file):
+    """
+        Yields (sequence, recorded_at, body) for each complete record of a
+        segment file, stopping at the first torn or corrupted one.
+    """
+
+    while True:
+        header = file.read(RECORD.size)
+
+        if len(header) < RECORD.size:
+            return
+
+        length, crc, sequence, recorded_at = RECORD.unpack(header)
+        body = file.read(length)
+
+        if len(body) < length or zlib.crc32(body) != crc:
+            return
+
+        yield sequence, recorded_at, body
+
+
+def _last_record(fd):
+    end = 0
+    last_sequence = 0
+
+    with os.fdopen(os.dup(fd), "rb") as file:
+        file.seek(0)
+
+        for sequence, _, body in _records(file):
+            end += RECORD.size + len(body)
+            last_sequence = sequence
+
+    return end, last_sequence